@@ -0,0 +1,93 @@
+"""
+Benchmark the per-file CPU cost of classifying a path without opening it.
+
+Generates a synthetic list of repository paths and times the work `assess`
+does for each one from the path alone: get_language() (content checks
+skipped) and get_filename_metatypes(). Two variants are timed — the string
+API, which derives the basename, extension and normalised path inside every
+detector, and a PathInfo built once per file and shared by the detectors.
+
+    python benchmarks/bench_classify.py [PATHS]
+"""
+
+import os
+import random
+import sys
+import time
+
+from panopticas.core import (
+    DirectoryRules, PathInfo, get_filename_metatypes, get_language)
+
+DIRECTORIES = [
+    "", "src", "src/app", "lib/util", "tests", "docs", ".github/workflows",
+    "vendor/lib", "web/components/button", ".claude/skills/review",
+    "services/api/internal/handlers",
+]
+FILENAMES = [
+    "main.py", "util.ts", "index.js", "README.md", "server.go", "Makefile",
+    "lib.rs", "data.json", "requirements.txt", "CLAUDE.md", "app.min.js",
+    "Main.java", "style.css", "test_thing.py", "ci.yml", "Dockerfile",
+    "package.json", "service_pb2.py", "notes.txt", "logo.png",
+]
+
+
+def make_paths(count):
+    """Return `count` reproducible relative paths."""
+    rng = random.Random(1)
+    return [
+        "/".join(filter(None, [rng.choice(DIRECTORIES), rng.choice(FILENAMES)]))
+        for _ in range(count)
+    ]
+
+
+def classify_strings(paths):
+    for path in paths:
+        get_language(path, skip_shebang=True)
+        get_filename_metatypes(path)
+
+
+def classify_path_info(paths):
+    for path in paths:
+        info = PathInfo(path)
+        get_language(info, skip_shebang=True)
+        get_filename_metatypes(info)
+
+
+def classify_directory_rules(paths):
+    rules = {}
+    for path in paths:
+        directory, _, _ = path.rpartition("/")
+        dir_rules = rules.get(directory)
+        if dir_rules is None:
+            dir_rules = DirectoryRules.root()
+            for part in filter(None, directory.split("/")):
+                dir_rules = dir_rules.enter(part)
+            rules[directory] = dir_rules
+        info = PathInfo(path.replace("/", os.sep), dir_rules=dir_rules)
+        get_language(info, skip_shebang=True)
+        get_filename_metatypes(info)
+
+
+def best_of(function, paths, repeat=3):
+    """Return the best microseconds per path over `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(paths)
+        timings.append(time.perf_counter() - started)
+    return min(timings) / len(paths) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    paths = make_paths(count)
+    print(f"{count} paths\n")
+    print(f"{'variant':>10}  {'us/file':>8}")
+    for label, function in [("strings", classify_strings),
+                            ("PathInfo", classify_path_info),
+                            ("dir rules", classify_directory_rules)]:
+        print(f"{label:>10}  {best_of(function, paths):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark find_dependencies() cold, in a process pool, and from the cache.
+
+Writes a monorepo-shaped tree of package manifests — package.json,
+pyproject.toml, requirements.txt, go.mod and pom.xml, one set per
+service — and times three runs over it: parsing every manifest in-process,
+parsing them in a process pool, and a rerun with every manifest in the
+content-hash cache, which reads and hashes them but parses none.
+
+    python benchmarks/bench_deps.py [SERVICES]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from panopticas.core import find_dependencies
+
+
+def make_tree(root, services):
+    """Write `services` directories of manifests under `root`."""
+    for index in range(services):
+        service = os.path.join(root, "services", f"svc{index}")
+        os.makedirs(service)
+        packages = {f"pkg-{index}-{n}": f"^{n}.0.0" for n in range(40)}
+        with open(os.path.join(service, "package.json"), "w") as file:
+            json.dump({"name": f"svc{index}", "dependencies": packages,
+                       "devDependencies": {"jest": "^29"}}, file, indent=2)
+        with open(os.path.join(service, "pyproject.toml"), "w") as file:
+            file.write("[project]\ndependencies = [\n" + "".join(
+                f'    "lib{n}>={n}.0",\n' for n in range(30)) + "]\n")
+        with open(os.path.join(service, "requirements.txt"), "w") as file:
+            file.write("".join(f"lib{n}=={n}.0.{index}\n" for n in range(30)))
+        with open(os.path.join(service, "go.mod"), "w") as file:
+            file.write(f"module example.com/svc{index}\n\nrequire (\n" + "".join(
+                f"\tgithub.com/org/mod{n} v1.{n}.0\n" for n in range(30)) + ")\n")
+        with open(os.path.join(service, "pom.xml"), "w") as file:
+            file.write("<project><dependencies>" + "".join(
+                f"<dependency><groupId>org.g{n}</groupId><artifactId>a{n}"
+                f"</artifactId><version>{n}.{index}</version></dependency>"
+                for n in range(30)) + "</dependencies></project>")
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return time.perf_counter() - started, result
+
+
+def main():
+    services = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    with tempfile.TemporaryDirectory() as root:
+        os.environ["XDG_CACHE_HOME"] = os.path.join(root, "cache")
+        tree = os.path.join(root, "tree")
+        make_tree(tree, services)
+
+        serial, (dependencies, manifests) = timed(
+            lambda: find_dependencies(tree, cache=False, workers=1))
+        print(f"{len(manifests)} manifests, {len(dependencies)} dependencies\n")
+        pooled, _ = timed(lambda: find_dependencies(tree, cache=False))
+        find_dependencies(tree)
+        warm, (_, manifests) = timed(lambda: find_dependencies(tree))
+        assert all(manifest["cached"] for manifest in manifests)
+
+        print(f"{'run':<12}  {'seconds':>8}")
+        print(f"{'in-process':<12}  {serial:>8.3f}")
+        print(f"{'pool':<12}  {pooled:>8.3f}")
+        print(f"{'cached':<12}  {warm:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark count_lines() on large text files.
+
+Writes an ASCII log file and a UTF-8 file with multi-byte text, and times
+count_lines() on each against the text-mode loop it replaced — decode as
+UTF-8 and sum(1 for _ in file), one string per line. Reports throughput and,
+from tracemalloc, the peak memory each allocates while counting.
+
+    python benchmarks/bench_lines.py [MEGABYTES]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from panopticas.core import count_lines
+
+LINES = {
+    "ASCII log": b"2024-05-01T12:00:00Z INFO request served path=/api/v1/items "
+                 b"status=200 ms=12\n",
+    "UTF-8 text": "Größenänderung übernommen — état mis à jour, 完成\n".encode(),
+}
+
+
+def text_mode_count(path):
+    """The text-mode loop count_lines() used before."""
+    with open(path, encoding="utf-8") as file:
+        return sum(1 for _ in file)
+
+
+def measure(function, path, repeat=3):
+    """Return (seconds, peak bytes allocated) for the best of `repeat` runs."""
+    function(path)  # warm the page cache
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    print(f"{megabytes} MB files\n")
+    print(f"{'file':>10}  {'method':>10}  {'MB/s':>8}  {'peak KB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, line in LINES.items():
+            path = os.path.join(directory, "sample.txt")
+            with open(path, "wb") as file:
+                file.write(line * (megabytes * 1024 * 1024 // len(line)))
+            size = os.path.getsize(path) / (1024 * 1024)
+            assert count_lines(path) == text_mode_count(path)
+            for method, function in [("text mode", text_mode_count),
+                                     ("bytes", count_lines)]:
+                seconds, peak = measure(function, path)
+                print(f"{label:>10}  {method:>10}  {size / seconds:>8.0f}  "
+                      f"{peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark the streaming lockfile readers for time and peak memory.
+
+Generates a package-lock.json, yarn.lock, pnpm-lock.yaml and uv.lock of
+about SIZE megabytes each (default 100) and parses each with
+parse_manifest() from an open file, as find_dependencies() does. The
+package-lock.json and uv.lock are also loaded whole with json.load() and
+tomllib.load(), the approach the streaming readers replace.
+
+Peak memory is the tracemalloc peak of a separate run, so the timings are
+not slowed by tracing.
+
+    python benchmarks/bench_lockfiles.py [SIZE]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tomllib
+import tracemalloc
+
+from panopticas.deps import parse_manifest
+
+
+def _packages(size):
+    """(index, name, version, integrity) until `size` bytes' worth."""
+    index = 0
+    written = 0
+    while written < size:
+        name = f"@scope{index % 97}/package-{index}"
+        version = f"{index % 13}.{index % 7}.{index % 31}"
+        integrity = "sha512-" + hashlib.sha512(name.encode()).hexdigest()[:86]
+        yield index, name, version, integrity
+        index += 1
+        written += 300
+
+
+def write_package_lock(path, size):
+    with open(path, "w") as file:
+        file.write('{\n  "name": "app",\n  "version": "1.0.0",\n'
+                   '  "lockfileVersion": 3,\n  "requires": true,\n'
+                   '  "packages": {\n    "": {\n      "name": "app"\n    }')
+        for index, name, version, integrity in _packages(size):
+            file.write(
+                f',\n    "node_modules/{name}": {{\n'
+                f'      "version": "{version}",\n'
+                f'      "resolved": "https://registry.npmjs.org/{name}/-/'
+                f'package-{index}-{version}.tgz",\n'
+                f'      "integrity": "{integrity}",\n'
+                f'      "dev": {"true" if index % 3 == 0 else "false"}\n    }}')
+        file.write("\n  }\n}\n")
+
+
+def write_yarn_lock(path, size):
+    with open(path, "w") as file:
+        file.write("# yarn lockfile v1\n\n")
+        for index, name, version, integrity in _packages(size):
+            file.write(
+                f'\n"{name}@^{version}", "{name}@~{version}":\n'
+                f'  version "{version}"\n'
+                f'  resolved "https://registry.yarnpkg.com/{name}/-/'
+                f'package-{index}-{version}.tgz"\n'
+                f'  integrity {integrity}\n')
+
+
+def write_pnpm_lock(path, size):
+    with open(path, "w") as file:
+        file.write("lockfileVersion: '9.0'\n\npackages:\n")
+        for index, name, version, integrity in _packages(size):
+            file.write(
+                f"\n  '{name}@{version}':\n"
+                f"    resolution: {{integrity: {integrity}}}\n"
+                f"    engines: {{node: '>=18'}}\n")
+
+
+def write_uv_lock(path, size):
+    with open(path, "w") as file:
+        file.write('version = 1\nrequires-python = ">=3.12"\n')
+        for index, name, version, integrity in _packages(size):
+            name = f"package-{index}"
+            file.write(
+                f'\n[[package]]\nname = "{name}"\nversion = "{version}"\n'
+                f'source = {{ registry = "https://pypi.org/simple" }}\n'
+                f'sdist = {{ url = "https://files.pythonhosted.org/{name}.tar.gz",'
+                f' hash = "sha256:{integrity[7:71]}" }}\n')
+
+
+def streamed(kind, path):
+    with open(path, "rb") as file:
+        return len(parse_manifest(kind, file))
+
+
+def loaded(load, table, path):
+    """The entries of `table` in the whole document."""
+    with open(path, "rb") as file:
+        return len(load(file)[table])
+
+
+def measure(function):
+    """(seconds, peak MB, result) of two runs: one timed, one traced."""
+    started = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    function()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return seconds, peak, result
+
+
+def main():
+    size = int(float(sys.argv[1]) * 1e6) if len(sys.argv) > 1 else 100_000_000
+    writers = [
+        ("package-lock.json", write_package_lock,
+         ("json.load", json.load, "packages")),
+        ("yarn.lock", write_yarn_lock, None),
+        ("pnpm-lock.yaml", write_pnpm_lock, None),
+        ("uv.lock", write_uv_lock, ("tomllib.load", tomllib.load, "package")),
+    ]
+    print(f"{'lockfile':<18} {'MB':>5}  {'reader':<13} {'records':>8}"
+          f"  {'seconds':>7}  {'peak MB':>7}")
+    with tempfile.TemporaryDirectory() as root:
+        for kind, write, baseline in writers:
+            path = os.path.join(root, kind)
+            write(path, size)
+            megabytes = os.path.getsize(path) / 1e6
+            runs = [("streamed", lambda: streamed(kind, path))]
+            if baseline:
+                label, load, table = baseline
+                runs.append((label, lambda: loaded(load, table, path)))
+            for label, function in runs:
+                seconds, peak, records = measure(function)
+                print(f"{kind:<18} {megabytes:>5.0f}  {label:<13} {records:>8}"
+                      f"  {seconds:>7.2f}  {peak:>7.1f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
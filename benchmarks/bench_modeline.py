@@ -0,0 +1,97 @@
+"""
+Benchmark the I/O get_language() spends on files it cannot identify by name.
+
+Builds a tree of extensionless files — the only files that reach the content
+checks — in three sizes, and measures per file the read syscalls and bytes
+read (from /proc/self/io, so Linux only) and the wall time. The expectation
+is at most two reads and CONTENT_HEAD_BYTES + CONTENT_TAIL_BYTES bytes per
+file, whatever its size: the modeline and shebang checks share one head read
+and the tail is reached by a seek, never by reading the body.
+
+    python benchmarks/bench_modeline.py [FILES_PER_SIZE]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from panopticas.core import CONTENT_HEAD_BYTES, CONTENT_TAIL_BYTES, get_language
+
+SIZES = {
+    "1 KB": 1024,
+    "64 KB": 64 * 1024,
+    "8 MB": 8 * 1024 * 1024,
+}
+
+
+def proc_io():
+    """Return (read syscalls, bytes read) for this process so far."""
+    counters = {}
+    with open("/proc/self/io") as io:
+        for line in io:
+            key, value = line.split(":")
+            counters[key] = int(value)
+    return counters["syscr"], counters["rchar"]
+
+
+def make_files(directory, size, count):
+    """Write `count` extensionless files of `size` bytes with no modeline."""
+    line = b"data line without any declaration\n"
+    body = line * (size // len(line) + 1)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"unknown_{size}_{index}")
+        with open(path, "wb") as file:
+            file.write(body[:size])
+        paths.append(path)
+    return paths
+
+
+def measure(paths):
+    """Return (reads per file, bytes per file, microseconds per file)."""
+    # Warm the page cache so the timing reflects syscalls, not the disk.
+    for path in paths:
+        get_language(path)
+
+    # Measure the same calls twice: once reading /proc/self/io around the
+    # loop (its own reads are subtracted), once purely for the timing.
+    baseline_reads, baseline_bytes = proc_io()
+    probe_reads, probe_bytes = proc_io()
+    overhead_reads = probe_reads - baseline_reads
+    overhead_bytes = probe_bytes - baseline_bytes
+
+    before_reads, before_bytes = proc_io()
+    for path in paths:
+        assert get_language(path) == "Unknown"
+    after_reads, after_bytes = proc_io()
+
+    started = time.perf_counter()
+    for path in paths:
+        get_language(path)
+    elapsed = time.perf_counter() - started
+
+    reads = (after_reads - before_reads - overhead_reads) / len(paths)
+    read_bytes = (after_bytes - before_bytes - overhead_bytes) / len(paths)
+    return reads, read_bytes, elapsed / len(paths) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    if not os.path.exists("/proc/self/io"):
+        sys.exit("This benchmark reads /proc/self/io and needs Linux.")
+
+    print(f"Bound: 2 reads, {CONTENT_HEAD_BYTES + CONTENT_TAIL_BYTES} bytes "
+          "per file\n")
+    print(f"{'file size':>10}  {'reads/file':>10}  {'bytes/file':>10}  "
+          f"{'us/file':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, size in SIZES.items():
+            paths = make_files(directory, size, count)
+            reads, read_bytes, micros = measure(paths)
+            print(f"{label:>10}  {reads:>10.2f}  {read_bytes:>10.0f}  "
+                  f"{micros:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark provider classification of URL hosts as the provider table grows.
+
+Times url_provider()'s lookup two ways over the same synthetic hosts: a
+compiled regex per provider, tried in turn (longest domain first, so the
+answers agree), and the reversed label trie of a DomainMatcher. The table is
+PROVIDER_DOMAINS padded with synthetic providers, the shape hundreds of
+entries would take. The regexes' cost should grow with the table; the trie's
+should not.
+
+    python benchmarks/bench_providers.py [HOSTS]
+"""
+
+import random
+import re
+import sys
+import time
+
+from panopticas.constants import PROVIDER_DOMAINS
+from panopticas.matchers import DomainMatcher
+
+TABLE_SIZES = [len(PROVIDER_DOMAINS), 200, 1000]
+
+SUBDOMAINS = ["api", "www", "hooks", "eu-west-1.s3", "cdn", "auth", "docs"]
+
+
+def make_table(size):
+    """Return PROVIDER_DOMAINS padded to `size` providers."""
+    table = dict(PROVIDER_DOMAINS)
+    index = 0
+    while len(table) < size:
+        table[f"Provider {index}"] = (f"provider{index}.com",
+                                      f"provider{index}-cdn.net")
+        index += 1
+    return table
+
+
+def make_hosts(table, count):
+    """Hosts under the table's domains, and as many under none of them."""
+    rng = random.Random(46)
+    domains = [domain for domains in table.values() for domain in domains]
+    hosts = []
+    for index in range(count):
+        if index % 2:
+            domain = f"example{rng.randrange(5000)}.org"
+        else:
+            domain = rng.choice(domains)
+        hosts.append(f"{rng.choice(SUBDOMAINS)}.{domain}")
+    return hosts
+
+
+def regex_matcher(table):
+    """One regex per provider: the approach a trie walk replaces."""
+    patterns = sorted(
+        ((domain, provider) for provider, domains in table.items()
+         for domain in domains), key=lambda item: -len(item[0]))
+    compiled = [(re.compile(r"(?:^|\.)" + re.escape(domain) + r"$"), provider)
+                for domain, provider in patterns]
+
+    def search(host):
+        for pattern, provider in compiled:
+            if pattern.search(host):
+                return provider
+        return None
+    return search
+
+
+def best_of(function, hosts, repeat=3):
+    """Return the best microseconds per host over `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for host in hosts:
+            function(host)
+        timings.append(time.perf_counter() - started)
+    return min(timings) / len(hosts) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    print(f"{count} hosts\n")
+    print(f"{'providers':>10}  {'regex us':>8}  {'trie us':>8}")
+    for size in TABLE_SIZES:
+        table = make_table(size)
+        hosts = make_hosts(table, count)
+        matcher = DomainMatcher({domain: provider
+                                 for provider, domains in table.items()
+                                 for domain in domains})
+        regexes = regex_matcher(table)
+        for host in hosts:
+            assert matcher.search(host) == regexes(host), host
+        regex = best_of(regexes, hosts)
+        trie = best_of(matcher.search, hosts)
+        print(f"{size:>10}  {regex:>8.2f}  {trie:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
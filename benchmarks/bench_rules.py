@@ -0,0 +1,99 @@
+"""
+Benchmark path rule matching as the rule tables grow.
+
+Times the path_contains stage of get_filename_metatypes() two ways over the
+same synthetic paths: the old per-call loop (sort the fragments longest-first,
+then test each with `in`) and the compiled FragmentMatcher. The fragment table
+is METADATA_RULES["path_contains_rules"] padded with synthetic directory
+fragments, the shape a rule pack adds. The loop's cost should grow with the
+table; the matcher's should not.
+
+The same comparison is then made for AI_RULES, whose per-call sorting of the
+path_contains and filename_suffix keys get_ai_metadata() used to repeat for
+every file, against the compiled AIMatcher.
+
+    python benchmarks/bench_rules.py [PATHS]
+"""
+
+import sys
+import time
+
+from bench_classify import make_paths
+from panopticas.constants import AI_RULES, METADATA_RULES
+from panopticas.matchers import AIMatcher, FragmentMatcher
+
+TABLE_SIZES = [4, 64, 1024]
+
+
+def make_fragments(size):
+    """Return the real path_contains rules padded to `size` fragments."""
+    fragments = dict(METADATA_RULES["path_contains_rules"])
+    index = 0
+    while len(fragments) < size:
+        fragments[f"tools/generator{index}/"] = ["build"]
+        index += 1
+    return fragments
+
+
+def loop_match(fragments, path):
+    for fragment in sorted(fragments.keys(), key=len, reverse=True):
+        if fragment in path:
+            return fragments[fragment]
+    return None
+
+
+def loop_ai_match(path):
+    path = path.lower()
+    filename = path.rsplit("/", 1)[-1]
+    rule = AI_RULES["exact_filename"].get(filename)
+    if rule:
+        return rule
+    for fragment in sorted(AI_RULES["path_contains"], key=len, reverse=True):
+        if fragment in path:
+            return AI_RULES["path_contains"][fragment]
+    for suffix in sorted(AI_RULES["filename_suffix"], key=len, reverse=True):
+        if filename.endswith(suffix):
+            return AI_RULES["filename_suffix"][suffix]
+    return None
+
+
+def best_of(function, paths, repeat=3):
+    """Return the best microseconds per path over `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            function(path)
+        timings.append(time.perf_counter() - started)
+    return min(timings) / len(paths) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    paths = make_paths(count)
+    print(f"{count} paths\n")
+    print(f"{'fragments':>10}  {'loop us':>8}  {'matcher us':>10}")
+    for size in TABLE_SIZES:
+        fragments = make_fragments(size)
+        matcher = FragmentMatcher(fragments)
+        for path in paths:
+            assert matcher.search(path) == loop_match(fragments, path)
+        loop = best_of(lambda path: loop_match(fragments, path), paths)
+        compiled = best_of(matcher.search, paths)
+        print(f"{size:>10}  {loop:>8.2f}  {compiled:>10.2f}")
+
+    ai_matcher = AIMatcher(AI_RULES)
+
+    def compiled_ai_match(path):
+        path = path.lower()
+        return ai_matcher.match(path, path.rsplit("/", 1)[-1])
+
+    for path in paths:
+        assert compiled_ai_match(path) == loop_ai_match(path)
+    loop = best_of(loop_ai_match, paths)
+    compiled = best_of(compiled_ai_match, paths)
+    print(f"\n{'AI_RULES':>10}  {loop:>8.2f}  {compiled:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
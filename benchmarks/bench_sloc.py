@@ -0,0 +1,89 @@
+"""
+Benchmark count_sloc() throughput against count_lines().
+
+Writes a Python file and a C file of realistic shape — license header, doc
+comments, blank lines, strings holding comment markers — and reports MB/s
+for count_lines(), which only counts newlines, and for count_sloc(), which
+also runs the code/comment/blank state machine.
+
+    python benchmarks/bench_sloc.py [MEGABYTES]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from panopticas.core import count_lines, count_sloc
+
+SAMPLES = {
+    "Python": ("module.py", b'''# Copyright (c) Example Ltd. All rights reserved.
+# Licensed under the MIT License.
+
+"""Module docstring
+spanning lines."""
+
+import os  # the standard library
+
+
+def handler(event, context):
+    """Handle one event."""
+    path = os.path.join("/tmp", "# not a comment")
+
+    # Retry until the queue drains.
+    for attempt in range(3):
+        if process(event, path):
+            return {"status": 200, "body": 'done'}
+    return {"status": 500}
+
+'''),
+    "C": ("module.c", b'''/*
+ * Copyright (c) Example Ltd. All rights reserved.
+ * Licensed under the MIT License.
+ */
+
+#include <stdio.h>
+
+/* Print a greeting. */
+static int greet(const char *name)
+{
+    // Not a comment inside a string: "/* keep */"
+    printf("hello, %s /* not a comment */\\n", name);
+
+    return 0; /* trailing comment */
+}
+
+'''),
+}
+
+
+def throughput(function, path, repeat=5):
+    """Return the best MB/s over `repeat` runs."""
+    function(path)  # warm the page cache
+    best = min(_timed(function, path) for _ in range(repeat))
+    return os.path.getsize(path) / (1024 * 1024) / best
+
+
+def _timed(function, path):
+    started = time.perf_counter()
+    function(path)
+    return time.perf_counter() - started
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    print(f"{megabytes} MB files\n")
+    print(f"{'language':>8}  {'count_lines MB/s':>16}  {'count_sloc MB/s':>15}")
+    with tempfile.TemporaryDirectory() as directory:
+        for language, (name, block) in SAMPLES.items():
+            path = os.path.join(directory, name)
+            with open(path, "wb") as file:
+                file.write(block * (megabytes * 1024 * 1024 // len(block)))
+            counts = count_sloc(path)
+            assert counts.lines == count_lines(path)
+            print(f"{language:>8}  {throughput(count_lines, path):>16.0f}  "
+                  f"{throughput(count_sloc, path):>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark the tag stage on a source-heavy tree, with and without the quiet
+filter.
+
+Generates paths shaped like a large application repository — mostly plain
+source files (.py, .ts, .go, .java) in ordinary directories, with the usual
+sprinkling of manifests, workflows and vendored code — and times the work
+`assess` does per file to tag it: get_filename_metatypes() and
+get_ai_metadata() on a PathInfo carrying its DirectoryRules. The same paths
+are timed with the QuietFilter consulted and with it bypassed (every
+directory marked not quiet), which is how the detectors ran before it.
+
+    python benchmarks/bench_tags.py [PATHS]
+"""
+
+import os
+import random
+import sys
+import time
+
+from panopticas.core import (
+    DirectoryRules, PathInfo, get_ai_metadata, get_filename_metatypes)
+
+DIRECTORIES = [
+    "src/app", "src/app/models", "src/app/views", "lib/util", "tests/unit",
+    "services/api/internal/handlers", "web/components/button", "pkg/store",
+    "cmd/server", "docs",
+    # The minority whose directory matches a rule.
+    ".github/workflows", "vendor/lib", ".claude/skills/review",
+]
+SOURCE_FILES = [
+    "main.py", "models.py", "util.ts", "index.tsx", "server.go", "store.go",
+    "Main.java", "Service.java", "lib.rs", "style.css", "helpers.js",
+    "test_thing.py", "handler_test.go", "README.md", "schema.sql",
+]
+OTHER_FILES = [
+    "requirements.txt", "package.json", "Dockerfile", "ci.yml", "app.min.js",
+    "service_pb2.py", "LICENSE", "CLAUDE.md", "go.mod", "tsconfig.json",
+]
+# Share of paths that are plain source files in ordinary directories.
+SOURCE_SHARE = 0.9
+
+
+def make_paths(count):
+    """Return `count` reproducible relative paths, mostly plain source."""
+    rng = random.Random(1)
+    plain = DIRECTORIES[:10]
+    paths = []
+    for _ in range(count):
+        if rng.random() < SOURCE_SHARE:
+            directory, name = rng.choice(plain), rng.choice(SOURCE_FILES)
+        else:
+            directory = rng.choice(DIRECTORIES)
+            name = rng.choice(OTHER_FILES + SOURCE_FILES)
+        paths.append(f"{directory}/{name}")
+    return paths
+
+
+def with_rules(paths, quiet):
+    """Pair each path with its directory's DirectoryRules, built once each."""
+    rules = {}
+    infos = []
+    for path in paths:
+        directory, _, _ = path.rpartition("/")
+        dir_rules = rules.get(directory)
+        if dir_rules is None:
+            dir_rules = DirectoryRules.root()
+            for part in directory.split("/"):
+                dir_rules = dir_rules.enter(part)
+            if not quiet:
+                dir_rules.quiet = False
+            rules[directory] = dir_rules
+        infos.append(PathInfo(path.replace("/", os.sep), dir_rules=dir_rules))
+    return infos
+
+
+def tag(infos):
+    for info in infos:
+        get_filename_metatypes(info)
+        get_ai_metadata(info)
+
+
+def best_of(infos, repeat=7):
+    """Return the best microseconds per path over `repeat` runs."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        tag(infos)
+        timings.append(time.perf_counter() - started)
+    return min(timings) / len(infos) * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    paths = make_paths(count)
+    filtered, unfiltered = with_rules(paths, True), with_rules(paths, False)
+    for before, after in zip(unfiltered, filtered):
+        assert get_filename_metatypes(before) == get_filename_metatypes(after)
+        assert get_ai_metadata(before) == get_ai_metadata(after)
+
+    print(f"{count} paths, {SOURCE_SHARE:.0%} plain source\n")
+    print(f"{'variant':>14}  {'us/file':>8}")
+    print(f"{'no filter':>14}  {best_of(unfiltered):>8.2f}")
+    print(f"{'quiet filter':>14}  {best_of(filtered):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
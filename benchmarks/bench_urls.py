@@ -0,0 +1,71 @@
+"""
+Benchmark extract_urls_from_file() on large text files.
+
+Writes an ASCII log and a UTF-8 document with a URL every twenty lines, and
+times extract_urls_from_file() on each against what it replaced — read the
+whole file into one str and run the URL pattern over it. Reports throughput
+and, from tracemalloc, the peak memory each allocates.
+
+    python benchmarks/bench_urls.py [MEGABYTES]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from panopticas.core import URL_PATTERN, extract_urls_from_file
+
+BLOCKS = {
+    "ASCII log": b"2024-05-01T12:00:00Z INFO fetched https://api.example.com/v1/"
+                 b"items?page=2 status=200\n" + b"2024-05-01T12:00:01Z DEBUG "
+                 b"cache hit key=items:2 ms=1\n" * 19,
+    "UTF-8 text": "Größenänderung übernommen — voir https://example.org/état "
+                  "pour les détails.\n".encode()
+                  + "完成 état mis à jour, keine Änderung nötig.\n".encode() * 19,
+}
+
+
+def whole_file(path):
+    """The read-everything extraction extract_urls_from_file() used before."""
+    with open(path, encoding="utf-8") as file:
+        return URL_PATTERN.findall(file.read())
+
+
+def measure(function, path, repeat=3):
+    """Return (seconds, peak bytes allocated) for the best of `repeat` runs."""
+    function(path)  # warm the page cache
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    function(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    print(f"{megabytes} MB files\n")
+    print(f"{'file':>10}  {'method':>10}  {'MB/s':>8}  {'peak KB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, block in BLOCKS.items():
+            path = os.path.join(directory, "sample.txt")
+            with open(path, "wb") as file:
+                file.write(block * (megabytes * 1024 * 1024 // len(block)))
+            size = os.path.getsize(path) / (1024 * 1024)
+            assert extract_urls_from_file(path) == whole_file(path)
+            for method, function in [("whole file", whole_file),
+                                     ("streaming", extract_urls_from_file)]:
+                seconds, peak = measure(function, path)
+                print(f"{label:>10}  {method:>10}  {size / seconds:>8.0f}  "
+                      f"{peak / 1024:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,16 +4,38 @@ Panopticas - File type analysis and metadata extraction.
 
 from .constants import VERSION
 from .core import (
+    PathInfo,
+    DirectoryRules,
+    path_info,
     get_fileext,
     get_extension_filetype,
     get_filename_metatypes,
     get_ai_metadata,
+    get_generated_metatypes,
+    check_generated_content,
+    is_generated,
     check_shebang,
+    check_modeline,
+    get_modeline_language,
+    read_head_tail,
     get_shebang_language,
     count_lines,
+    count_lines_and_encoding,
+    detect_encoding,
+    count_sloc,
+    estimate_lines,
+    is_binary,
+    is_binary_content,
     load_gitignore_patterns,
+    walk_files,
+    should_read_content,
     identify_files,
     identify_files_with_metrics,
+    FileRecord,
+    ScanFilter,
+    scan_directory,
+    assess_directory,
+    extract_urls_from_directory,
     find_files,
     find_ai_files,
     extract_shebang_language,
@@ -21,25 +43,68 @@ from .core import (
     get_language,
     extract_urls,
     extract_urls_from_file,
+    extract_urls_and_encoding,
+    scan_file_content,
+    scan_content,
+    index_url_hosts,
+    find_url_providers,
+    sketch_urls,
+    find_dependencies,
     is_pip_requirements,
+    is_gemfile,
+    is_dockerfile_variant,
+    is_docker_compose,
+    is_tsconfig,
     get_tags,
     get_filetypes,
     get_languages,
+    get_vocabulary,
 )
+from .deps import Dependency, manifest_parser
+from .hosts import (
+    HostIndex, UrlHost, registrable_domain, url_host, url_provider)
+from .scanner import ContentScanner, content_detector
+from .sketches import CountMinSketch, HyperLogLog, UrlSketch
+from .sloc import SlocCounts
+from .vocabulary import Vocabulary
+from .rules import load_rule_packs
 
 __version__ = VERSION
 __all__ = [
     'VERSION',
+    'PathInfo',
+    'DirectoryRules',
+    'path_info',
     'get_fileext',
     'get_extension_filetype', 
     'get_filename_metatypes',
     'get_ai_metadata',
+    'get_generated_metatypes',
+    'check_generated_content',
+    'is_generated',
     'check_shebang',
+    'check_modeline',
+    'get_modeline_language',
+    'read_head_tail',
     'get_shebang_language',
     'count_lines',
+    'count_lines_and_encoding',
+    'detect_encoding',
+    'count_sloc',
+    'estimate_lines',
+    'SlocCounts',
+    'is_binary',
+    'is_binary_content',
     'load_gitignore_patterns',
+    'walk_files',
+    'should_read_content',
     'identify_files',
     'identify_files_with_metrics',
+    'FileRecord',
+    'ScanFilter',
+    'scan_directory',
+    'assess_directory',
+    'extract_urls_from_directory',
     'find_files',
     'find_ai_files',
     'extract_shebang_language',
@@ -47,8 +112,34 @@ __all__ = [
     'get_language',
     'extract_urls',
     'extract_urls_from_file',
+    'extract_urls_and_encoding',
+    'scan_file_content',
+    'scan_content',
+    'ContentScanner',
+    'content_detector',
+    'index_url_hosts',
+    'HostIndex',
+    'UrlHost',
+    'url_host',
+    'registrable_domain',
+    'find_url_providers',
+    'url_provider',
+    'sketch_urls',
+    'UrlSketch',
+    'HyperLogLog',
+    'CountMinSketch',
+    'find_dependencies',
+    'Dependency',
+    'manifest_parser',
     'is_pip_requirements',
+    'is_gemfile',
+    'is_dockerfile_variant',
+    'is_docker_compose',
+    'is_tsconfig',
     'get_tags',
     'get_filetypes',
     'get_languages',
+    'get_vocabulary',
+    'Vocabulary',
+    'load_rule_packs',
 ]
\ No newline at end of file
@@ -0,0 +1,50 @@
+"""
+The on-disk cache shared by the stages that keep one: compiled rule packs
+(rules.py) and parsed dependency manifests (deps.py).
+
+Entries are JSON files under $XDG_CACHE_HOME/panopticas (~/.cache/panopticas
+by default), plain data that loading cannot execute, in a directory created
+private to the user. A cache is only ever an optimisation: an entry that is
+missing, truncated or unreadable is a miss, and failing to write one is not
+an error.
+"""
+
+import json
+import os
+import tempfile
+
+
+def cache_dir():
+    """The directory panopticas caches in."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "panopticas")
+
+
+def read_cache(cache_path):
+    """Return the cached entry, or None on a miss or bad file."""
+    try:
+        with open(cache_path, "rb") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        # Missing, truncated or unreadable: rebuild it, never fail on it.
+        return None
+
+
+def write_cache(cache_path, entry):
+    """Write the cache atomically; failing to write it is not an error."""
+    directory = os.path.dirname(cache_path)
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(entry, file, separators=(",", ":"))
+        os.replace(temp_path, cache_path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
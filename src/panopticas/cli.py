@@ -1,6 +1,5 @@
 # panopticas CLI
 import json
-import os
 import re
 
 import click
@@ -8,7 +7,10 @@ from rich.columns import Columns
 from rich.console import Console
 from rich.markup import escape
 from rich.table import Table
-from . import core
+from . import core, rules
+from .scanner import DETECTORS, ContentScanner
+from .sketches import UrlSketch
+from .sloc import SlocCounts, summarise
 from .constants import VERSION
 
 # Shared console for all rich output.
@@ -26,20 +28,59 @@ json_option = click.option(
     help="Output as JSON.")
 
 
+def filter_options(command):
+    """
+    The --tag, --language, --product and --kind options shared by the scanning
+    commands. Each is repeatable; see core.ScanFilter for how they combine.
+    """
+    for name, help_text in (
+            ("kind", "Keep AI artifacts of this kind."),
+            ("product", "Keep AI artifacts of this product."),
+            ("language", "Keep files of this language."),
+            ("tag", "Keep files carrying this tag."),
+    ):
+        command = click.option(
+            f'--{name}', f'{name}_filters', multiple=True, metavar=name.upper(),
+            help=help_text + " Repeatable; any value matches.")(command)
+    return command
+
+
+def scan_filter(tag_filters=(), language_filters=(), product_filters=(),
+                kind_filters=()):
+    """Build the core.ScanFilter for a command's filter options."""
+    try:
+        return core.ScanFilter(tags=tag_filters, languages=language_filters,
+                               products=product_filters, kinds=kind_filters)
+    except ValueError as error:
+        raise click.UsageError(f"{error}. See `panopticas tags`.")
+
+
 @click.group(invoke_without_command=True)
 @click.version_option(version=VERSION)
+@click.option('--rules', 'rule_packs', multiple=True,
+              type=click.Path(exists=True, dir_okay=False),
+              help="Merge a TOML or JSON rule pack into the built-in rules. "
+                   "Repeatable; applied after any listed in PANOPTICAS_RULES.")
 @click.pass_context
-def cli(ctx):
+def cli(ctx, rule_packs):
     """Panopticas is a tool for identifying file types, code and git repositories.
 
-    In future, it will be possible identify external dependencies
-    (e.g. URLs, cloud providers)
+    It can also identify external dependencies: the packages its manifests
+    declare (`deps`), the URLs a tree references, and the cloud and SaaS
+    providers they point at (`urls --providers`).
 
     For documentation on how commands run `panopticas COMMAND --help`.
 
     See also https://panopticas.io/
 
     """
+    packs = rules.environment_rule_packs() + list(rule_packs)
+    if packs:
+        try:
+            rules.load_rule_packs(packs)
+        except ValueError as error:
+            raise click.ClickException(str(error))
+
     if ctx.invoked_subcommand is None:
         # Default behavior when no command is provided
         click.echo(ctx.get_help())
@@ -48,11 +89,41 @@ def cli(ctx):
 @cli.command("assess")
 @click.option('-unknown', is_flag=True, default=False, help="Show only files with an unknown language type.")
 @click.option('--lines', is_flag=True, default=False, help="Include line count for each file.")
+@click.option('--skip-generated', is_flag=True, default=False,
+              help="Don't count lines in vendored, generated or minified files.")
+@click.option('--lines-max-bytes', type=click.IntRange(min=0), default=None,
+              metavar='BYTES',
+              help="Don't count lines in files larger than this (implies --lines).")
+@click.option('--lines-estimate', is_flag=True, default=False,
+              help="Estimate lines in files over --lines-max-bytes (default "
+                   "64 MB) from sampled blocks (implies --lines).")
+@click.option('--sloc', is_flag=True, default=False,
+              help="Include code, comment and blank line counts, per file "
+                   "and per language.")
+@click.option('--path-only', is_flag=True, default=False,
+              help="Never open a file; identify everything from its path.")
+@filter_options
 @json_option
 @click.argument('directory', required=False,
                 type=click.Path(exists=True, file_okay=False, dir_okay=True))
-def assess(directory, unknown, lines, as_json):
+def assess(directory, unknown, lines, skip_generated, lines_max_bytes,
+           lines_estimate, sloc, path_only, as_json, **filters):
     """Assess a directory."""
+    lines = lines or lines_estimate or lines_max_bytes is not None
+    if path_only and (lines or sloc):
+        option = "--lines" if lines else "--sloc"
+        raise click.UsageError(
+            f"{option} reads file contents; it cannot be combined with --path-only.")
+    # -unknown is the language filter for UNKNOWN, applied in the scan like
+    # any other. Language filters are ORed, so with --language it would
+    # widen the selection instead of restricting it to unknown files.
+    if unknown:
+        if filters["language_filters"]:
+            raise click.UsageError(
+                "-unknown shows only files of unknown language; it cannot be "
+                "combined with --language.")
+        filters["language_filters"] = (core.UNKNOWN,)
+    selection = scan_filter(**filters)
     if not as_json:
         click.echo()
     if directory:
@@ -61,46 +132,46 @@ def assess(directory, unknown, lines, as_json):
         banner('Assessing current directory.', as_json)
         directory = "."
 
-    if lines:
-        files = core.identify_files_with_metrics(directory)
-    else:
-        files = core.identify_files(directory)
-
-    records = []
-    for file, file_info in files.items():
-        file_type = file_info['type'] if lines else file_info
-        if unknown and file_type not in (None, core.UNKNOWN):
-            continue
-        record = {
-            "path": file,
-            "language": file_type,
-            "meta": core.get_filename_metatypes(file),
-        }
-        if lines:
-            line_count = file_info['lines']
-            # count_lines() yields "N/A" for binaries; JSON says null.
-            record["lines"] = line_count if isinstance(line_count, int) else None
-        records.append(record)
+    # Interned records: names are restored only for the rows that are output.
+    # Filtering happens in the scan, so a file filtered out is never counted.
+    records = core.scan_directory(
+        directory, lines=lines, skip_generated=skip_generated,
+        path_only=path_only, scan_filter=selection, sloc=sloc,
+        lines_max_bytes=lines_max_bytes, lines_estimate=lines_estimate)
+    vocabulary = core.get_vocabulary()
+    if sloc:
+        by_language = summarise(
+            (vocabulary.language_name(r.language), r.sloc) for r in records)
 
     if as_json:
         payload = {
             "directory": directory,
             "count": len(records),
-            "files": records,
+            "files": [r.as_dict(vocabulary, lines, sloc) for r in records],
         }
         if lines:
             payload["total_lines"] = sum(
-                r["lines"] for r in records if r["lines"] is not None)
+                r.lines for r in records if r.lines is not None)
+        if lines_estimate:
+            payload["estimated_files"] = sum(r.estimated for r in records)
+        if sloc:
+            payload["sloc_by_language"] = by_language
         emit_json(payload)
         return
 
     caption = f"{len(records)} files"
     if lines:
-        counted = [r["lines"] for r in records if r["lines"] is not None]
+        counted = [r.lines for r in records if r.lines is not None]
         excluded = len(records) - len(counted)
+        estimated = sum(r.estimated for r in records)
         caption = f"{len(records)} files, {sum(counted):,} lines"
+        if estimated:
+            caption += f" ({estimated} estimated)"
         if excluded:
-            caption += f" ({excluded} excluded — binary/N/A)"
+            reasons = "binary/generated/N/A" if skip_generated else "binary/N/A"
+            if lines_max_bytes is not None and not lines_estimate:
+                reasons += "/too large"
+            caption += f" ({excluded} excluded — {reasons})"
 
     table = Table(title=f"Assessment of {cell(directory)}",
                   caption=caption, caption_style="dim")
@@ -112,24 +183,57 @@ def assess(directory, unknown, lines, as_json):
     table.add_column("Meta", justify="left", style="green")
     if lines:
         table.add_column("Lines", justify="right", style="bright_black")
+    if sloc:
+        for heading in ("Code", "Comment", "Blank"):
+            table.add_column(heading, justify="right", style="bright_black")
 
     for record in records:
         row = [
-            cell(record["path"]),
+            cell(record.path),
             # The language is untrusted too. get_language() falls back to
             # extract_shebang_language(), which returns text read out of the
             # file's first line — a crafted shebang reaches this column
             # verbatim. Only the Meta column is trusted (it comes from
             # constants.py).
-            cell(record["language"] or ""),
-            ", ".join(record["meta"]),
+            cell(vocabulary.language_name(record.language) or ""),
+            ", ".join(record.tag_names(vocabulary)),
         ]
         if lines:
-            row.append(str(record["lines"]) if record["lines"] is not None else "N/A")
+            if record.lines is None:
+                row.append("N/A")
+            else:
+                row.append(f"~{record.lines}" if record.estimated
+                           else str(record.lines))
+        if sloc:
+            row.extend(["N/A"] * 3 if record.sloc is None
+                       else [str(count) for count in record.sloc])
         table.add_row(*row)
 
     console.print(table)
     console.print()
+    if sloc:
+        print_sloc_summary(by_language)
+
+
+def print_sloc_summary(by_language):
+    """Print the per-language code/comment/blank totals under an assessment."""
+    table = Table(title="Lines by language")
+    table.add_column("Language", justify="left", style="magenta")
+    for heading in ("Files", "Code", "Comment", "Blank"):
+        table.add_column(heading, justify="right")
+    totals = SlocCounts()
+    files = 0
+    for language, summary in by_language.items():
+        counts = SlocCounts(summary["code"], summary["comment"], summary["blank"])
+        totals += counts
+        files += summary["files"]
+        # Shebang interpreter names are untrusted; see assess().
+        table.add_row(cell(language), f"{summary['files']:,}",
+                      *(f"{count:,}" for count in counts))
+    table.add_section()
+    table.add_row("Total", f"{files:,}", *(f"{count:,}" for count in totals))
+    console.print(table)
+    console.print()
 
 
 def print_vocabulary(values, noun):
@@ -229,11 +333,13 @@ def cell(value):
 @cli.command("ai")
 @click.option('--all-files', is_flag=True, default=False,
               help="Include gitignored files and bare AI directories.")
+@filter_options
 @json_option
 @click.argument('directory', required=False,
                  type=click.Path(exists=True, file_okay=False, dir_okay=True))
-def ai(directory, all_files, as_json):
+def ai(directory, all_files, as_json, **filters):
     """Find AI coding agent files and directories."""
+    selection = scan_filter(**filters)
     if not as_json:
         click.echo()
     if directory:
@@ -244,7 +350,8 @@ def ai(directory, all_files, as_json):
     if not as_json:
         click.echo()
 
-    ai_files = core.find_ai_files(directory, all_files=all_files)
+    ai_files = core.find_ai_files(directory, all_files=all_files,
+                                  scan_filter=selection)
 
     # Most-used product first, then alphabetical.
     counts = {}
@@ -302,8 +409,13 @@ def identify(file, as_json):
         "shebang_language": (
             core.extract_shebang_language(shebang) if shebang else None),
         "meta": core.get_filename_metatypes(file),
-        "urls": core.extract_urls_from_file(file),
     }
+    try:
+        payload["urls"], payload["encoding"] = core.extract_urls_and_encoding(
+            file)
+    except UnicodeDecodeError:
+        # A binary file, as the urls command reports one.
+        payload["urls"], payload["encoding"] = [], None
 
     if as_json:
         emit_json(payload)
@@ -324,6 +436,7 @@ def identify(file, as_json):
     table.add_row("Shebang", cell(payload["shebang"] or ""))
     table.add_row("Shebang Language", cell(payload["shebang_language"] or ""))
     table.add_row("Meta", ", ".join(payload["meta"]))
+    table.add_row("Encoding", payload["encoding"] or "")
     table.add_row("URLs", "\n".join(cell(url) for url in payload["urls"]))
 
     console.print(table)
@@ -332,29 +445,40 @@ def identify(file, as_json):
 
 @cli.command("urls")
 @click.option('-all-files', is_flag=True, default=False, help="Show all files, no gitignore.")
+@click.option('--skip-generated', is_flag=True, default=False,
+              help="Don't read vendored, generated or minified files.")
+@click.option('--by-host', is_flag=True, default=False,
+              help="Summarise the URLs by domain instead of listing them.")
+@click.option('--providers', is_flag=True, default=False,
+              help="Show the cloud and SaaS providers the URLs point at.")
+@click.option('--sketch', is_flag=True, default=False,
+              help="Estimate distinct URLs and hosts in fixed memory; with "
+                   "--json, emit a sketch for `panopticas merge-sketches`.")
 @json_option
 @click.argument('directory', required=True,
                 type=click.Path(exists=True, file_okay=False, dir_okay=True))
-def find_urls(directory, all_files, as_json):
+def find_urls(directory, all_files, skip_generated, by_host, providers,
+              sketch, as_json):
     """
     Find and show urls for all files in a given directory.
     """
-    files = core.find_files(directory, all_files=all_files)
-    # find_files() returns paths relative to `directory`, not to the
-    # process's cwd — join with `directory` to read the file, but keep the
-    # relative path in the record so JSON/table output matches prior output.
-    #
-    # This command scans a whole directory, so one undecodable file (a
-    # binary such as a .png) must not abort the run for every other file.
-    # extract_urls_from_file() raises UnicodeDecodeError for those; treat
-    # them the same as a file with no URLs rather than propagating.
-    records = []
-    for f in files:
-        try:
-            urls = core.extract_urls_from_file(os.path.join(directory, f))
-        except UnicodeDecodeError:
-            urls = []
-        records.append({"path": f, "urls": urls})
+    if by_host + providers + sketch > 1:
+        raise click.UsageError(
+            "--by-host, --providers and --sketch cannot be combined.")
+    if sketch:
+        url_sketch(directory, all_files, skip_generated, as_json)
+        return
+    if providers:
+        url_providers(directory, all_files, skip_generated, as_json)
+        return
+    if by_host:
+        url_hosts(directory, all_files, skip_generated, as_json)
+        return
+
+    # One undecodable file (a binary such as a .png) must not abort the run
+    # for every other file — the core reports it as having no URLs.
+    records = core.extract_urls_from_directory(
+        directory, all_files=all_files, skip_generated=skip_generated)
 
     if as_json:
         emit_json({
@@ -379,5 +503,278 @@ def find_urls(directory, all_files, as_json):
     console.print(table)
     console.print()
 
+def url_hosts(directory, all_files, skip_generated, as_json):
+    """`urls --by-host`: one row per registrable domain."""
+    index = core.index_url_hosts(
+        directory, all_files=all_files, skip_generated=skip_generated)
+
+    if as_json:
+        emit_json({"directory": directory, **index.as_dict()})
+        return
+
+    table = Table(title=f"URL hosts in {cell(directory)}",
+                  caption=f"{len(index.domains)} domains, {index.urls} URLs "
+                          f"in {index.files} files",
+                  caption_style="dim")
+    table.add_column("Domain", justify="left", style="cyan", overflow="fold")
+    table.add_column("URLs", justify="right", style="green")
+    table.add_column("Files", justify="right", style="green")
+    table.add_column("Hosts", justify="left", style="magenta", overflow="fold")
+    table.add_column("Sample files", justify="left", overflow="fold")
+
+    for entry in index.entries():
+        table.add_row(
+            cell(entry.domain), str(entry.urls), str(entry.files),
+            "\n".join(cell(host) for host in entry.as_dict()["hosts"]),
+            "\n".join(cell(path) for path in entry.samples))
+
+    console.print(table)
+    console.print()
+
+def url_providers(directory, all_files, skip_generated, as_json):
+    """`urls --providers`: each file's provider URLs, then a summary."""
+    records, index = core.find_url_providers(
+        directory, all_files=all_files, skip_generated=skip_generated)
+    summary = index.provider_entries()
+
+    if as_json:
+        emit_json({
+            "directory": directory,
+            "count": index.files,
+            "files": records,
+            "providers": [entry.as_dict() for entry in summary],
+        })
+        return
+
+    table = Table(title=f"Provider URLs in {cell(directory)}",
+                  caption=f"{len(records)} of {index.files} files",
+                  caption_style="dim")
+    table.add_column("Filename", justify="left", style="cyan", overflow="fold")
+    table.add_column("Provider", justify="left", style="green")
+    table.add_column("URLs", justify="left", style="magenta", overflow="fold")
+    for record in records:
+        for position, (provider, urls) in enumerate(
+                record["providers"].items()):
+            table.add_row(cell(record["path"]) if position == 0 else "",
+                          provider, "\n".join(cell(url) for url in urls))
+    console.print(table)
+
+    table = Table(title="Providers", caption=f"{len(summary)} providers",
+                  caption_style="dim")
+    table.add_column("Provider", justify="left", style="green")
+    table.add_column("URLs", justify="right", style="green")
+    table.add_column("Files", justify="right", style="green")
+    table.add_column("Hosts", justify="left", style="magenta", overflow="fold")
+    for entry in summary:
+        table.add_row(entry.provider, str(entry.urls), str(entry.files),
+                      "\n".join(cell(host) for host in entry.as_dict()["hosts"]))
+    console.print(table)
+    console.print()
+
+def url_sketch(directory, all_files, skip_generated, as_json):
+    """`urls --sketch`: estimates for one tree, and the sketch behind them."""
+    sketch = core.sketch_urls(
+        directory, all_files=all_files, skip_generated=skip_generated)
+
+    if as_json:
+        emit_json({"directory": directory, **sketch.summary(),
+                   "sketch": sketch.as_dict()})
+        return
+
+    print_sketch_summaries([(directory, sketch.summary())])
+    print_top_hosts(sketch.summary())
+
+
+@cli.command("merge-sketches")
+@json_option
+@click.argument('files', nargs=-1, required=True,
+                type=click.Path(exists=True, dir_okay=False))
+def merge_sketches(files, as_json):
+    """
+    Combine the JSON of `urls --sketch --json` runs, or of earlier merges,
+    into estimates per tree and overall, without re-scanning.
+    """
+    merged = None
+    rows = []
+    for path in files:
+        try:
+            with open(path, encoding="utf-8") as file:
+                document = json.load(file)
+            if not isinstance(document, dict) or "sketch" not in document:
+                raise ValueError(
+                    "not the JSON of `urls --sketch` or `merge-sketches`")
+            sketch = UrlSketch.from_dict(document["sketch"])
+            # Summarised before merging: the first sketch becomes the total.
+            rows.append((document.get("directory", path), sketch.summary()))
+            if merged is None:
+                merged = sketch
+            else:
+                merged.merge(sketch)
+        except (OSError, ValueError) as error:
+            raise click.ClickException(f"{path}: {error}")
+    total = merged.summary()
+
+    if as_json:
+        emit_json({
+            "count": len(rows),
+            "repos": [{"directory": label, **summary}
+                      for label, summary in rows],
+            "total": total,
+            "sketch": merged.as_dict(),
+        })
+        return
+
+    print_sketch_summaries(rows, total)
+    print_top_hosts(total)
+
+
+def print_sketch_summaries(rows, total=None):
+    """One row per (label, UrlSketch.summary()), and a total if given."""
+    table = Table(title="URL estimates",
+                  caption="Distinct counts are estimates", caption_style="dim")
+    table.add_column("Directory", justify="left", style="cyan", overflow="fold")
+    for title in ("Files", "URLs", "Distinct URLs", "Distinct hosts"):
+        table.add_column(title, justify="right", style="green")
+    keys = ("files", "urls", "distinct_urls", "distinct_hosts")
+    for label, summary in rows:
+        table.add_row(cell(label), *(f"{summary[key]:,}" for key in keys))
+    if total is not None:
+        table.add_section()
+        table.add_row("[bold]Total[/bold]",
+                      *(f"{total[key]:,}" for key in keys))
+    console.print(table)
+
+
+def print_top_hosts(summary):
+    """The top_hosts of a UrlSketch.summary()."""
+    table = Table(title="Most referenced hosts",
+                  caption="URL counts are upper-bound estimates",
+                  caption_style="dim")
+    table.add_column("Host", justify="left", style="magenta", overflow="fold")
+    table.add_column("URLs", justify="right", style="green")
+    for entry in summary["top_hosts"]:
+        table.add_row(cell(entry["host"]), f"{entry['urls']:,}")
+    console.print(table)
+    console.print()
+
+@cli.command("deps")
+@click.option('-all-files', is_flag=True, default=False, help="Show all files, no gitignore.")
+@click.option('--skip-generated', is_flag=True, default=False,
+              help="Leave out lockfiles and vendored manifests, such as "
+                   "node_modules/.")
+@click.option('--no-cache', 'use_cache', is_flag=True, default=True,
+              flag_value=False, help="Parse every manifest, ignoring the cache.")
+@click.option('--workers', type=click.IntRange(min=1), default=None,
+              help="Processes parsing manifests (default: one per CPU).")
+@json_option
+@click.argument('directory', required=True,
+                type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def deps(directory, all_files, skip_generated, use_cache, workers, as_json):
+    """
+    List the dependencies declared in a directory's package manifests.
+    """
+    dependencies, manifests = core.find_dependencies(
+        directory, all_files=all_files, skip_generated=skip_generated,
+        cache=use_cache, workers=workers)
+
+    if as_json:
+        emit_json({
+            "directory": directory,
+            "count": len(dependencies),
+            "manifests": manifests,
+            "dependencies": [dependency._asdict()
+                             for dependency in dependencies],
+        })
+        return
+
+    cached = sum(manifest["cached"] for manifest in manifests)
+    table = Table(title=f"Dependencies in {cell(directory)}",
+                  caption=f"{len(dependencies)} dependencies in "
+                          f"{len(manifests)} manifests ({cached} cached)",
+                  caption_style="dim")
+    table.add_column("Manifest", justify="left", style="cyan", overflow="fold")
+    table.add_column("Ecosystem", justify="left", style="green")
+    table.add_column("Name", justify="left", style="magenta", overflow="fold")
+    table.add_column("Version", justify="left", overflow="fold")
+    table.add_column("Scope", justify="left")
+
+    previous = None
+    for dependency in dependencies:
+        # Name each manifest once, on its first row.
+        manifest = dependency.manifest
+        table.add_row(cell(manifest) if manifest != previous else "",
+                      dependency.ecosystem, cell(dependency.name),
+                      cell(dependency.version or ""), dependency.scope)
+        previous = manifest
+
+    console.print(table)
+    console.print()
+    for manifest in manifests:
+        if manifest["error"]:
+            click.echo(sanitise_for_display(
+                f"{manifest['path']}: {manifest['error']}"), err=True)
+
+@cli.command("scan")
+@click.option('--detectors', default=None, metavar="NAMES",
+              help="Comma-separated content detectors to run "
+                   f"(default: all of {', '.join(DETECTORS)}).")
+@click.option('-all-files', is_flag=True, default=False, help="Show all files, no gitignore.")
+@click.option('--skip-generated', is_flag=True, default=False,
+              help="Don't read vendored, generated or minified files.")
+@json_option
+@click.argument('directory', required=True,
+                type=click.Path(exists=True, file_okay=False, dir_okay=True))
+def scan(directory, detectors, all_files, skip_generated, as_json):
+    """
+    Find URLs, emails, IP addresses, hostnames and likely secrets in a
+    directory's files, reading each file once.
+    """
+    names = None
+    if detectors is not None:
+        names = [name.strip().lower() for name in detectors.split(",")
+                 if name.strip()]
+    try:
+        scanner = ContentScanner(names)
+    except ValueError as error:
+        raise click.UsageError(
+            f"{error}. Choose from: {', '.join(DETECTORS)}.")
+    records = core.scan_content(directory, scanner, all_files=all_files,
+                                skip_generated=skip_generated)
+
+    if as_json:
+        emit_json({
+            "directory": directory,
+            "detectors": scanner.names,
+            "count": len(records),
+            "files": records,
+        })
+        return
+
+    # Only files with something to show: the JSON has them all.
+    found = [record for record in records
+             if any(record[name] for name in scanner.names)]
+    table = Table(title=f"Content in {cell(directory)}",
+                  caption=f"{len(found)} of {len(records)} files with findings",
+                  caption_style="dim")
+    table.add_column("Filename", justify="left", style="cyan", overflow="fold")
+    for detector in scanner.detectors:
+        table.add_column(detector.title, justify="left", style="magenta",
+                         overflow="fold")
+
+    for record in found:
+        table.add_row(
+            cell(record["path"]),
+            *("\n".join(cell(finding(value)) for value in record[name])
+              for name in scanner.names))
+
+    console.print(table)
+    console.print()
+
+def finding(value):
+    """A content detector's value as table text: secrets are records."""
+    if isinstance(value, dict):
+        return f"{value['line']}: {value['token']} ({value['kind']})"
+    return value
+
 if __name__ == '__main__':
     cli()
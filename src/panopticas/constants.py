@@ -16,8 +16,22 @@ except PackageNotFoundError:
 # these two are not restated anywhere.
 AI_TAG = "AI"
 LICENSE_TAG = "license"
+LICENSE_STEM = "license"
 IMPLICIT_TAGS = (AI_TAG, LICENSE_TAG)
 
+# Tags for files nobody wrote by hand. GENERATED_RULES assigns them from the
+# path; core.check_generated_content() can add the last two from the first
+# few KB of a file. Stages that are expensive per byte (line counting, URL
+# extraction) can skip files carrying any of them.
+VENDORED_TAG = "vendored"
+GENERATED_TAG = "generated"
+MINIFIED_TAG = "minified"
+GENERATED_TAGS = (VENDORED_TAG, GENERATED_TAG, MINIFIED_TAG)
+
+# The tag of package manifests and lockfiles. deps.py parses the ones it has
+# a parser for.
+DEPENDENCIES_TAG = "dependencies"
+
 EXT_FILETYPES = {
     ".c": "C",
     ".class": "Java Class",
@@ -113,6 +127,78 @@ LANGUAGE_BY_BASENAME = {
     "setup.cfg": "INI",
 }
 
+# Editor modeline names, lowercased, mapped to a file type already in
+# EXT_FILETYPES. Keys are the editors' own spellings — Vim's `ft=`/`syntax=`
+# values and Emacs major mode names without the "-mode" suffix — so several
+# keys map to one file type. Values must stay inside get_filetypes(); a test
+# asserts it, so a modeline can never introduce a file type the vocabulary
+# does not list.
+MODELINE_FILETYPES = {
+    "bash": "Shell",
+    "c": "C",
+    "c++": "C++",
+    "cperl": "Perl",
+    "cpp": "C++",
+    "cs": "C#",
+    "csharp": "C#",
+    "css": "CSS",
+    "dockerfile": "Dockerfile",
+    "dosini": "INI",
+    "go": "Go",
+    "groovy": "Groovy",
+    "html": "HTML",
+    "ini": "INI",
+    "java": "Java",
+    "javascript": "JavaScript",
+    "js": "JavaScript",
+    "js2": "JavaScript",
+    "json": "JSON",
+    "kotlin": "Kotlin",
+    "make": "Makefile",
+    "makefile": "Makefile",
+    "markdown": "Markdown",
+    "nxml": "XML",
+    "objc": "Objective-C",
+    "perl": "Perl",
+    "php": "PHP",
+    "powershell": "PowerShell",
+    "ps1": "PowerShell",
+    "python": "Python",
+    "r": "R",
+    "rst": "ReStructuredText",
+    "ruby": "Ruby",
+    "rust": "Rust",
+    "scala": "Scala",
+    "sh": "Shell",
+    "shell-script": "Shell",
+    "sql": "SQL",
+    "swift": "Swift",
+    "terraform": "Terraform",
+    "toml": "TOML",
+    "typescript": "TypeScript",
+    "xml": "XML",
+    "yaml": "YAML",
+    "zsh": "Shell",
+}
+
+# Extensions get_language() never opens a file for. None is in EXT_FILETYPES,
+# so each would otherwise fall through to the modeline and shebang checks —
+# but logs, data dumps, backups, build objects, archives and media never
+# carry a meaningful shebang or modeline, and on a network filesystem the
+# open is the expensive part of a scan. An executable file is still read.
+CONTENT_INERT_EXTENSIONS = frozenset({
+    # Logs, data and scratch files
+    ".bak", ".dat", ".db", ".log", ".old", ".orig", ".out", ".rej",
+    ".sqlite", ".swo", ".swp", ".tmp",
+    # Build objects and packages
+    ".a", ".bin", ".dylib", ".o", ".obj", ".pyc", ".pyo", ".so", ".whl",
+    # Archives
+    ".7z", ".bz2", ".gz", ".rar", ".tar", ".tgz", ".xz", ".zst",
+    # Fonts and media
+    ".bmp", ".eot", ".mov", ".mp3", ".mp4", ".otf", ".tiff", ".ttf",
+    ".wav", ".webp", ".woff", ".woff2",
+})
+
 # Classification of every value in EXT_FILETYPES and LANGUAGE_BY_BASENAME as
 # a language or not. get_languages() returns the first set.
 #
@@ -296,11 +382,61 @@ METADATA_RULES = {
         ".circleci/": ["pipeline", "CircleCI"],
         ".github": ["GitHub", "Git"],
     },
+    # Predicates registered with core.predicate_rule, for families of names
+    # too open-ended for exact_filename_rules.
     "function_rules": [
         ("is_pip_requirements", ["pip", "Python", "PyPi", "dependencies"]),
+        ("is_gemfile", ["Ruby", "bundler", "dependencies"]),
+        ("is_dockerfile_variant", ["IaC", "Docker", "dependencies"]),
+        ("is_docker_compose", ["IaC", "Docker", "config"]),
+        ("is_tsconfig", ["TypeScript", "build", "config"]),
     ],
 }
 
+# Vendored, generated and minified files, recognised from the path alone.
+GENERATED_RULES = {
+    # Matched as a substring of "/" + the lowercased, "/"-separated path.
+    # The slashes anchor each fragment to a whole directory name, so
+    # "vendor/" does not claim "myvendor/".
+    "path_contains": {
+        "/vendor/": [VENDORED_TAG],
+        "/third_party/": [VENDORED_TAG],
+        "/third-party/": [VENDORED_TAG],
+        "/node_modules/": [VENDORED_TAG],
+        "/bower_components/": [VENDORED_TAG],
+    },
+    # Matched against the end of the lowercased basename.
+    "filename_suffix": {
+        ".min.js": [MINIFIED_TAG],
+        ".min.mjs": [MINIFIED_TAG],
+        ".min.css": [MINIFIED_TAG],
+        "_pb2.py": [GENERATED_TAG],
+        "_pb2.pyi": [GENERATED_TAG],
+        "_pb2_grpc.py": [GENERATED_TAG],
+        ".pb.go": [GENERATED_TAG],
+        ".pb.cc": [GENERATED_TAG],
+        ".pb.h": [GENERATED_TAG],
+        ".g.dart": [GENERATED_TAG],
+        ".designer.cs": [GENERATED_TAG],
+    },
+    # Lockfiles are written by the package manager, never by hand. Matched
+    # against the lowercased basename.
+    "exact_filename": {
+        "cargo.lock": [GENERATED_TAG],
+        "composer.lock": [GENERATED_TAG],
+        "gemfile.lock": [GENERATED_TAG],
+        "go.sum": [GENERATED_TAG],
+        "npm-shrinkwrap.json": [GENERATED_TAG],
+        "package-lock.json": [GENERATED_TAG],
+        "packages.lock.json": [GENERATED_TAG],
+        "pipfile.lock": [GENERATED_TAG],
+        "pnpm-lock.yaml": [GENERATED_TAG],
+        "poetry.lock": [GENERATED_TAG],
+        "uv.lock": [GENERATED_TAG],
+        "yarn.lock": [GENERATED_TAG],
+    },
+}
+
 # The complete set of legal `kind` values for an AI artifact.
 # A rule may not use a kind outside this set.
 AI_ARTIFACT_KINDS = {
@@ -436,3 +572,175 @@ AI_RULES = {
         ".mdc": ("Cursor", "rules"),
     },
 }
+
+# Comment and string syntax per language, for count_sloc(). Keys are the
+# names get_language() returns, including the interpreter names a shebang can
+# yield ("bash", "node"). Each entry lists:
+#   line        markers that comment out the rest of the line
+#   block       (open, close) pairs of block comment delimiters
+#   nested      True if block comments nest (Rust, Swift, Scala, Kotlin)
+#   strings     delimiters of strings that end at the line's end if unclosed
+#   multiline   delimiters of strings that may span lines
+# A comment marker inside a string is not a comment, and a quote inside a
+# comment is not a string. Backslash escapes are honoured inside strings.
+# Languages absent from this table are not SLOC-counted.
+_C_SYNTAX = {"line": ("//",), "block": (("/*", "*/"),),
+             "strings": ('"', "'")}
+_JS_SYNTAX = dict(_C_SYNTAX, multiline=("`",))
+_NESTED_C_SYNTAX = dict(_C_SYNTAX, nested=True)
+_HASH_SYNTAX = {"line": ("#",), "strings": ('"', "'")}
+_HTML_SYNTAX = {"block": (("<!--", "-->"),)}
+
+COMMENT_SYNTAX = {
+    "C": _C_SYNTAX,
+    "C Header": _C_SYNTAX,
+    "C++": _C_SYNTAX,
+    "C#": _C_SYNTAX,
+    "Objective-C": _C_SYNTAX,
+    "Java": _C_SYNTAX,
+    "Groovy": dict(_C_SYNTAX, multiline=('"""', "'''")),
+    "Kotlin": dict(_NESTED_C_SYNTAX, multiline=('"""',)),
+    "Scala": dict(_NESTED_C_SYNTAX, multiline=('"""',)),
+    # A ' in Rust is usually a lifetime, not a quote.
+    "Rust": dict(_NESTED_C_SYNTAX, strings=('"',)),
+    "Swift": dict(_NESTED_C_SYNTAX, strings=('"',), multiline=('"""',)),
+    "Go": dict(_C_SYNTAX, multiline=("`",)),
+    "JavaScript": _JS_SYNTAX,
+    "JSX": _JS_SYNTAX,
+    "TypeScript": _JS_SYNTAX,
+    "TSX": _JS_SYNTAX,
+    "Vue": dict(_JS_SYNTAX, block=(("/*", "*/"), ("<!--", "-->"))),
+    "CSS": {"block": (("/*", "*/"),), "strings": ('"', "'")},
+    "PHP": dict(_C_SYNTAX, line=("//", "#")),
+    "Python": dict(_HASH_SYNTAX, multiline=('"""', "'''")),
+    "Ruby": _HASH_SYNTAX,
+    "Perl": _HASH_SYNTAX,
+    "R": _HASH_SYNTAX,
+    "Shell": _HASH_SYNTAX,
+    "Makefile": {"line": ("#",)},
+    "Dockerfile": {"line": ("#",)},
+    "PowerShell": dict(_HASH_SYNTAX, block=(("<#", "#>"),)),
+    "Terraform": dict(_HASH_SYNTAX, line=("#", "//"), block=(("/*", "*/"),),
+                      strings=('"',)),
+    "SQL": {"line": ("--",), "block": (("/*", "*/"),), "strings": ("'",)},
+    "HTML": _HTML_SYNTAX,
+    "XML": _HTML_SYNTAX,
+    "Groovy Server Pages": {"block": (("<%--", "--%>"), ("<!--", "-->"))},
+    "YAML": _HASH_SYNTAX,
+    "TOML": dict(_HASH_SYNTAX, multiline=('"""', "'''")),
+    "INI": {"line": (";", "#")},
+    "Properties": {"line": ("#", "!")},
+    "JSON": {"strings": ('"',)},
+    # Interpreters a shebang names directly.
+    "bash": _HASH_SYNTAX,
+    "sh": _HASH_SYNTAX,
+    "zsh": _HASH_SYNTAX,
+    "node": _JS_SYNTAX,
+    "perl": _HASH_SYNTAX,
+    "ruby": _HASH_SYNTAX,
+}
+
+# Top-level domains the "hostnames" content detector accepts. A bare dotted
+# name is only taken for a hostname when it ends in one of these, and TLDs
+# that double as common file extensions (.md, .py, .sh, .rs, .pl, .cc, .so,
+# ...) are left out, so README.md and setup.py are not hostnames.
+HOSTNAME_TLDS = frozenset({
+    "com", "org", "net", "edu", "gov", "mil", "int", "info", "biz",
+    "io", "dev", "app", "ai", "cloud", "tech", "site", "online", "xyz",
+    "local", "internal", "localhost", "corp", "lan",
+    "au", "br", "ca", "ch", "cn", "co", "de", "es", "eu", "fr", "ie", "in",
+    "it", "jp", "kr", "me", "mx", "nl", "nz", "ru", "se", "tv", "uk",
+    "us", "za",
+})
+
+# Known secret formats, by kind, for the "secrets" content detector. Each is
+# searched for within candidate tokens — runs of 20 or more base64 or
+# URL-safe base64 characters — and is reported whatever the token's entropy.
+# Earlier entries win where two match the same token.
+SECRET_PREFIXES = {
+    "AWS access key": r"(?:AKIA|ASIA)[0-9A-Z]{16}",
+    "GitHub token": r"gh[pousr]_[A-Za-z0-9]{36,}",
+    "GitHub fine-grained token": r"github_pat_[A-Za-z0-9_]{22,}",
+    "GitLab token": r"glpat-[A-Za-z0-9_-]{20,}",
+    "Slack token": r"xox[abposr]-[A-Za-z0-9-]{10,}",
+    "Stripe secret key": r"[rs]k_live_[A-Za-z0-9]{24,}",
+    "Google API key": r"AIza[A-Za-z0-9_-]{35}",
+    "npm token": r"npm_[A-Za-z0-9]{36}",
+    "Anthropic API key": r"sk-ant-[A-Za-z0-9_-]{20,}",
+    "OpenAI API key": r"sk-(?:proj-)?[A-Za-z0-9_-]{20,}",
+}
+
+# Suffixes under which names are registered a level further down, so that
+# the registrable domain of www.example.co.uk is example.co.uk, and of
+# someone.github.io is someone.github.io. A short list of the common public
+# and hosting suffixes, not the Public Suffix List.
+MULTI_LABEL_SUFFIXES = frozenset({
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "edu.au", "gov.au",
+    "co.nz", "org.nz", "co.jp", "ne.jp", "or.jp", "co.kr", "co.in", "co.za",
+    "com.br", "com.cn", "com.mx", "com.sg", "com.tw", "com.hk",
+    "github.io", "gitlab.io", "herokuapp.com", "pages.dev", "netlify.app",
+    "vercel.app", "azurewebsites.net", "cloudfront.net", "appspot.com",
+    "web.app", "firebaseapp.com",
+})
+
+# Cloud and SaaS providers by the domains their endpoints live under, for
+# classifying URLs (`urls --providers`). A host belongs to the provider of
+# the longest entry it equals or is a subdomain of, so hooks.slack.com is a
+# Slack webhook while slack.com is Slack.
+PROVIDER_DOMAINS = {
+    "AWS": ("amazonaws.com", "aws.amazon.com", "awsapps.com",
+            "cloudfront.net", "amazoncognito.com", "elasticbeanstalk.com",
+            "awsstatic.com", "aws.dev", "on.aws", "api.aws"),
+    "AWS S3": ("s3.amazonaws.com",),
+    "Azure": ("azure.com", "azure.net", "azurewebsites.net",
+              "windows.net", "azureedge.net", "azurecr.io",
+              "azure-api.net", "azurefd.net", "azurestaticapps.net",
+              "cloudapp.net", "microsoftonline.com", "visualstudio.com"),
+    "Azure DevOps": ("dev.azure.com",),
+    "Google Cloud": ("googleapis.com", "cloud.google.com", "appspot.com",
+                     "run.app", "cloudfunctions.net", "gcr.io", "pkg.dev",
+                     "googleusercontent.com", "gstatic.com"),
+    "Firebase": ("firebaseio.com", "firebaseapp.com", "web.app",
+                 "firebasestorage.app"),
+    "Cloudflare": ("cloudflare.com", "workers.dev", "pages.dev",
+                   "r2.dev", "r2.cloudflarestorage.com"),
+    "DigitalOcean": ("digitalocean.com", "digitaloceanspaces.com",
+                     "ondigitalocean.app"),
+    "Oracle Cloud": ("oraclecloud.com",),
+    "IBM Cloud": ("cloud.ibm.com", "appdomain.cloud"),
+    "Alibaba Cloud": ("aliyuncs.com", "alibabacloud.com"),
+    "Heroku": ("heroku.com", "herokuapp.com"),
+    "Vercel": ("vercel.com", "vercel.app"),
+    "Netlify": ("netlify.com", "netlify.app"),
+    "Fly.io": ("fly.io", "fly.dev"),
+    "Render": ("render.com", "onrender.com"),
+    "GitHub": ("github.com", "githubusercontent.com", "github.io",
+               "githubassets.com", "ghcr.io"),
+    "GitLab": ("gitlab.com", "gitlab.io"),
+    "Bitbucket": ("bitbucket.org", "atlassian.net"),
+    "Docker Hub": ("docker.io", "docker.com"),
+    "Slack": ("slack.com", "slack-edge.com"),
+    "Slack webhook": ("hooks.slack.com",),
+    "Discord": ("discord.com", "discordapp.com", "discord.gg"),
+    "Microsoft Teams webhook": ("webhook.office.com",),
+    "Stripe": ("stripe.com",),
+    "Twilio": ("twilio.com",),
+    "SendGrid": ("sendgrid.com", "sendgrid.net"),
+    "Mailgun": ("mailgun.net", "mailgun.org"),
+    "Datadog": ("datadoghq.com", "datadoghq.eu"),
+    "Sentry": ("sentry.io",),
+    "New Relic": ("newrelic.com", "nr-data.net"),
+    "PagerDuty": ("pagerduty.com",),
+    "Okta": ("okta.com", "oktapreview.com"),
+    "Auth0": ("auth0.com",),
+    "Salesforce": ("salesforce.com", "force.com"),
+    "Snowflake": ("snowflakecomputing.com",),
+    "MongoDB Atlas": ("mongodb.net",),
+    "Supabase": ("supabase.co", "supabase.com"),
+    "OpenAI": ("openai.com",),
+    "Anthropic": ("anthropic.com",),
+    "Hugging Face": ("huggingface.co",),
+    "npm": ("npmjs.com", "npmjs.org"),
+    "PyPI": ("pypi.org", "pythonhosted.org"),
+}
@@ -1,24 +1,264 @@
 """
 Analysis functions for Panopticas.
 """
+import codecs
+import io
+import itertools
 import os
 import re
+import stat
 import pathspec
 from .constants import (
+    AI_ARTIFACT_KINDS,
     AI_RULES,
     AI_TAG,
+    CONTENT_INERT_EXTENSIONS,
+    DEPENDENCIES_TAG,
     EXT_FILETYPES,
+    GENERATED_RULES,
+    GENERATED_TAG,
+    GENERATED_TAGS,
     IMPLICIT_TAGS,
     LANGUAGE_BY_BASENAME,
     LANGUAGE_FILETYPES,
+    LICENSE_STEM,
     LICENSE_TAG,
     METADATA_RULES,
+    MINIFIED_TAG,
+    MODELINE_FILETYPES,
+)
+from .deps import deps_cache_path, manifest_kind, parse_manifests
+from .hosts import HOST_SAMPLE_FILES, HostIndex
+from .scanner import URL_PATTERN, ContentScanner
+from .sketches import SKETCH_PRECISION, SKETCH_TOP, UrlSketch
+from .sloc import sloc_dict, syntax_for
+from .vocabulary import Vocabulary
+from .matchers import (
+    BASENAME_SCOPE,
+    AIMatcher,
+    MetadataMatcher,
+    PredicateRule,
+    QuietFilter,
 )
 
 UNKNOWN = "Unknown"
 
+# The interned vocabulary, built by get_vocabulary() on first use and dropped
+# whenever the rules are recompiled.
+_VOCABULARY = None
+
+# Content reads made by get_language() are bounded to one read at each end of
+# the file. Vim scans the first and last five lines for a modeline and Emacs
+# reads its Local Variables block from the last 3000 characters, so 4 KB at
+# either end covers both without ever touching the body of a large file.
+CONTENT_HEAD_BYTES = 4096
+CONTENT_TAIL_BYTES = 4096
+MODELINE_LINES = 5
+
+# A NUL byte in the first BINARY_SNIFF_BYTES marks a file as binary. This is
+# git's own test (buffer_is_binary() over FIRST_FEW_BYTES), and it decides
+# after one small read rather than after decoding up to the first bad byte.
+BINARY_SNIFF_BYTES = 8000
+
+# count_lines() reads in chunks of this size into a single buffer, and never
+# builds a string per line. Large enough that the per-read overhead vanishes,
+# small enough to stay in cache.
+LINE_COUNT_CHUNK_BYTES = 1024 * 1024
+# Non-ASCII chunks are checked as UTF-8 this many bytes at a time.
+UTF8_CHECK_BYTES = 64 * 1024
+_UTF8_DECODER = codecs.getincrementaldecoder("utf-8")
+
+# detect_encoding() answers with one of these Python codec names. Byte order
+# marks are tested longest first: UTF-32-LE's begins with UTF-16-LE's.
+BYTE_ORDER_MARKS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+# Files are searched for URLs and the rest of the content detectors this
+# many bytes (or, decoded, characters) at a time.
+URL_SCAN_CHUNK_BYTES = 1024 * 1024
+
+# Text that is not UTF-8 is taken to be an 8-bit legacy encoding. Latin-1
+# decodes any byte, and like every ASCII-compatible encoding ends its lines
+# with the same "\n" and "\r" bytes, so line counts do not depend on the
+# guess.
+LEGACY_ENCODING = "latin-1"
+# Encodings whose newline is not the byte "\n", with their code unit size:
+# these are counted and searched through a decoder.
+WIDE_ENCODINGS = {"utf-16-le": 2, "utf-16-be": 2, "utf-32-le": 4,
+                  "utf-32-be": 4}
+
+# estimate_lines() reads LINE_ESTIMATE_SAMPLES evenly spaced blocks of
+# LINE_ESTIMATE_BLOCK_BYTES, the first at the start of the file and the last
+# at its end: 1 MB however large the file. Scans asked to estimate do so for
+# files over LINE_ESTIMATE_THRESHOLD_BYTES unless given another limit.
+LINE_ESTIMATE_SAMPLES = 16
+LINE_ESTIMATE_BLOCK_BYTES = 64 * 1024
+LINE_ESTIMATE_THRESHOLD_BYTES = 64 * 1024 * 1024
+
+# A file shorter than this cannot hold a shebang ("#!") or a modeline, so
+# should_read_content() never opens it. Any of user, group or other execute
+# permission marks a file as worth reading regardless of its extension.
+MIN_CONTENT_BYTES = 2
+EXECUTABLE_BITS = stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+
+# vim: ft=groovy / vi: set filetype=sh : / ex: syntax=python
+VIM_MODELINE = re.compile(r'(?:^|\s)(?:vi|vim|Vim|ex):\s*(?:set?\s+)?(.*)')
+VIM_FILETYPE = re.compile(r'(?:^|[\s:])(?:ft|filetype|syn|syntax)=([\w+#.-]+)')
+# -*- mode: python -*- / -*- python -*- / -*- mode: sh; coding: utf-8 -*-
+EMACS_MODELINE = re.compile(r'-\*-\s*(.*?)\s*-\*-')
+EMACS_MODE = re.compile(r'(?:^|;)\s*mode:\s*([\w+#.-]+)', re.IGNORECASE)
+# Local Variables: block at the end of a file, each line behind a comment
+# prefix such as "# " or ";; ", up to an End: line.
+EMACS_LOCAL_VARIABLES = "Local Variables:"
+EMACS_LOCAL_MODE = re.compile(r'\W*mode:\s*([\w+#.-]+)', re.IGNORECASE)
+EMACS_LOCAL_END = re.compile(r'\W*End:', re.IGNORECASE)
+
+# Content signals for check_generated_content(). Minified bundles put a whole
+# program on a handful of lines, so a head whose average line is this long is
+# not hand-written. Generator banners sit at the very top of the file.
+MINIFIED_LINE_LENGTH = 500
+GENERATED_HEADER_LINES = 10
+GENERATED_HEADER = re.compile(
+    r'@generated|generated by|auto-?generated|code generated|do not edit',
+    re.IGNORECASE)
+
+# Predicates METADATA_RULES["function_rules"] can name, registered by
+# @predicate_rule.
+PREDICATE_RULES = {}
+
+def predicate_rule(pattern, scope=BASENAME_SCOPE):
+    """
+    Register a function as a predicate rule matched with `pattern`, a
+    compiled regex tested with match() against the lowercased basename or,
+    with scope=PATH_SCOPE, the lowercased "/"-separated path.
+
+    The pattern, not the function, is what get_filename_metatypes()
+    evaluates — it is folded into one alternation with the other rules'
+    patterns — so the function must answer exactly as the pattern does. For
+    the same reason the pattern must be anchored at the end and carry no
+    flags of its own.
+    """
+    if pattern.flags & ~re.UNICODE:
+        raise ValueError(f"predicate_rule: {pattern.pattern!r} has flags")
+
+    def register(function):
+        PREDICATE_RULES[function.__name__] = PredicateRule(
+            function.__name__, function, pattern, scope)
+        return function
+
+    return register
+
+class PathInfo:
+    """
+    The parts of a path every detector needs, computed once.
+
+    get_language(), get_filename_metatypes(), get_ai_metadata() and the rest
+    each used to re-split and re-lowercase the same path; a scan now builds
+    one PathInfo per file and hands it to all of them. Every detector still
+    accepts a plain string and wraps it itself, so the string API is
+    unchanged.
+
+    path is the path the rules see (relative, in a directory scan). full_path
+    is the path to open for content checks, and defaults to path. dir_rules,
+    when a scan supplies it, is the DirectoryRules of the file's directory,
+    so path_contains rules only have to look at the basename.
+    """
+
+    __slots__ = ("path", "full_path", "basename", "lower_basename", "ext",
+                 "lower_ext", "lower_stem", "norm_path", "parent", "dir_rules")
+
+    def __init__(self, path, full_path=None, dir_rules=None):
+        path = os.fspath(path)
+        self.path = path
+        self.full_path = path if full_path is None else full_path
+        self.dir_rules = dir_rules
+        basename = os.path.basename(path)
+        lower_basename = basename.lower()
+        self.basename = basename
+        self.lower_basename = lower_basename
+
+        # os.path.splitext() semantics without its overhead: the extension
+        # starts at the last dot, unless only dots precede it (".gitignore"
+        # has no extension). get_fileext() then lets the basename stand in
+        # for a missing extension, so "Makefile" is its own extension.
+        dot = basename.rfind(".")
+        if dot > 0 and dot >= len(basename) - len(basename.lstrip(".")):
+            self.ext = basename[dot:]
+            self.lower_ext = lower_basename[dot:]
+            self.lower_stem = lower_basename[:dot]
+        else:
+            self.ext = basename
+            self.lower_ext = lower_basename
+            self.lower_stem = lower_basename
+
+        # Separators normalised to "/" and lowercased, for the rule tables
+        # whose keys are written that way (AI_RULES, GENERATED_RULES).
+        self.norm_path = path.replace(os.sep, "/").lower()
+        self.parent = self.norm_path.rpartition("/")[0]
+
+    def __repr__(self):
+        return f"PathInfo({self.path!r})"
+
+class DirectoryRules:
+    """
+    What a directory's path decides for every file in it.
+
+    path_contains rules look at the whole path, but everything before the
+    basename is shared by the files of a directory. A scan builds one
+    DirectoryRules per directory as it enters it, from its parent's, holding
+    the METADATA_RULES and AI_RULES fragment automata's (state, best) after
+    the directory's path and its GENERATED_RULES path tags. Files then only
+    feed their basename through the automata — the result is the same as
+    matching the whole path.
+
+    quiet is True when the directory's path has matched no fragment in any
+    of the three tables. A file there can only be tagged by its basename,
+    so the detectors ask the QuietFilter first and skip the tables for the
+    names it rules out.
+    """
+
+    __slots__ = ("norm_dir", "metadata", "ai", "generated", "quiet")
+
+    def __init__(self, norm_dir, metadata, ai):
+        # norm_dir is "/" + the lowercased, "/"-separated directory path,
+        # with a trailing "/" — the form GENERATED_RULES fragments match.
+        self.norm_dir = norm_dir
+        self.metadata = metadata
+        self.ai = ai
+        self.generated = _generated_path_tags(norm_dir)
+        self.quiet = (not self.generated
+                      and _METADATA_MATCHER.fragments.value(metadata[1]) is None
+                      and _AI_MATCHER.fragments.value(ai[1]) is None)
+
+    @classmethod
+    def root(cls):
+        """ The rules for the top of a scan, where relative paths begin """
+        return cls("/", _METADATA_MATCHER.fragments.scan(""),
+                   _AI_MATCHER.fragments.scan(""))
+
+    def enter(self, name):
+        """ The rules for the subdirectory `name` of this directory """
+        lowered = name.lower() + "/"
+        return DirectoryRules(
+            self.norm_dir + lowered,
+            _METADATA_MATCHER.fragments.scan(name + os.sep, *self.metadata),
+            _AI_MATCHER.fragments.scan(lowered, *self.ai))
+
+def path_info(file_path):
+    """ Return file_path as a PathInfo, building one only if it is a string """
+    if isinstance(file_path, PathInfo):
+        return file_path
+    return PathInfo(file_path)
+
 def get_fileext(file_path):
     """ Get the file extension of a file """
+    if isinstance(file_path, PathInfo):
+        return file_path.ext
+
     file_type = None
 
     #if os.path.isfile(file_path):
@@ -51,27 +291,16 @@ def get_ai_metadata(file_path):
     need not exist. Precedence is exact filename, then the longest matching
     path fragment, then the longest matching filename suffix.
     """
-    if not file_path:
+    info = path_info(file_path)
+    if not info.path or _is_quiet(info):
         return None
 
-    # Normalise Windows separators and case so the rule keys stay lowercase.
-    path = file_path.replace(os.sep, "/").lower()
-    filename = os.path.basename(path)
-
-    rule = AI_RULES["exact_filename"].get(filename)
+    # Windows separators and case are normalised so the rule keys stay
+    # lowercase.
+    resume = info.dir_rules.ai if info.dir_rules else None
+    rule = _AI_MATCHER.match(info.norm_path, info.lower_basename, resume)
     if rule:
         return {"product": rule[0], "kind": rule[1]}
-
-    for fragment in sorted(AI_RULES["path_contains"], key=len, reverse=True):
-        if fragment in path:
-            rule = AI_RULES["path_contains"][fragment]
-            return {"product": rule[0], "kind": rule[1]}
-
-    for suffix in sorted(AI_RULES["filename_suffix"], key=len, reverse=True):
-        if filename.endswith(suffix):
-            rule = AI_RULES["filename_suffix"][suffix]
-            return {"product": rule[0], "kind": rule[1]}
-
     return None
 
 def get_filename_metatypes(file_path):
@@ -81,51 +310,110 @@ def get_filename_metatypes(file_path):
         pyproject.toml will return build, dependencies
         .github/workflows/python-app.yml will return Github, workflow
     """
-    filename = os.path.basename(file_path).lower()
-    ext = get_fileext(file_path)
-    file_no_ext = os.path.splitext(filename)[0]
-
-    tags = []
-
-    # Extension-based rules
-    if ext in METADATA_RULES["extension_rules"]:
-        tags.extend(METADATA_RULES["extension_rules"][ext])
-
-    # Exact filename rules
-    if filename in METADATA_RULES["exact_filename_rules"]:
-        tags.extend(METADATA_RULES["exact_filename_rules"][filename])
-
-    # Path contains rules (check most specific first)
-    for path_fragment in sorted(METADATA_RULES["path_contains_rules"].keys(), key=len, reverse=True):
-        if path_fragment in file_path:
-            tags.extend(METADATA_RULES["path_contains_rules"][path_fragment])
-            break  # Only apply the most specific path rule
+    info = path_info(file_path)
+    if _is_quiet(info):
+        return []
 
-    # Function-based rules
-    for func_name, func_tags in METADATA_RULES["function_rules"]:
-        if globals()[func_name](filename):
-            tags.extend(func_tags)
+    # Extension, exact filename, most specific path fragment and function
+    # rules, from METADATA_RULES compiled once at import.
+    tags = _METADATA_MATCHER.match(
+        info, info.dir_rules.metadata if info.dir_rules else None)
 
     # Special case for license files
-    if file_no_ext == "license":
+    if info.lower_stem == LICENSE_STEM:
         tags.append(LICENSE_TAG)
 
+    tags.extend(get_generated_metatypes(info))
+
     # AI coding agent artifacts. Runs last so it appends to — rather than
     # competes with — the rules above; .github/copilot-instructions.md
     # keeps its GitHub/Git tags and gains the AI ones.
-    ai_metadata = get_ai_metadata(file_path)
+    ai_metadata = get_ai_metadata(info)
     if ai_metadata:
         tags.extend([AI_TAG, ai_metadata["product"], ai_metadata["kind"]])
 
     return tags
 
+def get_generated_metatypes(file_path):
+    """
+    Return the vendored/generated/minified tags a path carries, from
+    GENERATED_RULES. Pure path inspection — see check_generated_content() for
+    the content-based check.
+    """
+    info = path_info(file_path)
+    if _is_quiet(info):
+        return []
+    filename = info.lower_basename
+
+    tags = []
+    tags.extend(GENERATED_RULES["exact_filename"].get(filename, ()))
+
+    for suffix, suffix_tags in GENERATED_RULES["filename_suffix"].items():
+        if filename.endswith(suffix):
+            tags.extend(suffix_tags)
+            break
+
+    if info.dir_rules:
+        tags.extend(info.dir_rules.generated)
+    else:
+        tags.extend(_generated_path_tags("/" + info.norm_path))
+
+    return tags
+
+def _is_quiet(info):
+    """
+    True when a scanned file provably matches no rule: its directory matched
+    nothing and the QuietFilter rules out its basename. A PathInfo without
+    DirectoryRules, as the string API builds, is never assumed quiet.
+    """
+    dir_rules = info.dir_rules
+    return (dir_rules is not None and dir_rules.quiet
+            and _QUIET_FILTER.is_quiet(info))
+
+def _generated_path_tags(path):
+    """
+    The GENERATED_RULES path_contains tags for "/" + a normalised path. Every
+    fragment ends in "/", so only the directory part can match — which is
+    what lets DirectoryRules settle this once per directory.
+    """
+    for fragment, fragment_tags in GENERATED_RULES["path_contains"].items():
+        if fragment in path:
+            return fragment_tags
+    return ()
+
+def check_generated_content(file_path):
+    """
+    Return the generated/minified tags the start of a file's content earns.
+
+    Reads at most CONTENT_HEAD_BYTES. A generator banner ("Code generated ...
+    DO NOT EDIT", "@generated", "Generated by ...") in the first
+    GENERATED_HEADER_LINES lines tags the file generated; an average line
+    length over MINIFIED_LINE_LENGTH tags it minified. This function does not
+    raise.
+    """
+    head, _ = read_head_tail(file_path, tail_size=0)
+    text = head.decode("utf-8", errors="replace")
+    lines = text.splitlines()
+
+    tags = []
+    if any(GENERATED_HEADER.search(line)
+           for line in lines[:GENERATED_HEADER_LINES]):
+        tags.append(GENERATED_TAG)
+    if lines and len(text) / len(lines) > MINIFIED_LINE_LENGTH:
+        tags.append(MINIFIED_TAG)
+    return tags
+
+def is_generated(tags):
+    """ Return True if any of the tags marks a vendored, generated or minified file """
+    return any(tag in GENERATED_TAGS for tag in tags)
+
 def get_tags():
     """
     Return every tag get_filename_metatypes() can emit, sorted.
 
-    Derived by traversing METADATA_RULES and AI_RULES rather than maintained
-    by hand, so a new detection rule joins the vocabulary the moment it is
-    added.
+    Derived by traversing METADATA_RULES, GENERATED_RULES and AI_RULES rather
+    than maintained by hand, so a new detection rule joins the vocabulary the
+    moment it is added.
 
     AI kinds come from the values used in AI_RULES, not from
     AI_ARTIFACT_KINDS. The two differ by one: `directory` is synthesised
@@ -142,6 +430,10 @@ def get_tags():
     for _func_name, tag_list in METADATA_RULES["function_rules"]:
         tags.update(tag_list)
 
+    for match_mode in GENERATED_RULES.values():
+        for tag_list in match_mode.values():
+            tags.update(tag_list)
+
     for match_mode in AI_RULES.values():
         for product, kind in match_mode.values():
             tags.update((product, kind))
@@ -176,6 +468,16 @@ def get_languages():
     """
     return sorted(LANGUAGE_FILETYPES, key=str.lower)
 
+def get_vocabulary():
+    """
+    Return the Vocabulary interning get_tags() and, after UNKNOWN (ID 0),
+    get_filetypes(). Built once and reused until the rules change.
+    """
+    global _VOCABULARY
+    if _VOCABULARY is None:
+        _VOCABULARY = Vocabulary(get_tags(), [UNKNOWN] + get_filetypes())
+    return _VOCABULARY
+
 def check_shebang(file_path):
     """ Check if a file has a shebang """
     try:
@@ -196,6 +498,166 @@ def check_shebang(file_path):
         return None
 
 
+def read_head_tail(file_path, head_size=CONTENT_HEAD_BYTES,
+                   tail_size=CONTENT_TAIL_BYTES):
+    """
+    Read a bounded buffer from each end of a file, as bytes.
+
+    Returns (head, tail). The tail is read with a seek from the end, so at
+    most head_size + tail_size bytes are read however large the file is.
+    When the head already holds the whole file the tail is b"" and no second
+    read is made. Unreadable or missing files return (b"", b"").
+    """
+    try:
+        # Unbuffered, so each read() below is exactly one read syscall of
+        # at most the requested size rather than a buffer-sized refill.
+        with open(file_path, 'rb', buffering=0) as file:
+            head = file.read(head_size)
+            if len(head) < head_size or not tail_size:
+                return head, b""
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            if size <= head_size:
+                return head, b""
+            # The tail may overlap the head on a file just over head_size;
+            # that keeps it a whole tail_size window onto the file's end.
+            file.seek(max(0, size - tail_size))
+            return head, file.read(tail_size)
+    except OSError:
+        return b"", b""
+
+def get_head_shebang(head):
+    """ Return the shebang line from a head buffer, or None """
+    first_line = head.split(b"\n", 1)[0]
+    if not first_line.startswith(b"#!"):
+        return None
+    try:
+        return first_line.decode("utf-8").strip()
+    except UnicodeDecodeError:
+        return None
+
+def get_modeline_language(head, tail=b""):
+    """
+    Return the file type declared by a Vim or Emacs modeline, or None.
+
+    Looks only where the editors look: the first and last MODELINE_LINES
+    lines for Vim, the first line (or the second, after a shebang) for an
+    Emacs -*- line, and an Emacs Local Variables block in the tail. Modeline
+    names that do not map to a known file type are ignored.
+    """
+    head_text = head.decode("utf-8", errors="replace")
+    # The tail is b"" when the head holds the whole file, in which case the
+    # end of the file is the end of the head.
+    end_text = tail.decode("utf-8", errors="replace") if tail else head_text
+    head_lines = head_text.splitlines()
+
+    for line in head_lines[:2]:
+        match = EMACS_MODELINE.search(line)
+        if match:
+            declared = match.group(1)
+            if ":" in declared:
+                mode = EMACS_MODE.search(declared)
+                declared = mode.group(1) if mode else ""
+            lang = _modeline_filetype(declared)
+            if lang:
+                return lang
+
+    last_lines = end_text.splitlines()[-MODELINE_LINES:]
+    for line in head_lines[:MODELINE_LINES] + last_lines:
+        match = VIM_MODELINE.search(line)
+        if match:
+            filetype = VIM_FILETYPE.search(match.group(1))
+            lang = _modeline_filetype(filetype.group(1) if filetype else "")
+            if lang:
+                return lang
+
+    local_variables = end_text.rfind(EMACS_LOCAL_VARIABLES)
+    if local_variables != -1:
+        for line in end_text[local_variables:].splitlines()[1:]:
+            if EMACS_LOCAL_END.match(line):
+                break
+            mode = EMACS_LOCAL_MODE.match(line)
+            if mode:
+                return _modeline_filetype(mode.group(1))
+
+    return None
+
+def _modeline_filetype(name):
+    """ Map a modeline's declared name onto a panopticas file type """
+    name = name.strip().lower().removesuffix("-mode")
+    return MODELINE_FILETYPES.get(name)
+
+def check_modeline(file_path):
+    """
+    Return the file type declared by a file's Vim or Emacs modeline, or None.
+
+    Reads at most CONTENT_HEAD_BYTES from the start and CONTENT_TAIL_BYTES
+    from the end of the file. This function does not raise.
+    """
+    head, tail = read_head_tail(file_path)
+    return get_modeline_language(head, tail)
+
+def is_binary_content(head):
+    """ Return True if a buffer read from the start of a file holds a NUL byte """
+    return b"\x00" in head[:BINARY_SNIFF_BYTES]
+
+def is_binary(file_path):
+    """
+    Return True if a file looks binary: a NUL byte in its first
+    BINARY_SNIFF_BYTES bytes. Unreadable files are not binary. This function
+    does not raise.
+    """
+    head, _ = read_head_tail(file_path, head_size=BINARY_SNIFF_BYTES, tail_size=0)
+    return is_binary_content(head)
+
+def detect_encoding(head):
+    """
+    Sniff the encoding of a file from the first bytes read from it.
+
+    Returns a Python codec name, or None for a binary file. A byte order
+    mark decides first. Otherwise a NUL byte (is_binary_content()) means
+    binary unless the NULs fall the way UTF-16 text puts them, every other
+    byte, and the head decodes so. Then the head is UTF-8 if it is valid
+    UTF-8 (an incomplete character at its end is allowed), and
+    LEGACY_ENCODING if not. Only the first BINARY_SNIFF_BYTES are looked at.
+    """
+    head = head[:BINARY_SNIFF_BYTES]
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if head.startswith(mark):
+            return encoding
+    if is_binary_content(head):
+        return _sniff_utf16(head)
+    if head.isascii():
+        return "utf-8"
+    try:
+        _UTF8_DECODER().decode(head)
+    except UnicodeDecodeError:
+        return LEGACY_ENCODING
+    return "utf-8"
+
+def _sniff_utf16(head):
+    """
+    UTF-16 without a byte order mark: mostly-ASCII text has a NUL in half
+    of its bytes, all at odd offsets for little-endian and all at even ones
+    for big-endian. Returns the encoding, or None.
+    """
+    units = len(head) // 2
+    # Too short to tell from a binary header.
+    if units < 8:
+        return None
+    odd_nuls = head[1:units * 2:2].count(0)
+    even_nuls = head.count(0, 0, units * 2) - odd_nuls
+    for encoding, nuls, others in (("utf-16-le", odd_nuls, even_nuls),
+                                   ("utf-16-be", even_nuls, odd_nuls)):
+        if nuls * 2 >= units and others * 20 <= units:
+            try:
+                codecs.getincrementaldecoder(encoding)().decode(
+                    bytes(head[:units * 2]))
+            except UnicodeDecodeError:
+                return None
+            return encoding
+    return None
+
 def get_shebang_language(shebang):
     """ Return the language of a shebang """
     lang = extract_shebang_language(shebang)
@@ -210,20 +672,275 @@ def count_lines(file_path):
 
     Returns:
         int or str: Number of lines in the file, or "N/A" for binary files or errors
+
+    count_lines_and_encoding() without the encoding.
+    """
+    return count_lines_and_encoding(file_path)[0]
+
+def count_lines_and_encoding(file_path):
+    """
+    Count the lines in a file, in the encoding detect_encoding() finds.
+
+    Returns (lines, encoding): lines as count_lines() returns it, and the
+    encoding's codec name, or None where lines is "N/A". The count is the
+    one iterating the file as text in that encoding gives: "\n", "\r\n"
+    and a lone "\r" each end a line, and a last line without one still
+    counts. This function does not raise.
+
+    Binary files are recognised by detect_encoding() from the first read,
+    rather than by decoding until an error.
+
+    ASCII-compatible files are counted on the raw bytes, in
+    LINE_COUNT_CHUNK_BYTES reads into one buffer, with no string made per
+    line. A file detected as UTF-8 is checked as it is counted — bytes.isascii()
+    for the common all-ASCII chunk, a UTF-8 decoder for the others — and one
+    that turns out not to be is reported as LEGACY_ENCODING, with the same
+    count. WIDE_ENCODINGS are counted through an incremental decoder, and a
+    file that does not decode is "N/A".
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            # Use efficient line counting without loading entire file into memory
-            line_count = sum(1 for _ in file)
-            return line_count
-    except UnicodeDecodeError:
-        # File is likely binary or has encoding issues
-        return "N/A"
-    except FileNotFoundError:
-        return "N/A"
+        with open(file_path, 'rb', buffering=0) as file:
+            size = os.fstat(file.fileno()).st_size
+            # Sized to the file (+1 so a single read reaches EOF) up to the
+            # chunk size; pseudo-files report 0 and get a small buffer.
+            buffer = bytearray(
+                min(LINE_COUNT_CHUNK_BYTES, max(size + 1, CONTENT_HEAD_BYTES)))
+            length = file.readinto(buffer)
+            if length < len(buffer):
+                # A short read: trim in place rather than slice a copy.
+                del buffer[length:]
+            encoding = detect_encoding(buffer)
+            if encoding is None:
+                return "N/A", None
+            if encoding in WIDE_ENCODINGS:
+                return _count_decoded_lines(file, buffer, encoding), encoding
+
+            checking = encoding != LEGACY_ENCODING
+            decoder = None
+            lines = 0
+            offset = 0
+            last = None
+            after_cr = False
+            while length:
+                # is_binary_content()'s test, over however many reads the
+                # first BINARY_SNIFF_BYTES take.
+                if offset < BINARY_SNIFF_BYTES and buffer.find(
+                        b"\x00", 0, BINARY_SNIFF_BYTES - offset) != -1:
+                    return "N/A", None
+                offset += length
+
+                if checking and (decoder is not None or not buffer.isascii()):
+                    if decoder is None:
+                        decoder = _UTF8_DECODER()
+                    try:
+                        # Decoded a slice at a time, so the text it produces
+                        # and throws away stays small.
+                        with memoryview(buffer) as view:
+                            for start in range(0, length, UTF8_CHECK_BYTES):
+                                decoder.decode(
+                                    view[start:start + UTF8_CHECK_BYTES])
+                    except UnicodeDecodeError:
+                        # Not UTF-8 after all; its lines end the same way.
+                        encoding = LEGACY_ENCODING
+                        checking = False
+                        decoder = None
+                    else:
+                        if not decoder.getstate()[0]:
+                            # At a character boundary: back to the ASCII check.
+                            decoder = None
+
+                lines += buffer.count(b"\n")
+                # find() is a memchr(); most files have no "\r" to count.
+                if buffer.find(b"\r") != -1:
+                    lines += buffer.count(b"\r") - buffer.count(b"\r\n")
+                # A "\r\n" split across two reads was counted twice.
+                if after_cr and buffer[0] == 0x0A:
+                    lines -= 1
+                last = buffer[length - 1]
+                after_cr = last == 0x0D
+
+                length = file.readinto(buffer)
+                if length < len(buffer):
+                    del buffer[length:]
+
+            if decoder is not None:
+                try:
+                    decoder.decode(b"", True)
+                except UnicodeDecodeError:
+                    encoding = LEGACY_ENCODING
+            # A byte order mark alone is not a line.
+            if last is not None and last not in (0x0A, 0x0D) and not (
+                    encoding == "utf-8-sig" and offset == len(codecs.BOM_UTF8)):
+                lines += 1
+            return lines, encoding
     except Exception:
-        # Handle any other exceptions gracefully
-        return "N/A"
+        # Unreadable, or a wide encoding that does not decode.
+        return "N/A", None
+
+def _count_decoded_lines(file, chunk, encoding):
+    """
+    count_lines_and_encoding() for WIDE_ENCODINGS: `chunk` and the rest of
+    `file` decoded a read at a time, and the line ends counted in the text.
+    Raises UnicodeDecodeError for bytes that are not in `encoding`.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    lines = 0
+    last = None
+    after_cr = False
+    first = True
+    while chunk:
+        text = decoder.decode(chunk)
+        if first and text:
+            # The byte order mark is not text.
+            text = text.removeprefix("\ufeff")
+            first = False
+        if text:
+            lines += _line_ends(text)
+            if after_cr and text[0] == "\n":
+                lines -= 1
+            last = text[-1]
+            after_cr = last == "\r"
+        chunk = file.read(LINE_COUNT_CHUNK_BYTES)
+    decoder.decode(b"", True)
+    if last is not None and last not in "\n\r":
+        lines += 1
+    return lines
+
+def _line_ends(text, start=0, end=None):
+    """ The "\n", "\r\n" and lone "\r" in text[start:end], str or bytes """
+    if end is None:
+        end = len(text)
+    newline, cr, crlf = ("\n", "\r", "\r\n") if isinstance(text, str) else (
+        b"\n", b"\r", b"\r\n")
+    ends = text.count(newline, start, end)
+    if text.find(cr, start, end) != -1:
+        ends += text.count(cr, start, end) - text.count(crlf, start, end)
+    return ends
+
+def estimate_lines(file_path, size=None):
+    """
+    Estimate the number of lines in a file from LINE_ESTIMATE_SAMPLES evenly
+    spaced blocks, so a multi-gigabyte dump costs the same 1 MB of reads as
+    a small file.
+
+    Each block is measured from its first newline to its last, so a block
+    cut part way through a line does not skew the rate. Line endings there
+    are counted as count_lines() counts them, and the total is scaled to the
+    file's size, which is exact for lines of uniform length. The encoding
+    is detect_encoding()'s for the first block; WIDE_ENCODINGS blocks are
+    aligned to the code unit and decoded. A file no larger than the sample
+    is counted exactly with count_lines(). `size` is the file's size when
+    already known, as from a directory walker's stat.
+
+    Returns int, or "N/A" like count_lines(): for a binary first block or
+    an unreadable file. This function does not raise.
+    """
+    return _estimate_lines(file_path, size)[0]
+
+def _estimate_lines(file_path, size=None):
+    """ estimate_lines(), returning (lines, encoding) """
+    block = LINE_ESTIMATE_BLOCK_BYTES
+    samples = LINE_ESTIMATE_SAMPLES
+    try:
+        if size is None:
+            size = os.stat(file_path).st_size
+        if size <= block * samples:
+            return count_lines_and_encoding(file_path)
+        step = (size - block) / (samples - 1)
+        ends = 0
+        sampled = 0
+        data = b""
+        with open(file_path, 'rb', buffering=0) as file:
+            data = file.read(block)
+            encoding = detect_encoding(data)
+            if encoding is None:
+                return "N/A", None
+            width = WIDE_ENCODINGS.get(encoding, 1)
+            newline = "\n" if width > 1 else b"\n"
+            for index in range(samples):
+                if index:
+                    offset = round(index * step)
+                    file.seek(offset - offset % width)
+                    data = file.read(block)
+                if width > 1:
+                    # Whole code units, and a character split at either
+                    # edge only costs a replacement character.
+                    data = data[:len(data) - len(data) % width].decode(
+                        encoding, "replace")
+                start = data.find(newline) + 1
+                end = data.rfind(newline) + 1
+                if start == end:
+                    # Lines longer than a block: use all of it.
+                    start, end = 0, len(data)
+                ends += _line_ends(data, start, end)
+                sampled += (end - start) * width
+        if not sampled:
+            # Truncated since it was sized.
+            return 0, encoding
+        lines = ends * size / sampled
+        # The last block ends the file: an unterminated last line counts.
+        if data and data[-1] not in (0x0A, 0x0D, "\n", "\r"):
+            return int(lines) + 1, encoding
+        return max(round(lines), 1), encoding
+    except OSError:
+        return "N/A", None
+
+def count_sloc(file_path, language=None):
+    """
+    Count a file's code, comment and blank lines, from the COMMENT_SYNTAX
+    entry for its language.
+
+    `language` is the name get_language() returns for the file, and is
+    worked out if not given. Returns sloc.SlocCounts, or None when the
+    language has no COMMENT_SYNTAX entry, or the file is binary, does not
+    decode or is unreadable. This function does not raise.
+
+    The file is read LINE_COUNT_CHUNK_BYTES at a time, in the encoding
+    detect_encoding() finds, and run through sloc.CommentSyntax's state
+    machine, which works on UTF-8 bytes. WIDE_ENCODINGS are decoded and
+    re-encoded as UTF-8 a read at a time. The others are ASCII-compatible
+    and fed as they are: the delimiters and whitespace the machine looks
+    for are ASCII, and any other byte counts as code in the raw bytes
+    exactly as its UTF-8 form would, so a Latin-1 file needs no
+    transcoding. A byte order mark is dropped. code + comment + blank
+    equals count_lines() for any file whose lines end in "\n" or "\r\n".
+    """
+    if language is None:
+        language = get_language(file_path)
+    syntax = syntax_for(language)
+    if syntax is None:
+        return None
+    try:
+        with open(file_path, 'rb') as file:
+            head = file.read(LINE_COUNT_CHUNK_BYTES)
+            encoding = detect_encoding(head)
+            if encoding is None:
+                return None
+            if encoding in WIDE_ENCODINGS:
+                return syntax.count_chunks(_utf8_chunks(file, head, encoding))
+            if encoding == "utf-8-sig":
+                head = head.removeprefix(codecs.BOM_UTF8)
+            return syntax.count_chunks(itertools.chain(
+                (head,), iter(lambda: file.read(LINE_COUNT_CHUNK_BYTES), b"")))
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def _utf8_chunks(file, chunk, encoding):
+    """
+    Yield `chunk` and the rest of `file`, in `encoding`, as UTF-8 a read at
+    a time, without the byte order mark. Raises UnicodeDecodeError for
+    bytes that are not in `encoding`.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    first = True
+    while chunk:
+        text = decoder.decode(chunk)
+        if first and text:
+            text = text.removeprefix("\ufeff")
+            first = False
+        yield text.encode("utf-8")
+        chunk = file.read(LINE_COUNT_CHUNK_BYTES)
+    decoder.decode(b"", True)
 
 def load_gitignore_patterns(directory):
     """
@@ -245,32 +962,74 @@ def load_gitignore_patterns(directory):
         return pathspec.PathSpec.from_lines('gitwildmatch', patterns)
     return None
 
-def identify_files(directory):
-    """
-    Identify files in a directory.
-    Returns a dict of the relative path filenames to their file_type
+def walk_files(directory, all_files=False):
     """
+    Walk a directory, yielding (relative_path, entry) for every file.
 
-    gitignore_spec = load_gitignore_patterns(directory)
+    entry is the os.DirEntry from os.scandir(), so callers can ask it for
+    is_file() and stat() without another lookup by path — is_file() is
+    answered from the directory listing itself, and stat() is cached after
+    the first call (and free on Windows). Relative paths are built as the
+    walk descends rather than with os.path.relpath().
 
-    file_paths = {}
+    Order and symlink handling match os.walk(): a directory's files come in
+    scandir order before its subdirectories are descended, and symlinked
+    directories are not followed. Honours .gitignore unless all_files is True.
+    """
+    for relative_path, entry, _ in _walk(directory, all_files):
+        yield relative_path, entry
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            full_path = os.path.join(root, file)
+def _walk(directory, all_files=False):
+    """
+    walk_files(), also yielding each file's DirectoryRules. Those are built
+    as the walk descends, each from its parent's, so a directory's
+    path_contains outcomes are worked out once however many files it holds.
+    """
+    gitignore_spec = None if all_files else load_gitignore_patterns(directory)
 
-            relative_path = os.path.relpath(full_path, directory)
-            if gitignore_spec and gitignore_spec.match_file(relative_path):
+    pending = [(directory, "", DirectoryRules.root())]
+    while pending:
+        path, relative_dir, dir_rules = pending.pop()
+        try:
+            with os.scandir(path) as scan:
+                entries = list(scan)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                subdirs.append(entry)
                 continue
 
-            ftype = get_language(full_path)
+            relative_path = relative_dir + entry.name
+            if gitignore_spec and gitignore_spec.match_file(relative_path):
+                continue
+            yield relative_path, entry, dir_rules
+
+        # Pushed in reverse so they are popped, and walked, in scandir order.
+        for entry in reversed(subdirs):
+            try:
+                is_symlink = entry.is_symlink()
+            except OSError:
+                is_symlink = False
+            if not is_symlink:
+                pending.append((entry.path, relative_dir + entry.name + os.sep,
+                                dir_rules.enter(entry.name)))
 
-            if directory == ".":
-                full_path = full_path.removeprefix("./")
+def identify_files(directory):
+    """
+    Identify files in a directory.
+    Returns a dict of the relative path filenames to their file_type
+    """
+    file_paths = {}
 
-            # TODO - see if we want to add a parameter to return the full path
-            #file_paths[fulle_path] = ftype
-            file_paths[relative_path] = ftype
+    for relative_path, entry in walk_files(directory):
+        file_paths[relative_path] = get_language(entry.path, entry=entry)
 
     return file_paths
 
@@ -284,60 +1043,458 @@ def identify_files_with_metrics(directory):
     Returns:
         dict: {relative_path: {'type': file_type, 'lines': line_count}}
     """
+    file_paths = {}
 
-    gitignore_spec = load_gitignore_patterns(directory)
+    for relative_path, entry in walk_files(directory):
+        ftype = get_language(entry.path, entry=entry)
 
-    file_paths = {}
+        # Always include line count in this function
+        line_count = count_lines(entry.path) if entry.is_file() else "N/A"
+        file_paths[relative_path] = {'type': ftype, 'lines': line_count}
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            full_path = os.path.join(root, file)
+    return file_paths
 
-            relative_path = os.path.relpath(full_path, directory)
-            if gitignore_spec and gitignore_spec.match_file(relative_path):
-                continue
+class FileRecord:
+    """
+    One file of a directory scan, interned against get_vocabulary():
+    language is a language ID and tags a tag bitmask, and tag_order the same
+    tags' IDs in the order the rules gave them, or None to write them out in
+    vocabulary order. lines is the line count, or None when lines were not
+    counted or could not be, and
+    estimated is True when it came from estimate_lines(), and encoding is
+    the codec name detect_encoding() gave while counting; sloc is the file's
+    sloc.SlocCounts, or None likewise.
+    """
 
-            ftype = get_language(full_path)
+    __slots__ = ("path", "language", "tags", "lines", "sloc", "estimated",
+                 "encoding", "tag_order")
+
+    def __init__(self, path, language, tags, lines=None, sloc=None,
+                 estimated=False, encoding=None, tag_order=None):
+        self.path = path
+        self.language = language
+        self.tags = tags
+        self.tag_order = tag_order
+        self.lines = lines
+        self.sloc = sloc
+        self.estimated = estimated
+        self.encoding = encoding
+
+    def as_dict(self, vocabulary, lines=False, sloc=False):
+        """ The record with names restored, as assess_directory() returns it """
+        record = {
+            "path": self.path,
+            "language": vocabulary.language_name(self.language),
+            "meta": self.tag_names(vocabulary),
+        }
+        if lines:
+            record["lines"] = self.lines
+            record["encoding"] = self.encoding
+            if self.estimated:
+                record["estimated"] = True
+        if sloc:
+            record["sloc"] = sloc_dict(self.sloc)
+        return record
+
+    def tag_names(self, vocabulary):
+        """ The record's tag names, in the order the rules gave them """
+        if self.tag_order is None:
+            return vocabulary.tag_names(self.tags)
+        return vocabulary.tag_names_in_order(self.tag_order)
+
+    def __repr__(self):
+        return f"FileRecord({self.path!r})"
+
+class ScanFilter:
+    """
+    Which files a directory scan keeps: those carrying any of `tags`, whose
+    language is any of `languages`, and that are an AI artifact of any of
+    `products` and any of `kinds`. Values within one option are alternatives;
+    the options given must all hold. An empty option does not filter.
+
+    Names are matched case-insensitively. Tags, products and kinds are
+    resolved against the current rules and an unknown one raises ValueError;
+    languages are not, since a shebang can name any interpreter.
+
+    The scans apply it stage by stage, cheapest first — AI rules and path
+    tags, then the language, then anything that reads the file — so a file
+    that cannot match is dropped before it is opened or counted.
+    """
 
-            if directory == ".":
-                full_path = full_path.removeprefix("./")
+    __slots__ = ("tags", "languages", "products", "kinds")
+
+    def __init__(self, tags=(), languages=(), products=(), kinds=()):
+        products_known = set()
+        for match_mode in AI_RULES.values():
+            products_known.update(product for product, _ in match_mode.values())
+        self.tags = _resolve_names(tags, get_tags(), "tag")
+        self.languages = frozenset(language.lower() for language in languages)
+        self.products = _resolve_names(products, products_known, "product")
+        self.kinds = _resolve_names(kinds, AI_ARTIFACT_KINDS, "kind")
+
+    def __bool__(self):
+        return bool(self.tags or self.languages or self.products or self.kinds)
+
+    def __repr__(self):
+        return (f"ScanFilter(tags={sorted(self.tags)!r}, "
+                f"languages={sorted(self.languages)!r}, "
+                f"products={sorted(self.products)!r}, "
+                f"kinds={sorted(self.kinds)!r})")
+
+    def wants_ai(self, metadata):
+        """ Whether get_ai_metadata()'s result satisfies the product and kind filters """
+        if not (self.products or self.kinds):
+            return True
+        if metadata is None:
+            return False
+        return ((not self.products or metadata["product"] in self.products)
+                and (not self.kinds or metadata["kind"] in self.kinds))
+
+    def wants_tags(self, tags):
+        """ Whether a file's tags satisfy the tag filter """
+        return not self.tags or not self.tags.isdisjoint(tags)
+
+    def wants_language(self, language):
+        """ Whether a file's language satisfies the language filter """
+        return not self.languages or (language or UNKNOWN).lower() in self.languages
+
+    def wants_path(self, info):
+        """
+        Whether a file can still match on its path alone: the AI and tag
+        filters, without the language or any content. A file this rejects
+        is out; one it accepts still has wants_language() to pass.
+        """
+        return (self.wants_ai(get_ai_metadata(info))
+                and self.wants_tags(get_filename_metatypes(info)))
+
+def _resolve_names(names, known, noun):
+    """ Map names case-insensitively onto their spelling in `known` """
+    by_lower = {name.lower(): name for name in known}
+    resolved = set()
+    for name in names:
+        canonical = by_lower.get(name.lower())
+        if canonical is None:
+            raise ValueError(f"unknown {noun} {name!r}")
+        resolved.add(canonical)
+    return frozenset(resolved)
+
+def scan_directory(directory, lines=False, skip_generated=False,
+                   path_only=False, scan_filter=None, sloc=False,
+                   lines_max_bytes=None, lines_estimate=False):
+    """
+    assess_directory() without the names: a list of FileRecord in walk
+    order, interned against get_vocabulary(). Filters and summaries can then
+    work on IDs and bitmasks, converting back with FileRecord.as_dict() or
+    the vocabulary only for what they output.
 
-            # Always include line count in this function
-            line_count = count_lines(full_path)
-            file_paths[relative_path] = {'type': ftype, 'lines': line_count}
+    With a ScanFilter only the files it accepts are kept, and the rest are
+    dropped at the first stage that rules them out: on the path, before the
+    shebang read; on the language, before the content check and count_lines().
 
-    return file_paths
+    lines_max_bytes and lines_estimate are assess_directory()'s.
+    """
+    if path_only and (lines or sloc):
+        raise ValueError("lines=True and sloc=True read file contents; they "
+                         "cannot be combined with path_only=True")
+
+    if lines_estimate and lines_max_bytes is None:
+        lines_max_bytes = LINE_ESTIMATE_THRESHOLD_BYTES
+    # A file within the sample is counted exactly even when "estimated".
+    sample_bytes = LINE_ESTIMATE_SAMPLES * LINE_ESTIMATE_BLOCK_BYTES
+
+    vocabulary = get_vocabulary()
+    tag_mask = vocabulary.tag_mask
+    intern_tags = vocabulary.intern_tags
+    language_id = vocabulary.language_id
+    generated_mask = tag_mask(GENERATED_TAGS)
+    filtering = bool(scan_filter)
+    wanted_tags = tag_mask(scan_filter.tags) if filtering else 0
+    records = []
+
+    for relative_path, entry, dir_rules in _walk(directory):
+        full_path = entry.path
+        info = PathInfo(relative_path, full_path, dir_rules)
+        # FIFOs, sockets and devices are listed like files, but opening one
+        # can block forever. Only regular files (or links to them) are read.
+        readable = not path_only and entry.is_file()
+
+        if filtering and not scan_filter.wants_ai(get_ai_metadata(info)):
+            continue
+
+        tags, tag_order = intern_tags(get_filename_metatypes(info))
+        generated = tags & generated_mask
+        check_content = skip_generated and readable and not generated
+        # Only the content check can still match a tag, and only a generated one.
+        if wanted_tags and not tags & wanted_tags and not (
+                check_content and wanted_tags & generated_mask):
+            continue
+
+        language_name = get_language(info, skip_shebang=path_only or None,
+                                     entry=entry)
+        if filtering and not scan_filter.wants_language(language_name):
+            continue
+        language = language_id(language_name)
+
+        if check_content:
+            # The content tags decide what is skipped and filtered but are
+            # not recorded: meta is the path tags, whatever the switches.
+            generated = tag_mask(check_generated_content(full_path))
+            if wanted_tags and not (tags | generated) & wanted_tags:
+                continue
 
-def find_files(directory,all_files=None):
+        line_count = sloc_counts = encoding = None
+        estimated = False
+        if readable and not (skip_generated and generated):
+            if lines:
+                # The size comes from the walker's cached stat.
+                size = None if lines_max_bytes is None else entry.stat().st_size
+                if size is None or size <= lines_max_bytes:
+                    line_count, encoding = count_lines_and_encoding(full_path)
+                elif lines_estimate:
+                    line_count, encoding = _estimate_lines(full_path, size)
+                    estimated = size > sample_bytes
+                # count_lines() yields "N/A" for binaries; records say None.
+                if not isinstance(line_count, int):
+                    line_count = None
+                    estimated = False
+            if sloc:
+                sloc_counts = count_sloc(full_path, language_name)
+        records.append(FileRecord(relative_path, language, tags, line_count,
+                                  sloc_counts, estimated, encoding, tag_order))
+
+    return records
+
+def assess_directory(directory, lines=False, skip_generated=False,
+                     path_only=False, scan_filter=None, sloc=False,
+                     lines_max_bytes=None, lines_estimate=False):
     """
-    Find all files in a directory, honoring the gitignore patterns.
-    If all_files = True, then find everything.
-    Returns a list of the relative path filenames
+    Assess every file in a directory, honouring .gitignore.
+
+    Returns a list of records in walk order, one per file:
+        {"path": relative_path, "language": str, "meta": [tags], "lines": int,
+         "encoding": str}
+
+    "meta" lists each tag once, in the order get_filename_metatypes() gives
+    them. "lines" and "encoding" are present only with lines=True: the count
+    in the encoding detect_encoding() finds, and that encoding, both None for
+    binary and unreadable files. With skip_generated=True, files the path
+    rules do not already mark as vendored, generated or minified also get the
+    bounded check_generated_content() read, and any file carrying one of
+    those tags is not line-counted — its "lines" is None. The tags that read
+    finds count towards a scan_filter but are not added to "meta", which
+    holds the path tags alone whatever the switches.
+
+    lines_max_bytes bounds the cost of counting: a file larger, by the
+    walker's stat, is not counted and its "lines" is None. With
+    lines_estimate=True it gets estimate_lines() instead, and "estimated":
+    True; the limit then defaults to LINE_ESTIMATE_THRESHOLD_BYTES.
+
+    With sloc=True each record also has "sloc": {"code", "comment",
+    "blank"} from count_sloc(), or None where that gives None — binaries,
+    generated files under skip_generated, and languages COMMENT_SYNTAX does
+    not cover.
+
+    With path_only=True no file is opened: the language comes from the
+    lookup tables alone, skip_generated uses the path rules alone, and
+    lines=True or sloc=True raises ValueError because counting needs the
+    content.
+
+    scan_filter, a ScanFilter, keeps only the files it accepts.
+
+    Built from scan_directory(), whose interned records are the cheaper form
+    for large scans.
     """
+    records = scan_directory(directory, lines=lines,
+                             skip_generated=skip_generated, path_only=path_only,
+                             scan_filter=scan_filter, sloc=sloc,
+                             lines_max_bytes=lines_max_bytes,
+                             lines_estimate=lines_estimate)
+    vocabulary = get_vocabulary()
+    return [record.as_dict(vocabulary, lines, sloc) for record in records]
+
+def extract_urls_from_directory(directory, all_files=False, skip_generated=False,
+                                scan_filter=None):
+    """
+    Extract URLs from every file in a directory.
 
-    gitignore_spec = load_gitignore_patterns(directory)
-    if all_files:
-        gitignore_spec = None
-
-    file_paths = []
+    Returns a list of {"path": relative_path, "urls": [urls], "encoding":
+    str} records, one per file, in walk order, each file decoded in the
+    encoding detect_encoding() finds. A file that cannot be decoded is
+    reported with no URLs and encoding None rather than aborting the scan. With skip_generated=True, vendored,
+    generated and minified files (by path, then by check_generated_content())
+    are reported with no URLs without being read in full. With a ScanFilter,
+    files it rejects are left out, and are not read.
 
-    for root, _, files in os.walk(directory):
-        for file in files:
-            full_path = os.path.join(root, file)
+    scan_content() with the "urls" detector alone.
+    """
+    return scan_content(directory, _URL_SCANNER, all_files=all_files,
+                        skip_generated=skip_generated, scan_filter=scan_filter)
 
-            relative_path = os.path.relpath(full_path, directory)
-            if gitignore_spec and gitignore_spec.match_file(relative_path):
-                # Ignore and continue
-                continue
+def scan_content(directory, detectors=None, all_files=False,
+                 skip_generated=False, scan_filter=None):
+    """
+    Run content detectors over every file in a directory, each file read
+    once however many detectors run. `detectors` is as for
+    scan_file_content().
+
+    Returns a list of {"path": relative_path, <detector name>: [values],
+    ..., "encoding": str} records, one per file, in walk order. Unreadable,
+    undecodable, skipped and non-regular files are reported with empty
+    lists and encoding None, as extract_urls_from_directory() reports them.
+    Detectors registered with generated=False report nothing for vendored,
+    generated and minified files even without skip_generated.
+    """
+    return list(_iter_content(directory, detectors, all_files=all_files,
+                              skip_generated=skip_generated,
+                              scan_filter=scan_filter))
 
-            if directory == ".":
-                full_path = full_path.removeprefix("./")
+def index_url_hosts(directory, all_files=False, skip_generated=False,
+                    scan_filter=None, samples=HOST_SAMPLE_FILES):
+    """
+    Extract URLs from every file in a directory, as for
+    extract_urls_from_directory(), aggregated by registrable domain into a
+    HostIndex keeping at most `samples` file paths per domain.
 
-            file_paths.append(relative_path)
+    Each file's URLs are added to the index and dropped, so memory grows
+    with the distinct hosts referenced, not with every URL in the tree.
+    """
+    index = HostIndex(samples)
+    for record in _iter_content(directory, _URL_SCANNER, all_files=all_files,
+                                skip_generated=skip_generated,
+                                scan_filter=scan_filter):
+        index.add_file(record["path"], record["urls"])
+    return index
+
+def find_url_providers(directory, all_files=False, skip_generated=False,
+                       scan_filter=None, samples=HOST_SAMPLE_FILES):
+    """
+    Classify the URLs in every file in a directory by the cloud or SaaS
+    provider they point at (PROVIDER_DOMAINS), with the options of
+    index_url_hosts().
+
+    Returns (records, index): a {"path": relative_path, "providers":
+    {provider: [urls]}} record for each file with a provider URL, in walk
+    order, and the HostIndex of every URL, whose provider_entries() are the
+    per-provider summary.
+    """
+    index = HostIndex(samples)
+    records = []
+    for record in _iter_content(directory, _URL_SCANNER, all_files=all_files,
+                                skip_generated=skip_generated,
+                                scan_filter=scan_filter):
+        providers = index.add_file(record["path"], record["urls"])
+        if providers:
+            records.append({"path": record["path"], "providers": providers})
+    return records, index
+
+def sketch_urls(directory, all_files=False, skip_generated=False,
+                scan_filter=None, precision=SKETCH_PRECISION, top=SKETCH_TOP):
+    """
+    Extract URLs from every file in a directory, as for
+    extract_urls_from_directory(), into a UrlSketch: exact file and URL
+    counts, estimated distinct URLs and hosts, and the `top` most referenced
+    hosts. Its memory is fixed by `precision`, whatever the tree holds.
+    """
+    sketch = UrlSketch(precision=precision, top=top)
+    for record in _iter_content(directory, _URL_SCANNER, all_files=all_files,
+                                skip_generated=skip_generated,
+                                scan_filter=scan_filter):
+        sketch.add_file(record["urls"])
+    return sketch
+
+def find_dependencies(directory, all_files=False, skip_generated=False,
+                      scan_filter=None, cache=True, workers=None):
+    """
+    Parse the dependency manifests in a directory: the files tagged
+    "dependencies" that deps.py has a parser for. No other file is opened.
+    With skip_generated=True, lockfiles and vendored manifests
+    (node_modules/, vendor/) are left out; with a ScanFilter, those it
+    rejects.
+
+    Returns (dependencies, manifests): deps.Dependency records and a
+    summary per manifest, in walk order — see deps.parse_manifests().
+    Parsed manifests are cached by content hash unless cache=False, and
+    cache misses are parsed by up to `workers` processes.
+    """
+    manifests = []
+    filtering = bool(scan_filter)
+
+    for relative_path, entry, dir_rules in _walk(directory, all_files):
+        info = PathInfo(relative_path, entry.path, dir_rules)
+        tags = get_filename_metatypes(info)
+        if DEPENDENCIES_TAG not in tags:
+            continue
+        kind = manifest_kind(info.basename, tags)
+        if kind is None or (skip_generated and is_generated(tags)):
+            continue
+        if filtering and not (
+                scan_filter.wants_path(info)
+                and scan_filter.wants_language(get_language(info, entry=entry))):
+            continue
+        if entry.is_file():
+            manifests.append((relative_path, entry.path, kind))
+
+    return parse_manifests(
+        manifests, cache_path=deps_cache_path(directory) if cache else None,
+        workers=workers)
+
+def _iter_content(directory, detectors=None, all_files=False,
+                  skip_generated=False, scan_filter=None):
+    """ scan_content(), one record at a time """
+    scanner = (detectors if isinstance(detectors, ContentScanner)
+               else ContentScanner(detectors))
+    names = scanner.names
+    # The scanner for vendored, generated and minified files: without the
+    # detectors that pass them over, such as "secrets".
+    generated_scanner = scanner
+    if not skip_generated and not all(
+            detector.generated for detector in scanner.detectors):
+        generated_scanner = ContentScanner(
+            [detector.name for detector in scanner.detectors
+             if detector.generated])
+    filtering = bool(scan_filter)
+
+    for relative_path, entry, dir_rules in _walk(directory, all_files):
+        full_path = entry.path
+        info = PathInfo(relative_path, full_path, dir_rules)
+        if filtering and not (
+                scan_filter.wants_path(info)
+                and scan_filter.wants_language(get_language(info, entry=entry))):
+            continue
+
+        # Only regular files are read — see assess_directory().
+        found = None
+        encoding = None
+        file_scanner = scanner
+        if (skip_generated or generated_scanner is not scanner) and (
+                entry.is_file() and _is_generated_file(info)):
+            file_scanner = None if skip_generated else generated_scanner
+        if entry.is_file() and file_scanner and file_scanner.detectors:
+            try:
+                found, encoding = scan_file_content(full_path, file_scanner)
+            except UnicodeDecodeError:
+                pass
+        record = {"path": relative_path}
+        for name in names:
+            record[name] = found.get(name, []) if found else []
+        record["encoding"] = encoding
+        yield record
+
+def _is_generated_file(info):
+    """ Path rules first, and the content check only when they say no """
+    return (is_generated(get_generated_metatypes(info))
+            or is_generated(check_generated_content(info.full_path)))
 
-    return file_paths
+def find_files(directory,all_files=None):
+    """
+    Find all files in a directory, honoring the gitignore patterns.
+    If all_files = True, then find everything.
+    Returns a list of the relative path filenames
+    """
+    return [relative_path
+            for relative_path, _ in walk_files(directory, all_files=all_files)]
 
-def find_ai_files(directory, all_files=False):
+def find_ai_files(directory, all_files=False, scan_filter=None):
     """
     Find AI coding agent artifacts in a directory.
 
@@ -354,38 +1511,60 @@ def find_ai_files(directory, all_files=False):
     check every descendant of an AI root would be emitted too. This
     surfaces tooling a team has configured locally but excluded from the
     repo, without flooding the output with arbitrary subdirectories.
+
+    scan_filter, a ScanFilter, keeps only the artifacts it accepts. Its tag
+    and language filters are tested only on files that are already AI
+    matches, and a directory entry, having neither, never passes them.
     """
+    filtering = bool(scan_filter)
+    file_filters = filtering and bool(scan_filter.tags or scan_filter.languages)
+
     gitignore_spec = None if all_files else load_gitignore_patterns(directory)
 
     ai_files = {}
 
+    # DirectoryRules per directory still to be walked, keyed by os.walk root.
+    pending_rules = {directory: DirectoryRules.root()}
+
     for root, dirs, files in os.walk(directory):
+        # One relpath per directory rather than per file.
+        relative_root = os.path.relpath(root, directory)
+        prefix = "" if relative_root == os.curdir else relative_root + os.sep
+        dir_rules = pending_rules.pop(root)
+        for name in dirs:
+            pending_rules[os.path.join(root, name)] = dir_rules.enter(name)
+
         for file in files:
-            relative_path = os.path.relpath(os.path.join(root, file), directory)
+            relative_path = prefix + file
             if gitignore_spec and gitignore_spec.match_file(relative_path):
                 continue
-            metadata = get_ai_metadata(relative_path)
-            if metadata:
-                ai_files[relative_path] = metadata
+            info = PathInfo(relative_path, os.path.join(root, file), dir_rules)
+            metadata = get_ai_metadata(info)
+            if not metadata:
+                continue
+            if filtering and not (
+                    scan_filter.wants_ai(metadata)
+                    and scan_filter.wants_tags(get_filename_metatypes(info))
+                    and scan_filter.wants_language(get_language(info))):
+                continue
+            ai_files[relative_path] = metadata
 
-        if all_files:
+        if all_files and not file_filters:
             for name in dirs:
-                relative_dir = os.path.relpath(
-                    os.path.join(root, name), directory) + os.sep
+                relative_dir = prefix + name + os.sep
                 # Normalise to forward slashes with a leading separator so
                 # a top-level directory (e.g. ".claude/", no leading slash
                 # in the relative path) can still match a fragment like
-                # ".claude/" via endswith, exactly like a nested one does.
+                # ".claude/" as a suffix, exactly like a nested one does.
                 normalised = "/" + relative_dir.replace(os.sep, "/").lower()
-                is_known_ai_dir = any(
-                    normalised.endswith(fragment)
-                    for fragment in AI_RULES["path_contains"])
-                if not is_known_ai_dir:
+                if _AI_MATCHER.directories.search(normalised) is None:
                     continue
                 metadata = get_ai_metadata(relative_dir)
                 if metadata:
-                    ai_files[relative_dir] = {
+                    metadata = {
                         "product": metadata["product"], "kind": "directory"}
+                    if not filtering or scan_filter.wants_ai(metadata):
+                        ai_files[relative_dir] = metadata
 
     return ai_files
 
@@ -424,37 +1603,78 @@ def get_language_edge_cases(file_path):
     the extension is too ambiguous to map globally — setup.cfg is INI, but
     ".cfg" on its own is not.
     """
-    basename = os.path.basename(file_path)
+    info = path_info(file_path)
 
-    if basename:
-        return LANGUAGE_BY_BASENAME.get(basename.lower())
+    if info.basename:
+        return LANGUAGE_BY_BASENAME.get(info.lower_basename)
     else:
         return None
 
-def get_language(file_path, skip_shebang=None):
-    """ Return the language of a file """
-    ext = get_fileext(file_path)
+def should_read_content(file_path, entry=None):
+    """
+    Decide whether reading a file's content could identify it.
+
+    Called by get_language() only once the lookup tables have failed. The
+    answer comes from the extension and, when the walker supplies one, the
+    file's os.DirEntry — whose stat() is cached, so no extra lookup by path:
+
+      - only regular files are read; FIFOs, sockets and devices can block
+      - a file under MIN_CONTENT_BYTES cannot hold a shebang or modeline
+      - an executable file is always worth reading — it likely has a shebang
+      - otherwise an extension in CONTENT_INERT_EXTENSIONS (.log, .dat,
+        .tmp...) is never worth reading
+
+    This function does not raise.
+    """
+    if entry is not None:
+        try:
+            st = entry.stat()
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode) or st.st_size < MIN_CONTENT_BYTES:
+            return False
+        if st.st_mode & EXECUTABLE_BITS:
+            return True
+
+    return path_info(file_path).lower_ext not in CONTENT_INERT_EXTENSIONS
+
+def get_language(file_path, skip_shebang=None, entry=None):
+    """
+    Return the language of a file
+
+    Tries the basename and extension tables, then — if should_read_content()
+    agrees — a modeline and the shebang. entry is the file's os.DirEntry when
+    the caller is walking a directory (see walk_files()); it lets the content
+    policy use the walker's stat instead of guessing from the name.
+    file_path may be a PathInfo, whose full_path is the one opened.
+    """
+    info = path_info(file_path)
     lang = UNKNOWN
 
     shebang_check = False
     if skip_shebang is None:
         shebang_check = True
 
-    lang_by_basename = get_language_edge_cases(file_path)
+    lang_by_basename = get_language_edge_cases(info)
     if lang_by_basename:
         return lang_by_basename
 
-    if ext:
-        lang = get_extension_filetype(ext)
+    if info.ext:
+        lang = EXT_FILETYPES.get(info.lower_ext)
 
     if lang:
         return lang
 
-    if shebang_check:
-        shebang = check_shebang(file_path)
+    if shebang_check and should_read_content(info, entry):
+        # One bounded read at each end of the file serves both checks: a
+        # modeline is an explicit declaration, so it outranks the shebang.
+        head, tail = read_head_tail(info.full_path)
+        lang = get_modeline_language(head, tail)
 
-        if shebang:
-            lang = get_shebang_language(shebang)
+        if not lang:
+            shebang = get_head_shebang(head)
+            if shebang:
+                lang = get_shebang_language(shebang)
 
     if not lang:
         lang = UNKNOWN
@@ -473,9 +1693,7 @@ def extract_urls(text):
     Find all HTTP/S URLs from a given string and return a list of URLs found.
 
     """
-    url_pattern = re.compile(r'https?://[^\s\"\'\'\)]+')
-    urls = re.findall(url_pattern, text)
-    return urls
+    return URL_PATTERN.findall(text)
 
 def extract_urls_from_file(file_path):
     """
@@ -489,20 +1707,140 @@ def extract_urls_from_file(file_path):
 
     Raises:
         FileNotFoundError: If the specified file does not exist
-        UnicodeDecodeError: If the file cannot be decoded as UTF-8
+        UnicodeDecodeError: If the file cannot be decoded, including a
+            binary file (a NUL byte in its head), which is rejected before
+            any of it is decoded
+
+    extract_urls_and_encoding() without the encoding.
+    """
+    return extract_urls_and_encoding(file_path)[0]
+
+def extract_urls_and_encoding(file_path):
+    """
+    Extract URLs from a file in the encoding detect_encoding() finds in its
+    head. Returns (urls, encoding).
+
+    scan_file_content() with the "urls" detector alone: the file is searched
+    URL_SCAN_CHUNK_BYTES at a time, so memory stays the same whatever its
+    size, and the URLs are those extract_urls() finds in the whole decoded
+    text.
+
+    Raises as extract_urls_from_file() does; only a binary file or a
+    WIDE_ENCODINGS file that does not decode can raise UnicodeDecodeError.
+    """
+    found, encoding = scan_file_content(file_path, _URL_SCANNER)
+    return found["urls"], encoding
+
+_URL_SCANNER = ContentScanner(["urls"])
+
+def scan_file_content(file_path, detectors=None):
+    """
+    Run content detectors over a file in one pass, in the encoding
+    detect_encoding() finds in its head. `detectors` is a ContentScanner or
+    a list of detector names (default: every registered detector). Returns
+    ({detector name: [values]}, encoding).
+
+    The file is searched URL_SCAN_CHUNK_BYTES at a time. ASCII-compatible
+    files are searched as bytes, validated as UTF-8 along the way, and only
+    the matches are decoded: in UTF-8, or in LEGACY_ENCODING if any of the
+    file turned out not to be. WIDE_ENCODINGS files are decoded as they are
+    read.
+
+    Raises FileNotFoundError for a missing file, ValueError for an unknown
+    detector name, and UnicodeDecodeError for a binary file (a NUL byte in
+    its head) or a WIDE_ENCODINGS file that does not decode.
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
+    scanner = (detectors if isinstance(detectors, ContentScanner)
+               else ContentScanner(detectors))
 
+    encoding = None
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-            return extract_urls(content)
+        with open(file_path, 'rb', buffering=0) as file:
+            head = file.read(URL_SCAN_CHUNK_BYTES)
+            encoding = detect_encoding(head)
+            if encoding is None:
+                nul_offset = head.index(b"\x00")
+                # Re-raised below with the file path, like a real decode error.
+                raise UnicodeDecodeError(
+                    "utf-8", b"\x00", 0, 1,
+                    f"binary file (NUL byte at offset {nul_offset})")
+
+            if encoding in WIDE_ENCODINGS:
+                file.seek(0)
+                text = io.TextIOWrapper(file, encoding=encoding)
+                chunks = iter(lambda: text.read(URL_SCAN_CHUNK_BYTES), "")
+                return scanner.results(scanner.scan(chunks)), encoding
+
+            check = _Utf8Check() if encoding != LEGACY_ENCODING else None
+            # The matches stay bytes until the whole file's encoding is known.
+            found = list(scanner.scan(
+                _read_chunks(file, head, URL_SCAN_CHUNK_BYTES, check)))
+            if check is not None and not check.close():
+                encoding = LEGACY_ENCODING
     except UnicodeDecodeError as e:
         raise UnicodeDecodeError(
             e.encoding, e.object, e.start, e.end,
-            f"Unable to decode file {file_path} as UTF-8: {e.reason}") from e
+            f"Unable to decode file {file_path} as {encoding or 'text'}: "
+            f"{e.reason}") from e
+
+    codec = "utf-8" if encoding == "utf-8-sig" else encoding
+    return scanner.results(found, codec), encoding
+
+def _read_chunks(file, chunk, size, check=None):
+    """
+    Yield `chunk` and then the rest of `file`, `size` bytes at a time,
+    feeding each to the _Utf8Check `check` if given.
+    """
+    while chunk:
+        if check is not None:
+            check.feed(chunk)
+        yield chunk
+        chunk = file.read(size)
+
+class _Utf8Check:
+    """
+    Incremental UTF-8 validation of a stream of chunks, as count_lines()
+    does it: bytes.isascii() for an all-ASCII chunk, a decoder, a slice at
+    a time, for the others.
+    """
 
+    __slots__ = ("decoder", "valid")
+
+    def __init__(self):
+        self.decoder = None
+        self.valid = True
+
+    def feed(self, chunk):
+        if not self.valid or (self.decoder is None and chunk.isascii()):
+            return
+        if self.decoder is None:
+            self.decoder = _UTF8_DECODER()
+        try:
+            with memoryview(chunk) as view:
+                for start in range(0, len(chunk), UTF8_CHECK_BYTES):
+                    self.decoder.decode(view[start:start + UTF8_CHECK_BYTES])
+        except UnicodeDecodeError:
+            self.valid = False
+            self.decoder = None
+            return
+        if not self.decoder.getstate()[0]:
+            # At a character boundary: back to the ASCII check.
+            self.decoder = None
+
+    def close(self):
+        """ Return True if the stream was valid UTF-8 to its end """
+        if self.valid and self.decoder is not None:
+            try:
+                self.decoder.decode(b"", True)
+            except UnicodeDecodeError:
+                self.valid = False
+        return self.valid
+
+PIP_REQUIREMENTS = re.compile(r'^requirements([-._a-zA-Z0-9]*)\.(txt|in)$')
+
+@predicate_rule(PIP_REQUIREMENTS)
 def is_pip_requirements(filename: str) -> bool:
     """
     Returns True if `filename` matches typical pip requirements filenames.
@@ -513,7 +1851,83 @@ def is_pip_requirements(filename: str) -> bool:
       - requirements.in
       - requirements.dev.txt
     """
+    return bool(PIP_REQUIREMENTS.match(filename))
+
+GEMFILE = re.compile(
+    r'^(?:gemfile(?:\.lock)?|gems\.(?:rb|locked)|[\w.-]+\.gemfile(?:\.lock)?)$')
+
+@predicate_rule(GEMFILE)
+def is_gemfile(filename: str) -> bool:
+    """
+    Returns True if the lowercased `filename` is a Bundler Gemfile or lock:
+    gemfile, gemfile.lock, gems.rb, gems.locked, or an Appraisal-style
+    rails_7.gemfile (and its .lock).
+    """
+    return bool(GEMFILE.match(filename))
+
+DOCKERFILE_VARIANT = re.compile(r'^(?:dockerfile[.-][\w.-]+|[\w.-]+\.dockerfile)$')
+
+@predicate_rule(DOCKERFILE_VARIANT)
+def is_dockerfile_variant(filename: str) -> bool:
+    """
+    Returns True if the lowercased `filename` is a Dockerfile with a
+    qualifier — dockerfile.dev, dockerfile-alpine, api.dockerfile. The plain
+    dockerfile is an exact_filename rule.
+    """
+    return bool(DOCKERFILE_VARIANT.match(filename))
+
+DOCKER_COMPOSE = re.compile(r'^(?:docker-)?compose(?:[.-][\w.-]+)?\.ya?ml$')
+
+@predicate_rule(DOCKER_COMPOSE)
+def is_docker_compose(filename: str) -> bool:
+    """
+    Returns True if the lowercased `filename` is a Compose file:
+    compose.yaml, docker-compose.yml, docker-compose.override.yml,
+    docker-compose.prod.yaml.
+    """
+    return bool(DOCKER_COMPOSE.match(filename))
 
-    PATTERN = re.compile(r'^requirements([-._a-zA-Z0-9]*)\.(txt|in)$')
+TSCONFIG = re.compile(r'^tsconfig(?:[.-][\w.-]+)?\.json$')
 
-    return bool(PATTERN.match(filename))
+@predicate_rule(TSCONFIG)
+def is_tsconfig(filename: str) -> bool:
+    """
+    Returns True if the lowercased `filename` is a TypeScript project file:
+    tsconfig.json, tsconfig.build.json, tsconfig-base.json.
+    """
+    return bool(TSCONFIG.match(filename))
+
+def compile_rules():
+    """
+    Compile METADATA_RULES, GENERATED_RULES and AI_RULES into the (metadata,
+    AI, quiet) matchers the detectors use.
+    """
+    metadata_matcher = MetadataMatcher(METADATA_RULES, PREDICATE_RULES)
+    quiet_filter = QuietFilter(
+        extensions=metadata_matcher.extensions,
+        basenames=[*metadata_matcher.filenames,
+                   *GENERATED_RULES["exact_filename"],
+                   *AI_RULES["exact_filename"]],
+        stems=[LICENSE_STEM],
+        suffixes=[*GENERATED_RULES["filename_suffix"],
+                  *AI_RULES["filename_suffix"]],
+        fragments=[*METADATA_RULES["path_contains_rules"],
+                   *GENERATED_RULES["path_contains"],
+                   *AI_RULES["path_contains"]],
+        predicates=[rule for rule, _ in metadata_matcher.predicates])
+    return metadata_matcher, AIMatcher(AI_RULES), quiet_filter
+
+def install_matchers(metadata_matcher, ai_matcher, quiet_filter):
+    """
+    Make the detectors use these matchers — compiled by compile_rules(), or
+    restored from rules.load_rule_packs()' cache.
+    """
+    global _METADATA_MATCHER, _AI_MATCHER, _QUIET_FILTER, _VOCABULARY
+    _METADATA_MATCHER = metadata_matcher
+    _AI_MATCHER = ai_matcher
+    _QUIET_FILTER = quiet_filter
+    _VOCABULARY = None
+
+# The rule tables compiled once, here at the end of the module so that every
+# predicate METADATA_RULES' function_rules can name has been registered.
+install_matchers(*compile_rules())
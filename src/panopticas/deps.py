@@ -0,0 +1,816 @@
+"""
+Dependencies declared in package manifests, as normalised records.
+
+Files tagged "dependencies" by METADATA_RULES are only labelled by the rest
+of panopticas. Here those with a registered parser — package.json,
+pyproject.toml, requirements*.txt, go.mod, pom.xml, build.gradle,
+packages.config and *.csproj — are read and turned into Dependency records:
+ecosystem, normalised name, version spec as written, scope and manifest.
+
+Parsers use the standard library: json, tomllib, and ElementTree's
+iterparse for XML, clearing each element once read so a large pom.xml is
+not held as a tree. Each is registered with @manifest_parser(kind,
+ecosystem) and returns (name, version, scope) tuples.
+
+Lockfiles — package-lock.json, yarn.lock, pnpm-lock.yaml and uv.lock —
+list every resolved package and run to tens of megabytes, so their
+parsers are registered with streaming=True: they are handed the open file
+and read it incrementally, one package entry at a time, instead of
+loading the document. Their records are the resolved packages, with the
+version installed; a scope the lockfile does not record is "locked".
+
+Results are cached on disk by each manifest's kind and content hash, one
+cache file per directory scanned, so a rerun over unchanged manifests reads
+and hashes them and parses none. Cache misses are parsed in a process pool
+when there are enough of them to pay for one.
+
+core.find_dependencies() finds the manifests in a directory and passes them
+through parse_manifests().
+"""
+
+import codecs
+import hashlib
+import io
+import json
+import os
+import re
+import tomllib
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from . import constants
+from .cache import cache_dir, read_cache, write_cache
+
+# Manifests larger than this are reported as errors rather than parsed.
+# Lockfiles, which are streamed, have no limit.
+DEPS_MAX_BYTES = 16 * 1024 * 1024
+# Streamed lockfiles are hashed and parsed this many bytes at a time.
+DEPS_CHUNK_BYTES = 1024 * 1024
+# Cache misses below this many are parsed in-process: starting a pool costs
+# more than parsing a handful of manifests.
+DEPS_POOL_MIN = 16
+
+# Scopes shared across ecosystems. Groups and extras without a common meaning
+# (a Poetry "docs" group, say) keep their own name.
+# LOCKED is a lockfile entry the lockfile gives no scope for.
+(RUNTIME, DEV, TEST, BUILD, OPTIONAL, PEER, PROVIDED, INDIRECT, MANAGED,
+ LOCKED) = ("runtime", "dev", "test", "build", "optional", "peer",
+            "provided", "indirect", "managed", "locked")
+
+
+class Dependency(NamedTuple):
+    """One dependency declared in one manifest."""
+    ecosystem: str
+    name: str
+    version: Optional[str]
+    scope: str
+    manifest: str
+
+
+MANIFEST_PARSERS = {}
+
+
+def manifest_parser(kind, ecosystem, streaming=False):
+    """
+    Register a function parsing a manifest's bytes into (name, version,
+    scope) tuples, returned or yielded, for the manifests of `kind`: a
+    lower-case file name, a ".ext" extension, or a name manifest_kind()
+    gives a family of names. The function raises ValueError for a manifest
+    it cannot parse.
+
+    With streaming=True the function is given a binary file to read
+    incrementally instead of the bytes, and the manifest has no size limit.
+    """
+    def register(function):
+        MANIFEST_PARSERS[kind] = (ecosystem, function, streaming)
+        return function
+    return register
+
+
+def manifest_kind(filename, tags=()):
+    """
+    Return the kind of parser for a file tagged "dependencies", or None if
+    there is none. pip requirements files, whose names vary, are recognised
+    by their "pip" tag.
+    """
+    lower = filename.lower()
+    if lower in MANIFEST_PARSERS:
+        return lower
+    extension = os.path.splitext(lower)[1]
+    if extension and extension in MANIFEST_PARSERS:
+        return extension
+    if "pip" in tags:
+        return "requirements"
+    return None
+
+
+def parse_manifest(kind, data):
+    """
+    Parse one manifest, as bytes or a binary file, with the parser for
+    `kind`. Returns a list of (ecosystem, name, version, scope) tuples, in
+    the order declared, and raises ValueError if the manifest does not
+    parse.
+    """
+    ecosystem, parser, streaming = MANIFEST_PARSERS[kind]
+    if streaming and isinstance(data, bytes):
+        data = io.BytesIO(data)
+    elif not streaming and not isinstance(data, bytes):
+        data = data.read()
+    try:
+        return [(ecosystem, name, version, scope)
+                for name, version, scope in parser(data)]
+    except (ValueError, SyntaxError, UnicodeDecodeError) as error:
+        # ElementTree.ParseError is a SyntaxError.
+        raise ValueError(str(error) or type(error).__name__) from None
+
+
+def _parse_job(job):
+    """
+    parse_manifest() for a pool worker: ("ok", rows) or ("error", text).
+    A streamed manifest's job holds its path rather than its bytes.
+    """
+    kind, data = job
+    try:
+        if isinstance(data, bytes):
+            return "ok", parse_manifest(kind, data)
+        with open(data, "rb") as file:
+            return "ok", parse_manifest(kind, file)
+    except ValueError as error:
+        return "error", str(error)
+    except OSError as error:
+        return "error", error.strerror or str(error)
+
+
+def _read_manifest(path, streaming):
+    """
+    (data, digest): a manifest's bytes and their SHA-256. A streamed
+    manifest is hashed a chunk at a time and its data is its path.
+    """
+    with open(path, "rb") as file:
+        if not streaming:
+            data = file.read(DEPS_MAX_BYTES + 1)
+            if len(data) > DEPS_MAX_BYTES:
+                raise ValueError(f"larger than {DEPS_MAX_BYTES} bytes")
+            return data, hashlib.sha256(data).hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: file.read(DEPS_CHUNK_BYTES), b""):
+            digest.update(chunk)
+        return path, digest.hexdigest()
+
+
+def parse_manifests(manifests, cache_path=None, workers=None):
+    """
+    Parse (relative_path, full_path, kind) manifests. Returns (dependencies,
+    summaries): the Dependency records of every manifest, in the order given,
+    and one {"path", "kind", "ecosystem", "dependencies", "cached", "error"}
+    summary per manifest. A manifest that cannot be read or parsed has an
+    error and no dependencies.
+
+    With a `cache_path`, parsed manifests are looked up there by kind and
+    content hash, and the cache is rewritten with this run's manifests if
+    anything changed. `workers` is passed to ProcessPoolExecutor; 1 parses
+    in-process.
+    """
+    cached = _read_deps_cache(cache_path) if cache_path else {}
+    fresh = {}
+    outcomes = []
+    misses = {}
+    for relative_path, full_path, kind in manifests:
+        try:
+            data, digest = _read_manifest(full_path, MANIFEST_PARSERS[kind][2])
+        except OSError as error:
+            outcomes.append((relative_path, kind, None, False,
+                             error.strerror or str(error)))
+            continue
+        except ValueError as error:
+            outcomes.append((relative_path, kind, None, False, str(error)))
+            continue
+        key = (kind, digest)
+        hit = key in cached
+        if hit:
+            fresh[key] = cached[key]
+        elif key not in misses:
+            misses[key] = data
+        outcomes.append((relative_path, kind, key, hit, None))
+
+    jobs = [(key[0], data) for key, data in misses.items()]
+    if len(jobs) >= DEPS_POOL_MIN and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_parse_job, jobs, chunksize=8))
+    else:
+        results = [_parse_job(job) for job in jobs]
+    fresh.update(zip(misses, results))
+
+    if cache_path and fresh != cached:
+        write_cache(cache_path, {f"{kind}/{digest}": result
+                                 for (kind, digest), result in fresh.items()})
+
+    dependencies = []
+    summaries = []
+    make = Dependency._make
+    for relative_path, kind, key, hit, error in outcomes:
+        rows = []
+        if key is not None:
+            status, value = fresh[key]
+            if status == "ok":
+                rows = value
+            else:
+                error = value
+        manifest = (relative_path,)
+        dependencies.extend(make(row + manifest) for row in rows)
+        summaries.append({
+            "path": relative_path,
+            "kind": kind,
+            "ecosystem": MANIFEST_PARSERS[kind][0],
+            "dependencies": len(rows),
+            "cached": hit,
+            "error": error,
+        })
+    return dependencies, summaries
+
+
+def _read_deps_cache(cache_path):
+    """
+    The parse_manifests() results cached at `cache_path`, {(kind, digest):
+    ("ok", rows) or ("error", text)}, or {} on a miss. The entry is JSON,
+    keyed "kind/digest" — a kind is a file name, so has no "/" — and one not
+    of that shape is a miss.
+    """
+    entry = read_cache(cache_path)
+    if not isinstance(entry, dict):
+        return {}
+    cached = {}
+    try:
+        for key, (status, value) in entry.items():
+            kind, digest = key.split("/")
+            if status == "ok":
+                value = [tuple(row) for row in value]
+                if any(len(row) != 4 for row in value):
+                    return {}
+            cached[kind, digest] = (status, value)
+    except (TypeError, ValueError):
+        return {}
+    return cached
+
+
+def deps_cache_path(directory):
+    """
+    The cache file for a directory's manifests, keyed by its absolute path,
+    the panopticas version and this module's source, so a change to any
+    parser invalidates it.
+    """
+    digest = hashlib.sha256(constants.VERSION.encode())
+    try:
+        digest.update(Path(__file__).read_bytes())
+    except OSError:
+        return None
+    digest.update(os.path.abspath(directory).encode("utf-8", "surrogateescape"))
+    return os.path.join(cache_dir(), f"deps-{digest.hexdigest()}.json")
+
+
+# A PEP 508 requirement: name, [extras], then a version spec or "@ url", then
+# an optional "; marker".
+_REQUIREMENT = re.compile(
+    r"\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)\s*(?:\[[^\]]*\])?"
+    r"\s*([^;]*?)\s*(?:;.*)?$", re.DOTALL)
+
+
+def normalise_python_name(name):
+    """A PyPI project name as PEP 503 compares it: lower-case, runs of -_. as -."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _requirement(text, scope):
+    """A PEP 508 requirement string as a (name, version, scope) tuple, or None."""
+    found = _REQUIREMENT.match(text)
+    if found is None:
+        return None
+    return normalise_python_name(found.group(1)), found.group(2) or None, scope
+
+
+@manifest_parser("requirements", "PyPI")
+def parse_requirements(data):
+    """pip requirements: one requirement per line; options and paths skipped."""
+    text = data.decode("utf-8-sig").replace("\\\n", "")
+    rows = []
+    for line in text.splitlines():
+        # Comments, and per-requirement options such as --hash.
+        line = re.sub(r"(?:^|\s)(?:#|--?[a-z]).*", "", line).strip()
+        # -r, -c, -e and --index-url lines, and bare paths and URLs.
+        if not line or line.startswith(("-", ".", "/")) or "://" in line.split(
+                "@")[0]:
+            continue
+        row = _requirement(line, RUNTIME)
+        if row:
+            rows.append(row)
+    return rows
+
+
+@manifest_parser("pyproject.toml", "PyPI")
+def parse_pyproject(data):
+    """PEP 621 dependencies and extras, PEP 735 groups, build requirements
+    and Poetry's tables."""
+    document = tomllib.loads(data.decode("utf-8-sig"))
+    rows = []
+
+    def requirements(values, scope):
+        if isinstance(values, list):
+            rows.extend(row for row in (
+                _requirement(value, scope) for value in values
+                if isinstance(value, str)) if row)
+
+    project = document.get("project", {})
+    requirements(project.get("dependencies"), RUNTIME)
+    for extra, values in _table(project.get("optional-dependencies")).items():
+        requirements(values, OPTIONAL)
+    for group, values in _table(document.get("dependency-groups")).items():
+        requirements(values, group)
+    requirements(_table(document.get("build-system")).get("requires"), BUILD)
+
+    poetry = _table(_table(document.get("tool")).get("poetry"))
+    rows.extend(_poetry(poetry.get("dependencies"), RUNTIME))
+    rows.extend(_poetry(poetry.get("dev-dependencies"), DEV))
+    for group, table in _table(poetry.get("group")).items():
+        rows.extend(_poetry(_table(table).get("dependencies"), group))
+    return rows
+
+
+def _table(value):
+    return value if isinstance(value, dict) else {}
+
+
+def _poetry(table, scope):
+    """Poetry's {name = "^1.2"} or {name = {version = "^1.2", ...}}."""
+    for name, spec in _table(table).items():
+        if name.lower() == "python":
+            continue
+        if isinstance(spec, dict):
+            spec = spec.get("version")
+        yield (normalise_python_name(name),
+               spec if isinstance(spec, str) else None, scope)
+
+
+_NPM_SCOPES = (
+    ("dependencies", RUNTIME), ("devDependencies", DEV),
+    ("peerDependencies", PEER), ("optionalDependencies", OPTIONAL))
+
+
+@manifest_parser("package.json", "npm")
+def parse_package_json(data):
+    """package.json's dependency objects, by scope."""
+    document = json.loads(data.decode("utf-8-sig"))
+    if not isinstance(document, dict):
+        raise ValueError("package.json is not an object")
+    return [(name, spec if isinstance(spec, str) else None, scope)
+            for key, scope in _NPM_SCOPES
+            for name, spec in _table(document.get(key)).items()]
+
+
+@manifest_parser("go.mod", "Go")
+def parse_go_mod(data):
+    """go.mod's require directives, single and in blocks."""
+    rows = []
+    in_block = False
+    for line in data.decode("utf-8-sig").splitlines():
+        code, _, comment = line.partition("//")
+        words = code.replace("(", " ( ").split()
+        if in_block:
+            if words[:1] == [")"]:
+                in_block = False
+                continue
+        elif words[:2] == ["require", "("]:
+            in_block = True
+            continue
+        elif words[:1] == ["require"]:
+            words = words[1:]
+        else:
+            continue
+        if len(words) >= 2:
+            scope = INDIRECT if comment.strip() == "indirect" else RUNTIME
+            rows.append((words[0].strip('"'), words[1], scope))
+    return rows
+
+
+# Maven's scopes as shared scopes; "compile" is the default.
+_MAVEN_SCOPES = {"compile": RUNTIME, "runtime": RUNTIME, "test": TEST,
+                 "provided": PROVIDED, "system": PROVIDED}
+_PROPERTY = re.compile(r"\$\{([^}]+)\}")
+
+
+def _local(tag):
+    """An element's tag without its {namespace}."""
+    return tag.rpartition("}")[2]
+
+
+@manifest_parser("pom.xml", "Maven")
+def parse_pom(data):
+    """
+    A POM's dependencies, with its dependencyManagement as "managed", and
+    ${property} references resolved from its <properties> and project
+    coordinates.
+    """
+    rows = []
+    properties = {}
+    path = []
+    fields = {}
+    for event, element in ElementTree.iterparse(
+            io.BytesIO(data), events=("start", "end")):
+        if event == "start":
+            path.append(_local(element.tag))
+            continue
+        tag = path.pop()
+        text = (element.text or "").strip()
+        parent = path[-1] if path else None
+        if parent == "dependency":
+            fields[tag] = text
+        elif tag == "dependency" and parent == "dependencies":
+            if "artifactId" in fields and "plugin" not in path:
+                scope = (MANAGED if "dependencyManagement" in path
+                         else _MAVEN_SCOPES.get(fields.get("scope", "compile"),
+                                                fields.get("scope")))
+                rows.append((f"{fields.get('groupId', '')}:"
+                             f"{fields['artifactId']}",
+                             fields.get("version") or None, scope))
+            fields = {}
+        elif len(path) == 2 and path[1] == "properties":
+            properties[tag] = text
+        elif len(path) == 1 and tag in ("version", "groupId", "artifactId"):
+            properties[f"project.{tag}"] = text
+        elif len(path) == 2 and path[1] == "parent" and tag == "version":
+            properties.setdefault("project.version", text)
+        # Keep the tree from growing: nothing below here is needed again.
+        element.clear()
+
+    def resolve(value):
+        if value is None:
+            return None
+        return _PROPERTY.sub(lambda found: properties.get(
+            found.group(1), found.group(0)), value)
+
+    return [(resolve(name), resolve(version), scope)
+            for name, version, scope in rows]
+
+
+# Gradle configurations as shared scopes.
+_GRADLE_SCOPES = {
+    "implementation": RUNTIME, "api": RUNTIME, "compile": RUNTIME,
+    "runtimeOnly": RUNTIME, "runtime": RUNTIME,
+    "compileOnly": PROVIDED, "annotationProcessor": PROVIDED,
+    "kapt": PROVIDED, "classpath": BUILD,
+    "testImplementation": TEST, "testRuntimeOnly": TEST,
+    "testCompileOnly": TEST, "testCompile": TEST,
+    "androidTestImplementation": TEST,
+}
+_GRADLE_CONFIGURATION = "|".join(
+    sorted(_GRADLE_SCOPES, key=len, reverse=True))
+# implementation 'group:name:version' and implementation("group:name").
+_GRADLE_STRING = re.compile(
+    rf"^\s*({_GRADLE_CONFIGURATION})\s*\(?\s*['\"]([^'\":\s]+):([^'\":\s]+)"
+    r"(?::([^'\"@\s]+))?(?:@\w+)?['\"]", re.MULTILINE)
+# implementation group: 'g', name: 'n', version: 'v'.
+_GRADLE_MAP = re.compile(
+    rf"^\s*({_GRADLE_CONFIGURATION})\s*\(?\s*group\s*:\s*['\"]([^'\"]+)['\"]"
+    r"\s*,\s*name\s*:\s*['\"]([^'\"]+)['\"]"
+    r"(?:\s*,\s*version\s*:\s*['\"]([^'\"]+)['\"])?", re.MULTILINE)
+
+
+@manifest_parser("build.gradle", "Maven")
+def parse_build_gradle(data):
+    """
+    The string and map dependency notations of a Groovy build.gradle.
+    Dependencies built by code — variables, loops, version catalogs — are
+    not evaluated.
+    """
+    text = data.decode("utf-8-sig")
+    found = sorted(
+        (match.start(), match.groups())
+        for pattern in (_GRADLE_STRING, _GRADLE_MAP)
+        for match in pattern.finditer(text))
+    return [(f"{group}:{name}", version, _GRADLE_SCOPES[configuration])
+            for _, (configuration, group, name, version) in found]
+
+
+@manifest_parser("packages.config", "NuGet")
+def parse_packages_config(data):
+    """packages.config's <package id version developmentDependency>."""
+    rows = []
+    for _, element in ElementTree.iterparse(io.BytesIO(data)):
+        if _local(element.tag) == "package" and element.get("id"):
+            development = element.get("developmentDependency", "").lower()
+            rows.append((element.get("id"), element.get("version"),
+                         DEV if development == "true" else RUNTIME))
+        element.clear()
+    return rows
+
+
+@manifest_parser(".csproj", "NuGet")
+def parse_csproj(data):
+    """
+    A project file's <PackageReference Include Version>, with Version and
+    PrivateAssets as attributes or child elements. PrivateAssets="all"
+    marks a development-only package.
+    """
+    rows = []
+    for _, element in ElementTree.iterparse(io.BytesIO(data)):
+        tag = _local(element.tag)
+        if tag in ("Version", "PrivateAssets"):
+            # Read by their PackageReference, which ends after them.
+            continue
+        if tag == "PackageReference" and element.get("Include"):
+            values = {_local(child.tag): (child.text or "").strip()
+                      for child in element}
+            values.update(element.attrib)
+            private = values.get("PrivateAssets", "").lower() == "all"
+            rows.append((element.get("Include"), values.get("Version") or None,
+                         DEV if private else RUNTIME))
+        element.clear()
+    return rows
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# The common case of an object's next key, with no escapes, and of the
+# separator after a member, each taken in one match.
+_MEMBER_KEY = re.compile(r'[ \t\n\r]*"([^"\\]*)"[ \t\n\r]*:[ \t\n\r]*')
+_MEMBER_END = re.compile(r"[ \t\n\r]*([,}])")
+
+
+class _JsonReader:
+    """
+    Just enough of an incremental JSON reader to walk a lockfile: step
+    through an object's members with members(), and decode one value at a
+    time with value(). Only the text of the value being decoded is held.
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, size=None):
+        """Append up to `size` more bytes; False at the end of the file."""
+        data = b"" if self._eof else self._file.read(size or DEPS_CHUNK_BYTES)
+        text = self._text.decode(data, final=not data)
+        if not data:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+    def _peek(self):
+        """Skip whitespace; the next character, or "" at the end."""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"expected {char!r} in JSON")
+        self._pos += 1
+
+    def value(self):
+        """Decode the next value."""
+        size = DEPS_CHUNK_BYTES
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                start = self._pos
+                self._peek()
+                if self._pos != start:
+                    # Whitespace before the value: try again after it.
+                    continue
+                # The value runs past the buffer: read more, doubling the
+                # read each time so a large value is not decoded repeatedly.
+                if not self._fill(size):
+                    raise
+                size *= 2
+                continue
+            # A number at the end of the buffer may go on in the next chunk.
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def members(self):
+        """
+        Enter an object and yield its keys. Each value must be read, with
+        value() or members(), before the next key.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            found = _MEMBER_KEY.match(self._buffer, self._pos)
+            if found:
+                key = found.group(1)
+                self._pos = found.end()
+            else:
+                key = self.value()
+                if not isinstance(key, str):
+                    raise ValueError("expected a string key in JSON")
+                self._expect(":")
+            yield key
+            found = _MEMBER_END.match(self._buffer, self._pos)
+            if found:
+                char = found.group(1)
+                self._pos = found.end()
+            else:
+                char = self._peek()
+                self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise ValueError("expected ',' or '}' in JSON")
+
+
+def _npm_lock_scope(entry):
+    if entry.get("dev") or entry.get("devOptional"):
+        return DEV
+    if entry.get("optional"):
+        return OPTIONAL
+    if entry.get("peer"):
+        return PEER
+    return RUNTIME
+
+
+@manifest_parser("package-lock.json", "npm", streaming=True)
+def parse_package_lock(file):
+    """
+    The installed packages of a package-lock.json: its "packages" object
+    (lockfile versions 2 and 3), or else the nested "dependencies" of
+    version 1. Entries are decoded and yielded one at a time, and the read
+    stops after "packages", so v2's copy of the tree in "dependencies" is
+    never read.
+    """
+    reader = _JsonReader(file)
+    version = None
+    for key in reader.members():
+        if key == "packages":
+            for path in reader.members():
+                entry = reader.value()
+                # The root project and workspace folders are not installed
+                # packages, and links point at one listed elsewhere.
+                if ("node_modules/" not in path or not isinstance(entry, dict)
+                        or entry.get("link")):
+                    continue
+                name = entry.get("name") or path.rpartition("node_modules/")[2]
+                yield name, entry.get("version"), _npm_lock_scope(entry)
+            return
+        if key == "dependencies" and version in (None, 1):
+            for name in reader.members():
+                # A v1 entry holds its own nested dependencies.
+                pending = [(name, reader.value())]
+                while pending:
+                    name, entry = pending.pop()
+                    if not isinstance(entry, dict):
+                        continue
+                    yield name, entry.get("version"), _npm_lock_scope(entry)
+                    pending.extend(reversed(
+                        _table(entry.get("dependencies")).items()))
+        elif key == "lockfileVersion":
+            version = reader.value()
+        else:
+            reader.value()
+
+
+def _lines(file):
+    """A binary file's lines as text, without line endings."""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig")
+    try:
+        for line in text:
+            yield line.rstrip("\n")
+    finally:
+        # Leave the caller's file open.
+        text.detach()
+
+
+@manifest_parser("yarn.lock", "npm", streaming=True)
+def parse_yarn_lock(file):
+    """
+    The resolved packages of a yarn.lock, classic or Berry: each entry's
+    first "name@range" header and its version line. Workspace entries are
+    skipped.
+    """
+    name = None
+    for line in _lines(file):
+        if not line.startswith(" "):
+            name = None
+            if not line or line.startswith(("#", "__metadata")):
+                continue
+            spec = line.rstrip(":").split(",")[0].strip().strip('"')
+            at = spec.find("@", 1)
+            if at > 0 and not spec.startswith(("workspace:", "link:"),
+                                              at + 1):
+                name = spec[:at]
+        elif name and line.startswith("  version"):
+            version = line[9:].lstrip(": ").strip('"')
+            yield name, version or None, LOCKED
+            name = None
+
+
+def _pnpm_package(key, slashed):
+    """
+    A pnpm-lock.yaml package key as [name, version, flags]: "/name/1.0.0_peer"
+    before lockfile version 6, "/name@1.0.0(peer)" in 6, "name@1.0.0" in 9.
+    """
+    key = key.strip("'\"").lstrip("/")
+    if slashed:
+        name, _, version = key.rpartition("/")
+        return [name, version.partition("_")[0], {}]
+    at = key.find("@", 1)
+    if at < 0:
+        return [key, None, {}]
+    return [key[:at], key[at + 1:].partition("(")[0], {}]
+
+
+def _pnpm_row(package):
+    name, version, flags = package
+    if flags.get("dev") == "true":
+        return name, version, DEV
+    if flags.get("optional") == "true":
+        return name, version, OPTIONAL
+    return name, version, RUNTIME if flags.get("dev") == "false" else LOCKED
+
+
+@manifest_parser("pnpm-lock.yaml", "npm", streaming=True)
+def parse_pnpm_lock(file):
+    """
+    The resolved packages of a pnpm-lock.yaml: the keys of its top-level
+    "packages" mapping, with their dev and optional flags where the
+    lockfile version records them. Read line by line, without a YAML
+    parser.
+    """
+    slashed = False
+    in_packages = False
+    package = None
+    for line in _lines(file):
+        if not line.startswith(" "):
+            if not line or line.startswith("#"):
+                continue
+            if package:
+                yield _pnpm_row(package)
+            package = None
+            key, _, value = line.partition(":")
+            if key == "lockfileVersion":
+                major = value.strip().strip("'\"").split(".")[0]
+                slashed = major.isdigit() and int(major) < 6
+            in_packages = key == "packages"
+        elif not in_packages or line.isspace():
+            continue
+        elif not line.startswith("   "):
+            if package:
+                yield _pnpm_row(package)
+            key = line.strip()
+            key = key[:-4] if key.endswith(": {}") else key.rstrip(":")
+            package = _pnpm_package(key, slashed)
+        elif package and not line.startswith("     "):
+            key, _, value = line.strip().partition(": ")
+            if key in ("dev", "optional"):
+                package[2][key] = value
+    if package:
+        yield _pnpm_row(package)
+
+
+_UV_FIELDS = ("name = ", "version = ", "source = ")
+
+
+def _uv_row(package):
+    """A uv.lock [[package]]'s row, or None for the project's own."""
+    if "name" not in package or package.get("source", "").startswith(
+            ("{ editable", "{ virtual")):
+        return None
+    version = package.get("version")
+    return (normalise_python_name(package["name"].strip('"')),
+            version.strip('"') if version else None, LOCKED)
+
+
+@manifest_parser("uv.lock", "PyPI", streaming=True)
+def parse_uv_lock(file):
+    """
+    The resolved packages of a uv.lock: the name and version of each
+    [[package]] table, read line by line. The project itself and its
+    workspace members, whose source is editable or virtual, are skipped.
+    """
+    package = None
+    for line in _lines(file):
+        if line.startswith("["):
+            row = package and _uv_row(package)
+            if row:
+                yield row
+            package = {} if line.strip() == "[[package]]" else None
+        elif package is not None and line.startswith(_UV_FIELDS):
+            key, _, value = line.partition(" = ")
+            package[key] = value
+    row = package and _uv_row(package)
+    if row:
+        yield row
@@ -0,0 +1,238 @@
+"""
+A host-level inventory of the URLs in a tree: which domains it talks to, how
+often, and from where.
+
+Listing every URL in every file grows with URL occurrences. HostIndex keeps
+one entry per registrable domain instead — occurrence and file counts, the
+hosts seen under it, and a bounded list of sample files — so its size grows
+with the number of distinct hosts, however many times each is referenced.
+Each distinct host string is parsed once; every later URL naming it reuses
+the parsed, interned UrlHost.
+
+Hosts are also classified by cloud or SaaS provider (PROVIDER_DOMAINS),
+with one walk of a reversed label trie per distinct host, so the cost does
+not grow with the number of providers.
+
+core.index_url_hosts() and core.find_url_providers() feed a directory scan
+through here.
+"""
+
+import re
+import sys
+from typing import NamedTuple, Optional
+
+from .constants import MULTI_LABEL_SUFFIXES, PROVIDER_DOMAINS
+from .matchers import DomainMatcher
+
+# Sample files kept per domain.
+HOST_SAMPLE_FILES = 3
+
+# A URL's authority: from after "://" to the first path, query or fragment.
+_AUTHORITY = re.compile(r"[^/?#\\]*")
+
+_PROVIDERS = DomainMatcher({
+    domain: provider
+    for provider, domains in PROVIDER_DOMAINS.items() for domain in domains
+})
+
+
+class UrlHost(NamedTuple):
+    """A URL reduced to where it points, and whose service that is."""
+    scheme: str
+    host: str
+    domain: str
+    provider: Optional[str] = None
+
+
+def url_host(url, cache=None):
+    """
+    Return the UrlHost of a URL, or None if it has no host. The host is
+    lower-cased, without user info or port; the domain is its registrable
+    domain (see registrable_domain()), and the provider that of
+    url_provider(). The strings are interned.
+
+    With a `cache` dict, each distinct scheme and authority is parsed once
+    and its UrlHost reused from the cache.
+    """
+    scheme, separator, rest = url.partition("://")
+    if not separator:
+        return None
+    key = (scheme, _AUTHORITY.match(rest).group())
+    if cache is None:
+        return _parse(*key)
+    parsed = cache.get(key)
+    if parsed is None and key not in cache:
+        parsed = cache[key] = _parse(*key)
+    return parsed
+
+
+def _parse(scheme, authority):
+    host = _host_of(authority)
+    if not host:
+        return None
+    return UrlHost(sys.intern(scheme.lower()), sys.intern(host),
+                   sys.intern(registrable_domain(host)), url_provider(host))
+
+
+def url_provider(host):
+    """
+    Return the cloud or SaaS provider a lower-cased host name belongs to,
+    from PROVIDER_DOMAINS, or None. The longest matching domain wins.
+    """
+    return _PROVIDERS.search(host)
+
+
+def _host_of(authority):
+    """ The host in a URL's authority: no user info or port, lower-cased """
+    host = authority.rpartition("@")[2]
+    if host.startswith("["):
+        # An IPv6 literal: its colons are not a port.
+        return host[:host.find("]") + 1].lower()
+    return host.partition(":")[0].rstrip(".").lower()
+
+
+def registrable_domain(host):
+    """
+    Return the registrable domain of a host name: its last two labels, or
+    three where the last two are a suffix under which names are registered
+    (MULTI_LABEL_SUFFIXES: co.uk, com.au, github.io, ...). IP addresses and
+    single-label hosts are their own domain.
+    """
+    labels = host.split(".")
+    if len(labels) <= 2 or host.startswith("[") or labels[-1].isdigit():
+        return host
+    take = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-take:])
+
+
+class DomainEntry:
+    """Everything a HostIndex knows about one registrable domain."""
+
+    __slots__ = ("domain", "urls", "files", "hosts", "schemes", "samples")
+
+    def __init__(self, domain):
+        self.domain = domain
+        self.urls = 0
+        self.files = 0
+        self.hosts = {}
+        self.schemes = set()
+        self.samples = []
+
+    def as_dict(self):
+        return {
+            "domain": self.domain,
+            "urls": self.urls,
+            "files": self.files,
+            "hosts": dict(sorted(self.hosts.items(),
+                                 key=lambda item: (-item[1], item[0]))),
+            "schemes": sorted(self.schemes),
+            "samples": list(self.samples),
+        }
+
+
+class ProviderEntry:
+    """Everything a HostIndex knows about one provider's URLs."""
+
+    __slots__ = ("provider", "urls", "files", "hosts", "samples")
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.urls = 0
+        self.files = 0
+        self.hosts = {}
+        self.samples = []
+
+    def as_dict(self):
+        return {
+            "provider": self.provider,
+            "urls": self.urls,
+            "files": self.files,
+            "hosts": dict(sorted(self.hosts.items(),
+                                 key=lambda item: (-item[1], item[0]))),
+            "samples": list(self.samples),
+        }
+
+
+class HostIndex:
+    """
+    URLs aggregated by registrable domain, one file at a time: add_file()
+    each file's URLs, then entries() for the domains, most referenced first.
+    At most `samples` file paths are kept per domain, the first seen. Each
+    distinct scheme and authority is parsed once, and the UrlHost reused.
+    URLs whose host belongs to a provider are tallied in `providers` too.
+    """
+
+    __slots__ = ("domains", "providers", "samples", "files", "urls",
+                 "skipped", "_parsed")
+
+    def __init__(self, samples=HOST_SAMPLE_FILES):
+        self.domains = {}
+        self.providers = {}
+        self._parsed = {}
+        self.samples = samples
+        self.files = 0
+        self.urls = 0
+        self.skipped = 0
+
+    def add_file(self, path, urls):
+        """
+        Add one file's URLs. URLs without a host are counted as skipped.
+        Returns the file's URLs by provider, {provider: [urls]}.
+        """
+        self.files += 1
+        seen = set()
+        by_provider = {}
+        domains = self.domains
+        cache = self._parsed
+        for url in urls:
+            parsed = url_host(url, cache)
+            if parsed is None:
+                self.skipped += 1
+                continue
+            self.urls += 1
+            entry = domains.get(parsed.domain)
+            if entry is None:
+                entry = domains[parsed.domain] = DomainEntry(parsed.domain)
+            entry.urls += 1
+            entry.hosts[parsed.host] = entry.hosts.get(parsed.host, 0) + 1
+            entry.schemes.add(parsed.scheme)
+            if entry.domain not in seen:
+                seen.add(entry.domain)
+                entry.files += 1
+                if len(entry.samples) < self.samples:
+                    entry.samples.append(path)
+
+            provider = parsed.provider
+            if provider is None:
+                continue
+            entry = self.providers.get(provider)
+            if entry is None:
+                entry = self.providers[provider] = ProviderEntry(provider)
+            entry.urls += 1
+            entry.hosts[parsed.host] = entry.hosts.get(parsed.host, 0) + 1
+            if provider not in by_provider:
+                by_provider[provider] = []
+                entry.files += 1
+                if len(entry.samples) < self.samples:
+                    entry.samples.append(path)
+            by_provider[provider].append(url)
+        return by_provider
+
+    def entries(self):
+        """The DomainEntry of every domain, most URLs first, then by name."""
+        return sorted(self.domains.values(),
+                      key=lambda entry: (-entry.urls, entry.domain))
+
+    def provider_entries(self):
+        """The ProviderEntry of every provider, most URLs first, then by name."""
+        return sorted(self.providers.values(),
+                      key=lambda entry: (-entry.urls, entry.provider))
+
+    def as_dict(self):
+        return {
+            "files": self.files,
+            "urls": self.urls,
+            "skipped_urls": self.skipped,
+            "domains": [entry.as_dict() for entry in self.entries()],
+            "providers": [entry.as_dict() for entry in self.provider_entries()],
+        }
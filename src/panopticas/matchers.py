@@ -0,0 +1,466 @@
+"""
+Compiled matchers for Panopticas' path rule tables.
+
+The rule tables in constants.py are plain dicts so they stay easy to read and
+extend. The detectors do not walk them per file: they are compiled once into
+the immutable matchers below, whose per-file cost depends on the length of the
+path rather than on the number of rules.
+"""
+
+import re
+from typing import Callable, NamedTuple
+
+
+class FragmentMatcher:
+    """
+    An Aho–Corasick automaton finding which of a fixed set of fragments occur
+    in a string, in one pass over it.
+
+    Built from a mapping of fragment -> value. Where several fragments occur,
+    the longest wins, and between fragments of equal length the one listed
+    first — the same answer as testing the fragments longest-first with `in`
+    and stopping at the first hit, which is what the detectors used to do.
+
+    The automaton is a full DFA (failure links folded into the transition
+    table at build time), so each character costs one dict lookup. scan() can
+    resume from the state a previous scan() stopped in, which lets a caller
+    scan a directory prefix once and continue over each file name in it.
+
+    search() first runs a regex built from the same trie to find where the
+    earliest fragment starts. Most paths contain no fragment at all and are
+    settled by that one C-level search; the rest are scanned from that
+    position, since nothing before it can match.
+    """
+
+    __slots__ = ("fragments", "_values", "_delta", "_rank", "_no_match",
+                 "_first")
+
+    def __init__(self, fragments):
+        ranked = sorted(enumerate(fragments.items()),
+                        key=lambda item: (-len(item[1][0]), item[0]))
+        self.fragments = tuple(fragment for _, (fragment, _) in ranked)
+        # The trailing None is what a scan without any match resolves to.
+        self._values = tuple(value for _, (_, value) in ranked) + (None,)
+        self._no_match = no_match = len(ranked)
+
+        # The trie. _rank[state] is the best (lowest) rank of a fragment
+        # ending at that state; failure links later fold in the ranks of
+        # the fragments that end as a suffix of it.
+        goto = [{}]
+        rank = [no_match]
+        for fragment_rank, fragment in enumerate(self.fragments):
+            state = 0
+            for char in fragment:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    rank.append(no_match)
+                state = next_state
+            rank[state] = min(rank[state], fragment_rank)
+        self._first = _trie_pattern(goto, rank, no_match)
+
+        # Breadth-first, so a state's failure target is always complete
+        # before the state itself. Transitions back to the root are left
+        # out of the table: scan() falls back to state 0 on a miss.
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = list(goto[0].values())
+        for state in queue:
+            fail_state = fail[state]
+            rank[state] = min(rank[state], rank[fail_state])
+            for char, child in goto[state].items():
+                fail[child] = delta[fail_state].get(char, 0)
+                queue.append(child)
+            transitions = dict(delta[fail_state])
+            transitions.update(goto[state])
+            delta[state] = transitions
+
+        self._delta = tuple(delta)
+        self._rank = tuple(rank)
+
+    def __len__(self):
+        return len(self.fragments)
+
+    def scan(self, text, state=0, best=None):
+        """
+        Feed `text` through the automaton from `state`.
+
+        Returns (state, best): the state to resume from and the rank of the
+        best fragment seen so far, to be passed back in or resolved with
+        value(). `best` defaults to "nothing seen yet".
+        """
+        delta = self._delta
+        rank = self._rank
+        if best is None:
+            best = rank[state]
+        for char in text:
+            state = delta[state].get(char, 0)
+            if rank[state] < best:
+                best = rank[state]
+        return state, best
+
+    def value(self, best):
+        """Return the value of the fragment ranked `best`, or None."""
+        return self._values[best]
+
+    def search(self, text):
+        """Return the value of the best fragment in `text`, or None."""
+        return self.resolve(text)
+
+    def resolve(self, text, state=0, best=None):
+        """
+        Finish a scan: feed `text` from `state` and return the value of the
+        best fragment seen, or None.
+
+        Unlike scan() it need not report where it stopped, so whenever the
+        automaton is back at its root it hands the rest of `text` to the
+        prefilter regex and resumes only where the next fragment can start.
+        """
+        rank = self._rank
+        if best is None:
+            best = rank[state]
+        first = self._first
+        position = 0
+        if state == 0 and first is not None:
+            # The common case, settled without a Python-level loop.
+            found = first.search(text)
+            if found is None:
+                return self._values[best]
+            position = found.start()
+
+        delta = self._delta
+        length = len(text)
+        while position < length:
+            for index in range(position, length):
+                state = delta[state].get(text[index], 0)
+                if rank[state] < best:
+                    best = rank[state]
+                if state == 0:
+                    break
+            else:
+                break
+            position = index + 1
+            if first is not None:
+                found = first.search(text, position)
+                if found is None:
+                    break
+                position = found.start()
+        return self._values[best]
+
+
+class SuffixMatcher:
+    """
+    A reversed trie finding the longest of a fixed set of suffixes a string
+    ends with.
+
+    search() walks the string backwards only as far as the trie goes — for a
+    typical file name, a character or two — so its cost does not depend on
+    the number of suffixes.
+    """
+
+    __slots__ = ("suffixes", "_root")
+
+    def __init__(self, suffixes):
+        self.suffixes = tuple(suffixes)
+        self._root = {}
+        for suffix, value in suffixes.items():
+            node = self._root
+            for char in reversed(suffix):
+                node = node.setdefault(char, {})
+            node[_VALUE] = value
+
+    def __len__(self):
+        return len(self.suffixes)
+
+    def search(self, text):
+        """Return the value of the longest suffix `text` ends with, or None."""
+        node = self._root
+        found = node.get(_VALUE)
+        for char in reversed(text):
+            node = node.get(char)
+            if node is None:
+                break
+            if _VALUE in node:
+                found = node[_VALUE]
+        return found
+
+
+class DomainMatcher:
+    """
+    A reversed trie of domain labels finding the longest of a fixed set of
+    domains a host name equals or is a subdomain of: with github.com and
+    api.github.com, api.github.com matches the second, gist.github.com the
+    first, and notgithub.com neither.
+
+    search() walks the host's labels from the right, so its cost depends on
+    the number of labels, not on the number of domains.
+    """
+
+    __slots__ = ("domains", "_root")
+
+    def __init__(self, domains):
+        self.domains = tuple(domains)
+        self._root = {}
+        for domain, value in domains.items():
+            node = self._root
+            for label in reversed(domain.lower().split(".")):
+                node = node.setdefault(label, {})
+            node[_VALUE] = value
+
+    def __len__(self):
+        return len(self.domains)
+
+    def search(self, host):
+        """Return the value of the longest domain `host` falls under, or None."""
+        node = self._root
+        found = None
+        end = len(host)
+        while end > 0:
+            start = host.rfind(".", 0, end) + 1
+            node = node.get(host[start:end])
+            if node is None:
+                break
+            if _VALUE in node:
+                found = node[_VALUE]
+            end = start - 1
+        return found
+
+
+# Key under which a SuffixMatcher trie node stores its value. Never a
+# character, so it cannot collide with an edge.
+_VALUE = None
+
+
+def _trie_pattern(goto, rank, no_match):
+    """
+    Compile a regex matching wherever any fragment in the trie starts.
+    Called on the bare trie, before failure links fold ranks together.
+
+    Each branch stops at the first state that completes a fragment — a
+    shorter match at the same start is enough to locate it. Returns None for
+    an empty matcher or one holding the empty fragment, where the scan must
+    start at position 0 anyway.
+    """
+    if not goto[0] or rank[0] != no_match:
+        return None
+
+    def branch(state):
+        if rank[state] != no_match:
+            return ""
+        alternatives = [
+            re.escape(char) + branch(child)
+            for char, child in sorted(goto[state].items())
+        ]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return "(?:" + "|".join(alternatives) + ")"
+
+    return re.compile(branch(0))
+
+
+# The part of a path a predicate rule is tested against. A basename rule
+# only ever sees the lowercased file name; a path rule sees the whole
+# lowercased, "/"-separated path and costs more, since the path is longer.
+BASENAME_SCOPE = "basename"
+PATH_SCOPE = "path"
+
+
+class PredicateRule(NamedTuple):
+    """
+    A predicate METADATA_RULES["function_rules"] can name: the public
+    function, the compiled pattern the rule is matched with, and its scope.
+    """
+    name: str
+    function: Callable[[str], bool]
+    pattern: re.Pattern
+    scope: str
+
+
+class MetadataMatcher:
+    """
+    METADATA_RULES compiled for get_filename_metatypes().
+
+    Extension and exact-filename rules become dict lookups and path_contains
+    rules a FragmentMatcher over the path as given. function_rules are
+    resolved to their PredicateRule at compile time — a rule naming a
+    predicate that does not exist fails here, at import, rather than on the
+    first file that reaches it — and the patterns of each scope are joined
+    into one alternation. A file that matches neither alternation, which is
+    nearly every file, is past all the predicate rules after one or two regex
+    calls, however many rules there are; only a file that matches one is
+    tested against each rule, so that every rule it satisfies still applies.
+    """
+
+    __slots__ = ("extensions", "filenames", "fragments", "predicates",
+                 "_basename_filter", "_path_filter")
+
+    def __init__(self, rules, predicates):
+        """
+        `predicates` maps the names used in rules["function_rules"] to their
+        PredicateRule.
+        """
+        self.extensions = {
+            ext: tuple(tags) for ext, tags in rules["extension_rules"].items()}
+        self.filenames = {
+            name: tuple(tags)
+            for name, tags in rules["exact_filename_rules"].items()}
+        self.fragments = FragmentMatcher({
+            fragment: tuple(tags)
+            for fragment, tags in rules["path_contains_rules"].items()})
+        resolved = []
+        for name, tags in rules["function_rules"]:
+            if name not in predicates:
+                raise ValueError(f"function_rules: unknown predicate {name!r}")
+            resolved.append((predicates[name], tuple(tags)))
+        self.predicates = tuple(resolved)
+        self._basename_filter = _any_of(
+            rule.pattern for rule, _ in resolved if rule.scope == BASENAME_SCOPE)
+        self._path_filter = _any_of(
+            rule.pattern for rule, _ in resolved if rule.scope == PATH_SCOPE)
+
+    def match(self, info, resume=None):
+        """
+        Return the tags for a PathInfo, in rule-table order: extension, exact
+        filename, most specific path fragment, then each predicate rule the
+        file satisfies.
+
+        `resume` is the fragment automaton's (state, best) after the file's
+        directory, from a scan that has already fed it through scan(); only
+        the basename is then matched.
+        """
+        filename = info.lower_basename
+        tags = []
+        tags.extend(self.extensions.get(info.ext, ()))
+        tags.extend(self.filenames.get(filename, ()))
+        if resume is None:
+            fragment_tags = self.fragments.search(info.path)
+        else:
+            fragment_tags = self.fragments.resolve(info.basename, *resume)
+        if fragment_tags:
+            tags.extend(fragment_tags)
+
+        if (self._basename_filter and self._basename_filter.match(filename)) \
+                or (self._path_filter
+                    and self._path_filter.match(info.norm_path)):
+            for rule, rule_tags in self.predicates:
+                subject = filename if rule.scope == BASENAME_SCOPE \
+                    else info.norm_path
+                if rule.pattern.match(subject):
+                    tags.extend(rule_tags)
+        return tags
+
+
+def _any_of(patterns):
+    """Join compiled patterns into one alternation, or None if there are none."""
+    patterns = [pattern.pattern for pattern in patterns]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class AIMatcher:
+    """
+    AI_RULES compiled for get_ai_metadata() and find_ai_files().
+
+    Precedence is that of the table: exact filename (a dict lookup), then the
+    longest path fragment (a FragmentMatcher), then the longest filename
+    suffix (a SuffixMatcher). directories answers whether a directory path
+    ends with a path_contains fragment — a known AI directory — using a
+    SuffixMatcher over the same fragments.
+    """
+
+    __slots__ = ("filenames", "fragments", "suffixes", "directories")
+
+    def __init__(self, rules):
+        self.filenames = dict(rules["exact_filename"])
+        self.fragments = FragmentMatcher(rules["path_contains"])
+        self.suffixes = SuffixMatcher(rules["filename_suffix"])
+        self.directories = SuffixMatcher(rules["path_contains"])
+
+    def match(self, path, filename, resume=None):
+        """
+        Return the (product, kind) rule for a lowercased, "/"-separated path
+        and its basename, or None. `resume` is as for MetadataMatcher.match(),
+        with the directory fed through in the same lowercased form.
+        """
+        rule = self.filenames.get(filename)
+        if rule:
+            return rule
+        if resume is None:
+            rule = self.fragments.search(path)
+        else:
+            rule = self.fragments.resolve(filename, *resume)
+        if rule:
+            return rule
+        return self.suffixes.search(filename)
+
+
+class QuietFilter:
+    """
+    Decides, from a file name alone, that no rule in the tables can tag it.
+
+    Most files in a source tree — main.py, util.ts — carry no tag at all,
+    yet used to go through every rule table to find that out. Built from
+    everything a basename can match on, this answers for such a file with
+    three set lookups, two str method calls and a regex match or two, all
+    at C level, and the detectors return before consulting any table.
+
+    A quiet answer is only sound when the file's directory has matched
+    nothing itself — see DirectoryRules.quiet — since the filter only looks
+    at what the basename can complete. It may answer "not quiet" for a file
+    that ends up with no tags, never the reverse.
+    """
+
+    __slots__ = ("extensions", "basenames", "stems", "suffixes", "heads",
+                 "_inner", "_basename_filter", "_path_filter")
+
+    def __init__(self, extensions, basenames, stems, suffixes, fragments,
+                 predicates):
+        """
+        `extensions`, `basenames` and `stems` are matched exactly, and
+        `suffixes` at the end of the name, all lowercased. `fragments` are
+        path_contains fragments: one holding a "/" can only reach into the
+        basename with the part after its last "/", which must then start
+        it; one without can occur anywhere in it. `predicates` are the
+        PredicateRules whose patterns the name or path may match.
+        """
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.basenames = frozenset(name.lower() for name in basenames)
+        self.stems = frozenset(stem.lower() for stem in stems)
+        self.suffixes = tuple(sorted({suffix.lower() for suffix in suffixes}))
+
+        heads, inner = set(), set()
+        for fragment in fragments:
+            fragment = fragment.lower()
+            if "/" in fragment:
+                head = fragment.rpartition("/")[2]
+                if head:
+                    heads.add(head)
+            elif fragment:
+                inner.add(fragment)
+        self.heads = tuple(sorted(heads))
+        self._inner = re.compile(
+            "|".join(map(re.escape, sorted(inner)))) if inner else None
+
+        self._basename_filter = _any_of(
+            rule.pattern for rule in predicates if rule.scope == BASENAME_SCOPE)
+        self._path_filter = _any_of(
+            rule.pattern for rule in predicates if rule.scope == PATH_SCOPE)
+
+    def is_quiet(self, info):
+        """True if no rule can match the basename of a PathInfo."""
+        filename = info.lower_basename
+        return not (
+            info.lower_ext in self.extensions
+            or filename in self.basenames
+            or info.lower_stem in self.stems
+            or filename.endswith(self.suffixes)
+            or filename.startswith(self.heads)
+            or (self._inner is not None and self._inner.search(filename))
+            or (self._basename_filter is not None
+                and self._basename_filter.match(filename))
+            or (self._path_filter is not None
+                and self._path_filter.match(info.norm_path)))
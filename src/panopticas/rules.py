@@ -0,0 +1,213 @@
+"""
+Rule packs: extra EXT_FILETYPES, METADATA_RULES and AI_RULES entries loaded
+from TOML or JSON files and merged into the built-in tables.
+
+A pack is a document whose top-level keys name the tables it extends:
+
+    [EXT_FILETYPES]
+    ".jsonnet" = "Jsonnet"
+
+    [METADATA_RULES.path_contains_rules]
+    ".acme-ci/" = ["pipeline", "Acme CI"]
+
+    [AI_RULES.path_contains]
+    ".acme-assist/" = ["Acme Assist", "config"]
+
+The tables are updated in place, so everything that reads them — the
+detectors, get_tags(), get_filetypes() — sees the merged rules. What the
+packs add, parsed and validated, is cached on disk as plain data keyed by
+the packs' contents, so a run with the same packs does not re-parse them.
+Parsing is the slow part: compiling the matchers from the merged tables
+takes a fraction of the time and is done on every load.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import tomllib
+from pathlib import Path
+
+from . import constants, core
+from .cache import cache_dir, read_cache, write_cache
+from .constants import AI_ARTIFACT_KINDS, AI_RULES, EXT_FILETYPES, METADATA_RULES
+
+# os.pathsep-separated list of rule packs, loaded before any --rules files.
+RULES_ENV_VAR = "PANOPTICAS_RULES"
+
+# The sections a pack may extend, and for each the rule modes it may add to.
+# function_rules is absent on purpose: it names Python predicates, which a
+# data file cannot supply.
+PACK_SECTIONS = {
+    "EXT_FILETYPES": None,
+    "METADATA_RULES": (
+        "extension_rules", "exact_filename_rules", "path_contains_rules"),
+    "AI_RULES": tuple(AI_RULES),
+}
+
+# Rule keys matched against lowercased text are lowercased on load, so a
+# pack may write "Deploy.yaml" and still match.
+LOWERCASE_KEYS = {
+    ("EXT_FILETYPES", None),
+    ("METADATA_RULES", "exact_filename_rules"),
+    ("AI_RULES", "exact_filename"),
+    ("AI_RULES", "path_contains"),
+    ("AI_RULES", "filename_suffix"),
+}
+
+# The tables as shipped. Every load starts from these, so the packs in effect
+# are exactly the ones last passed to load_rule_packs().
+_BUILTIN_TABLES = copy.deepcopy((EXT_FILETYPES, METADATA_RULES, AI_RULES))
+
+
+def environment_rule_packs():
+    """Return the rule pack paths listed in PANOPTICAS_RULES."""
+    value = os.environ.get(RULES_ENV_VAR, "")
+    return [path for path in value.split(os.pathsep) if path]
+
+
+def load_rule_packs(paths=None, cache=True):
+    """
+    Merge the rule packs at `paths` into the built-in tables and recompile
+    the detectors' matchers. `paths` defaults to PANOPTICAS_RULES; an empty
+    list restores the built-in rules.
+
+    Later packs override earlier ones, and both override a built-in entry
+    with the same key. Raises ValueError naming the file for a pack that is
+    missing, malformed or extends something it may not.
+    """
+    if paths is None:
+        paths = environment_rule_packs()
+
+    documents = []
+    for path in paths:
+        try:
+            documents.append((os.fspath(path), Path(path).read_bytes()))
+        except OSError as error:
+            raise ValueError(
+                f"{path}: cannot read rule pack ({error.strerror})") from error
+
+    cache_path = _cache_path(documents) if cache and documents else None
+    additions = _read_additions(cache_path) if cache_path else None
+    if additions is None:
+        additions = _empty_additions()
+        for path, content in documents:
+            _merge(additions, path, _parse(path, content))
+        if cache_path:
+            write_cache(cache_path, additions)
+
+    tables = copy.deepcopy(_BUILTIN_TABLES)
+    for table, (section, modes) in zip(tables, PACK_SECTIONS.items()):
+        if modes is None:
+            table.update(additions[section])
+        else:
+            for mode in modes:
+                table[mode].update(additions[section][mode])
+    _install_tables(tables)
+    core.install_matchers(*core.compile_rules())
+
+
+def _empty_additions():
+    """Empty tables, shaped like a pack with every section, to merge into."""
+    return {section: {} if modes is None else {mode: {} for mode in modes}
+            for section, modes in PACK_SECTIONS.items()}
+
+
+def _read_additions(cache_path):
+    """
+    Return the cached additions, or None on a miss. The entry is merged
+    again like a pack, so one that is malformed is a miss too.
+    """
+    cached = read_cache(cache_path)
+    if not isinstance(cached, dict):
+        return None
+    additions = _empty_additions()
+    try:
+        _merge(additions, cache_path, cached)
+    except ValueError:
+        return None
+    return additions
+
+
+def _parse(path, content):
+    """Decode a pack as JSON (for .json files) or TOML (anything else)."""
+    try:
+        if path.lower().endswith(".json"):
+            pack = json.loads(content)
+        else:
+            pack = tomllib.loads(content.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError(f"{path}: not a valid rule pack ({error})") from error
+    if not isinstance(pack, dict):
+        raise ValueError(f"{path}: a rule pack must be a table of sections")
+    return pack
+
+
+def _merge(targets, path, pack):
+    """Validate `pack` and merge it into `targets`, by section, in place."""
+    for section, body in pack.items():
+        if section not in PACK_SECTIONS:
+            raise ValueError(f"{path}: unknown section {section!r}")
+        if not isinstance(body, dict):
+            raise ValueError(f"{path}: {section} must be a table")
+        modes = PACK_SECTIONS[section]
+        if modes is None:
+            _merge_mode(targets[section], path, section, None, body)
+            continue
+        for mode, entries in body.items():
+            if mode not in modes:
+                raise ValueError(
+                    f"{path}: {section} cannot extend {mode!r}")
+            if not isinstance(entries, dict):
+                raise ValueError(f"{path}: {section}.{mode} must be a table")
+            _merge_mode(targets[section][mode], path, section, mode, entries)
+
+
+def _merge_mode(target, path, section, mode, entries):
+    where = f"{section}.{mode}" if mode else section
+    for key, value in entries.items():
+        if (section, mode) in LOWERCASE_KEYS:
+            key = key.lower()
+        if section == "EXT_FILETYPES":
+            if not key.startswith(".") or not _is_text(value):
+                raise ValueError(
+                    f"{path}: {where} maps an extension such as \".jsonnet\" "
+                    f"to a file type name, got {key!r} = {value!r}")
+        elif section == "AI_RULES":
+            if not (isinstance(value, (list, tuple)) and len(value) == 2
+                    and all(_is_text(part) for part in value)):
+                raise ValueError(
+                    f"{path}: {where}[{key!r}] must be [product, kind]")
+            if value[1] not in AI_ARTIFACT_KINDS or value[1] == "directory":
+                raise ValueError(
+                    f"{path}: {where}[{key!r}] has unknown kind {value[1]!r}")
+            value = tuple(value)
+        elif not (isinstance(value, list) and value
+                  and all(_is_text(tag) for tag in value)):
+            raise ValueError(
+                f"{path}: {where}[{key!r}] must be a list of tags")
+        target[key] = value
+
+
+def _is_text(value):
+    return isinstance(value, str) and value.strip() != ""
+
+
+def _install_tables(tables):
+    """Replace the contents of the constants tables with `tables`."""
+    for live, merged in zip((EXT_FILETYPES, METADATA_RULES, AI_RULES), tables):
+        live.clear()
+        live.update(copy.deepcopy(merged))
+
+
+def _cache_path(documents):
+    """
+    Return the cache file for these packs, keyed by their contents and the
+    panopticas version, whose validation rules decide what they add.
+    """
+    digest = hashlib.sha256(constants.VERSION.encode())
+    for path, content in documents:
+        digest.update(b"\0json\0" if path.lower().endswith(".json")
+                      else b"\0toml\0")
+        digest.update(hashlib.sha256(content).digest())
+    return os.path.join(cache_dir(), f"rules-{digest.hexdigest()}.json")
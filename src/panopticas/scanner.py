@@ -0,0 +1,491 @@
+"""
+Single-pass content scanning: every registered detector run over a file's
+bytes as they are read once.
+
+A detector is a name, a regex for what it finds, and a function refining
+what the regex found. Each file is read and cut into chunks once, however
+many detectors run, and every detector's matches come back together, in
+file order. Where two detectors match overlapping text, the one registered
+first keeps it: a URL's hostname is part of the URL, not a hostname of its
+own.
+
+Python's re engine finds a pattern that begins with a literal at memchr
+speed, but tries one that begins with a character class or a lookbehind at
+every position — an email or IP address pattern crawls through a file at a
+few tens of MB/s. So a detector can also give an anchor: a pattern that
+begins with a literal and that every match contains, such as the "@" and
+domain of an email address. The anchor is what is searched for, and the
+full pattern is only tried on the token around each hit, at most `reach`
+bytes before it. The URL pattern begins with "http" and is its own anchor.
+
+A detector can instead bring its own search, a function over a chunk; the
+"secrets" detector masks the chunk's token characters with bytes.translate()
+and finds long runs with bytes.find(). Such a detector sees all the text: it
+neither claims text from the others nor loses text to them, so a token in a
+URL is still a candidate secret. A batch detector's function is called once
+per file, with every (line, text) match, rather than once per match.
+
+Patterns are written as ASCII str regexes and compiled twice: over bytes,
+for UTF-8 and other ASCII-compatible files, which are searched without
+decoding, and with re.ASCII over str, for UTF-16 and UTF-32 text. No match
+may contain ASCII whitespace, which is where chunks and tokens are cut, and
+a match must end where its anchor's match ends.
+
+core.scan_file_content() reads the file and feeds it through here.
+"""
+
+import re
+from bisect import bisect_right
+from collections import Counter
+from math import log2
+from operator import itemgetter
+from typing import Callable, NamedTuple
+
+from .constants import HOSTNAME_TLDS, SECRET_PREFIXES
+
+try:
+    import numpy
+except ImportError:  # optional: pip install panopticas[fast]
+    numpy = None
+
+# URL_PATTERN is extract_urls()'s: it runs over decoded text, where \s knows
+# the Unicode spaces. The "urls" detector's source matches the same URLs in
+# bytes, where \s is only ASCII whitespace: it adds the rest of what \s means
+# for str below 0x80 (\x1c-\x1f), and a match holding non-ASCII text is split
+# again with URL_PATTERN.
+URL_PATTERN = re.compile(r'https?://[^\s\"\'\)]+')
+URL_SOURCE = r'https?://[^\s\x1c-\x1f"\')]+'
+
+# Chunks are matched up to their last newline, or failing that their last
+# ASCII whitespace, and the rest carried into the next. A run with no
+# whitespace at all is carried until it is this long, and then matched as
+# it is, so memory stays bounded on a file that is one giant token.
+SCAN_MAX_CARRY_BYTES = 16 * 1024 * 1024
+
+_WHITESPACE = (" ", "\t", "\r", "\x0b", "\x0c")
+_WHITESPACE_BYTES = tuple(space.encode() for space in _WHITESPACE)
+# Matched from a window's start, ends at the start of its last token.
+_TOKEN_START = r"(?s:.*\s)?"
+
+
+class Detector(NamedTuple):
+    """One registered content detector."""
+    name: str
+    title: str
+    source: str
+    anchor: str
+    reach: int
+    refine: Callable
+    search: Callable = None
+    batch: bool = False
+    generated: bool = True
+
+
+# Registered by @content_detector, in precedence order.
+DETECTORS = {}
+
+
+def content_detector(name, title, source=None, anchor=None, reach=0,
+                     search=None, batch=False, generated=True):
+    """
+    Register a function as the content detector `name`, matching `source`,
+    searched for by `anchor` (default: `source` itself) with matches
+    starting at most `reach` bytes before the anchor's. The function takes
+    the text of one match and returns the list of values to report for it —
+    usually [text], [] to drop a false positive.
+
+    Or, with `search`, a function (buffer, end) returning the (start, end,
+    text) of its matches in buffer[:end], for bytes and str buffers alike,
+    in place of `source`. With batch=True the function takes a file's list
+    of (line, text) matches instead. With generated=False the detector does
+    not run on vendored, generated or minified files.
+    """
+    if search is None:
+        re.compile(source)
+        re.compile(anchor or source)
+
+    def register(function):
+        DETECTORS[name] = Detector(name, title, source, anchor or source,
+                                   reach, function, search, batch, generated)
+        return function
+
+    return register
+
+
+@content_detector("urls", "URLs", URL_SOURCE)
+def refine_url(text):
+    """ A Unicode space ends a URL too; the bytes pattern let it by. """
+    return [text] if text.isascii() else URL_PATTERN.findall(text)
+
+
+_DOMAIN = r"@(?:[A-Za-z0-9](?:[A-Za-z0-9-]*[A-Za-z0-9])?\.)+[A-Za-z]{2,}(?![\w-])"
+
+
+# A local part is at most 64 characters long (RFC 5321).
+@content_detector("emails", "Emails", r"(?<![\w.%+-])[\w.%+-]+" + _DOMAIN,
+                  anchor=_DOMAIN, reach=64)
+def refine_email(text):
+    return [text]
+
+
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IP_END = r"(?!\w|\.\d)"
+
+
+@content_detector(
+    "ips", "IP addresses", rf"(?<![\w.]){_OCTET}(?:\.{_OCTET}){{3}}{_IP_END}",
+    anchor=rf"\.\d{{1,3}}\.\d{{1,3}}\.\d{{1,3}}{_IP_END}", reach=3)
+def refine_ip(text):
+    return [text]
+
+
+# TLDs in lower or upper case: (?i:) makes the alternation several times
+# slower to try at every dot in a source file.
+_TLD = "|".join(sorted(HOSTNAME_TLDS | {tld.upper() for tld in HOSTNAME_TLDS},
+                       key=lambda tld: (-len(tld), tld)))
+_HOST_END = rf"\.(?=[A-Za-z])(?:{_TLD})(?![\w-]|\.\w)"
+
+
+# A hostname is at most 253 characters long.
+@content_detector(
+    "hostnames", "Hostnames",
+    r"(?<![\w.@-])[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?"
+    r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?)*" + _HOST_END,
+    anchor=_HOST_END, reach=253)
+def refine_hostname(text):
+    return [text.lower()]
+
+
+# Candidate secrets are runs of at least this many base64 or URL-safe base64
+# characters. "=" padding is left off: it adds no entropy.
+SECRET_MIN_LENGTH = 20
+# Bits of Shannon entropy per character from which a candidate with no known
+# prefix is reported — detect-secrets' defaults.
+SECRET_BASE64_ENTROPY = 4.5
+SECRET_HEX_ENTROPY = 3.0
+# Entropy is computed for this many candidates at a time. Below the minimum,
+# NumPy's fixed cost per call outweighs what it saves.
+SECRET_ENTROPY_BATCH = 4096
+_NUMPY_MIN_TOKENS = 4
+
+_SECRET_CHARS = (b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+                 b"0123456789+/_-")
+_SECRET_MASK = bytes(byte in _SECRET_CHARS for byte in range(256))
+_SECRET_RUN = b"\x01" * SECRET_MIN_LENGTH
+_SECRET_RUN_TEXT = re.compile(rf"[A-Za-z0-9+/_-]{{{SECRET_MIN_LENGTH},}}")
+_SECRET_KINDS = list(SECRET_PREFIXES)
+_SECRET_PREFIX = re.compile("|".join(
+    f"(?P<k{index}>{source})"
+    for index, source in enumerate(SECRET_PREFIXES.values())))
+_HEX = re.compile(r"[0-9a-fA-F]+")
+_MIXED_CASE_AND_DIGITS = re.compile(r"(?=.*[a-z])(?=.*[A-Z])(?=.*[0-9])")
+# Hex as long as a git commit or object ID is a checksum, not a secret.
+_DIGEST_LENGTHS = frozenset({40, 64})
+
+
+def secret_candidates(buffer, end):
+    """
+    Return (start, end, token) for the runs of SECRET_MIN_LENGTH or more
+    base64 characters in buffer[:end]. Over bytes, the token characters are
+    masked to \x01 and everything else to \x00 by one translate(), and the
+    runs found with find(): a regex would try every byte.
+    """
+    if isinstance(buffer, str):
+        return [(match.start(), match.end(), match.group())
+                for match in _SECRET_RUN_TEXT.finditer(buffer, 0, end)]
+    mask = buffer.translate(_SECRET_MASK)
+    found = []
+    start = mask.find(_SECRET_RUN, 0, end)
+    while start != -1:
+        stop = mask.find(b"\x00", start, end)
+        if stop == -1:
+            stop = end
+        found.append((start, stop, buffer[start:stop]))
+        start = mask.find(_SECRET_RUN, stop, end)
+    return found
+
+
+@content_detector("secrets", "Secrets", search=secret_candidates, batch=True,
+                  generated=False)
+def refine_secrets(matches):
+    """
+    Report the (line, token) candidates of one file that hold a known secret
+    format (SECRET_PREFIXES) or are high-entropy base64 or hex, as {"line",
+    "kind", "token" (redacted), "entropy"}.
+    """
+    reported = []
+    tokens = [token for _, token in matches]
+    for (line, token), entropy in zip(matches, shannon_entropy(tokens)):
+        prefix = _SECRET_PREFIX.search(token)
+        if prefix is not None:
+            kind = _SECRET_KINDS[int(prefix.lastgroup[1:])]
+            token = prefix.group()
+        elif _HEX.fullmatch(token):
+            if entropy < SECRET_HEX_ENTROPY or len(token) in _DIGEST_LENGTHS:
+                continue
+            kind = "high-entropy hex"
+        elif (entropy >= SECRET_BASE64_ENTROPY
+                and _MIXED_CASE_AND_DIGITS.match(token)):
+            kind = "high-entropy base64"
+        else:
+            continue
+        reported.append({"line": line, "kind": kind, "token": redact(token),
+                         "entropy": round(entropy, 2)})
+    return reported
+
+
+def redact(token):
+    """ The first four characters of a secret, and the rest starred out """
+    return token[:4] + "*" * min(len(token) - 4, 16)
+
+
+def shannon_entropy(tokens):
+    """
+    Return the Shannon entropy, in bits per character, of each of a list of
+    ASCII strings, SECRET_ENTROPY_BATCH at a time. With NumPy installed each
+    batch is one vectorised computation over a batch-by-128 matrix of
+    character counts.
+    """
+    if numpy is None or len(tokens) < _NUMPY_MIN_TOKENS:
+        return [_entropy(token) for token in tokens]
+    entropies = []
+    for first in range(0, len(tokens), SECRET_ENTROPY_BATCH):
+        batch = tokens[first:first + SECRET_ENTROPY_BATCH]
+        lengths = numpy.fromiter(map(len, batch), dtype=numpy.int64,
+                                 count=len(batch))
+        codes = numpy.frombuffer("".join(batch).encode("ascii"),
+                                 dtype=numpy.uint8)
+        rows = numpy.repeat(numpy.arange(len(batch)), lengths)
+        counts = numpy.bincount(rows * 128 + codes,
+                                minlength=len(batch) * 128)
+        counts = counts.reshape(len(batch), 128)
+        # H = log2(n) - sum(c * log2(c)) / n, with 0 * log2(0) taken as 0.
+        terms = counts * numpy.log2(numpy.maximum(counts, 1))
+        entropies.extend(
+            (numpy.log2(lengths) - terms.sum(axis=1) / lengths).tolist())
+    return entropies
+
+
+def _entropy(token):
+    length = len(token)
+    return log2(length) - sum(
+        count * log2(count) for count in Counter(token).values()) / length
+
+
+class _Compiled:
+    """ One detector's anchor and full pattern, over bytes or over str """
+
+    __slots__ = ("name", "anchor", "full", "reach", "token_start", "search")
+
+    def __init__(self, detector, compile_source):
+        self.name = detector.name
+        self.search = detector.search
+        self.reach = detector.reach
+        self.token_start = compile_source(_TOKEN_START)
+        if self.search is not None:
+            self.anchor = self.full = None
+            return
+        self.anchor = compile_source(detector.anchor)
+        self.full = (None if detector.anchor == detector.source
+                     else compile_source(detector.source))
+
+
+class ContentScanner:
+    """
+    The chosen detectors compiled for one scan, over bytes and over str.
+    Built once per scan by core.scan_content() and reused for every file.
+    """
+
+    __slots__ = ("detectors", "_bytes", "_text", "_plain")
+
+    def __init__(self, names=None):
+        if names is None:
+            names = list(DETECTORS)
+        unknown = [name for name in names if name not in DETECTORS]
+        if unknown:
+            raise ValueError(f"unknown detector {unknown[0]!r}")
+        # Registration order, not the caller's: it settles overlaps.
+        chosen = set(names)
+        self.detectors = [detector for name, detector in DETECTORS.items()
+                          if name in chosen]
+        self._bytes = [_Compiled(detector, lambda source: re.compile(
+            source.encode())) for detector in self.detectors]
+        self._text = [_Compiled(detector, lambda source: re.compile(
+            source, re.ASCII)) for detector in self.detectors]
+        # One detector that is its own anchor: findall() is the whole scan.
+        only = self.detectors[0] if len(self.detectors) == 1 else None
+        self._plain = (only is not None and only.search is None
+                       and not only.batch and only.anchor == only.source)
+
+    @property
+    def names(self):
+        return [detector.name for detector in self.detectors]
+
+    def scan(self, chunks):
+        """
+        Match a file given as an iterable of byte chunks, or of str chunks
+        for decoded text, split anywhere. Yields, per chunk, its matches, in
+        the form results() takes: still bytes for byte chunks, as they cannot
+        be decoded until the whole file's encoding is known.
+        """
+        compiled = newline = None
+        line = 1
+        for buffer, end in _cut_chunks(chunks):
+            if compiled is None:
+                text = isinstance(buffer, str)
+                compiled = self._text if text else self._bytes
+                newline = "\n" if text else b"\n"
+            if self._plain:
+                yield compiled[0].anchor.findall(buffer, 0, end)
+                continue
+            # Each detector in turn, skipping text an earlier one matched.
+            claimed = _Claimed()
+            found = []
+            for detector in compiled:
+                name = detector.name
+                if detector.search is not None:
+                    matches = detector.search(buffer, end)
+                else:
+                    matches = _find(detector, buffer, end, claimed)
+                    claimed.add(matches)
+                found.extend((start, name, text) for start, _, text in matches)
+            found.sort(key=_START)
+            # Line numbers, counted on from one match to the next.
+            numbered = []
+            position = 0
+            for start, name, text in found:
+                line += buffer.count(newline, position, start)
+                position = start
+                numbered.append((name, line, text))
+            line += buffer.count(newline, position, end)
+            yield numbered
+
+    def results(self, chunk_matches, encoding=None):
+        """
+        Decode (with `encoding`, for byte matches) and refine the matches
+        scan() yielded. Returns {detector name: [values]}, each list in file
+        order, with an entry for every detector.
+        """
+        results = {name: [] for name in self.names}
+        if self._plain:
+            detector = self.detectors[0]
+            values = results[detector.name]
+            for found in chunk_matches:
+                for text in _decoded(found):
+                    if not isinstance(text, str):
+                        text = text.decode(encoding)
+                    values.extend(detector.refine(text))
+            return results
+
+        refine = {d.name: d.refine for d in self.detectors}
+        batches = {d.name: [] for d in self.detectors if d.batch}
+        for matches in chunk_matches:
+            for name, line, text in matches:
+                if not isinstance(text, str):
+                    text = (text.decode("ascii") if text.isascii()
+                            else text.decode(encoding))
+                batch = batches.get(name)
+                if batch is not None:
+                    batch.append((line, text))
+                else:
+                    results[name].extend(refine[name](text))
+        for name, batch in batches.items():
+            if batch:
+                results[name].extend(refine[name](batch))
+        return results
+
+
+def _find(detector, buffer, end, claimed):
+    """
+    Return (start, end, text) for a detector's matches in buffer[:end] that
+    overlap no `claimed` span: its anchor's hits, or for a detector with a
+    full pattern, that pattern's matches on the token before and up to each
+    hit.
+    """
+    if detector.full is None:
+        return [(hit.start(), hit.end(), hit.group())
+                for hit in detector.anchor.finditer(buffer, 0, end)
+                if not claimed.overlaps(*hit.span())]
+    full = detector.full.search
+    token_start = detector.token_start.match
+    reach = detector.reach
+    found = []
+    done = 0
+    for hit in detector.anchor.finditer(buffer, 0, end):
+        start, stop = hit.span()
+        if claimed.overlaps(start, stop):
+            # Any match holding this hit would overlap too.
+            continue
+        # From the start of the hit's token: no match spans whitespace.
+        lower = token_start(buffer, max(start - reach, done), start).end()
+        match = full(buffer, lower, stop)
+        while match is not None:
+            done = match.end()
+            if not claimed.overlaps(match.start(), done):
+                found.append((match.start(), done, match.group()))
+            match = full(buffer, done, stop)
+    return found
+
+
+class _Claimed:
+    """ The spans, none overlapping, that a chunk's matches so far cover """
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def overlaps(self, start, end):
+        if not self.starts:
+            return False
+        # The first span ending after `start` is the only one to check.
+        index = bisect_right(self.ends, start)
+        return index < len(self.starts) and self.starts[index] < end
+
+    def add(self, matches):
+        """ Claim the spans of one detector's matches, in order """
+        if not matches:
+            return
+        # Two sorted runs: sorted() merges them in linear time.
+        spans = sorted([*zip(self.starts, self.ends),
+                        *((start, end) for start, end, _ in matches)])
+        self.starts = [start for start, _ in spans]
+        self.ends = [end for _, end in spans]
+
+
+_START = itemgetter(0)
+
+
+def _decoded(found):
+    """ A chunk's matches, as str at once if they are all ASCII """
+    if not found or isinstance(found[0], str):
+        return found
+    joined = b"\n".join(found)
+    return joined.decode("ascii").split("\n") if joined.isascii() else found
+
+
+def _cut_chunks(chunks):
+    """
+    Yield (buffer, end) for a stream of chunks: each buffer is matched up to
+    `end`, past which no match can reach, and the rest of it is carried into
+    the next buffer.
+    """
+    carry = None
+    newline = spaces = None
+    for chunk in chunks:
+        if newline is None:
+            text = isinstance(chunk, str)
+            newline = "\n" if text else b"\n"
+            spaces = _WHITESPACE if text else _WHITESPACE_BYTES
+        buffer = chunk if not carry else carry + chunk
+        end = buffer.rfind(newline) + 1
+        if not end:
+            # One line longer than a chunk: cut at its last space instead.
+            end = max(buffer.rfind(space) for space in spaces) + 1
+            if not end and len(buffer) > SCAN_MAX_CARRY_BYTES:
+                end = len(buffer)
+        yield buffer, end
+        carry = buffer[end:]
+    if carry:
+        yield carry, len(carry)
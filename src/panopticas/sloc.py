@@ -0,0 +1,275 @@
+"""
+Code, comment and blank line counts per file, driven by COMMENT_SYNTAX.
+
+A line is code if any of it is code, otherwise comment if any of it is a
+comment, otherwise blank: a line holding only whitespace is blank wherever
+it falls, even inside a block comment or a multi-line string. A line inside
+a multi-line string is code.
+
+The count is one pass over the file's bytes by a small state machine —
+outside any comment or string, inside a block comment, inside a string —
+whose states each own one compiled regex finding the next byte that can
+change state: a comment or string delimiter, an escape. The bytes between
+are skipped at C speed, and the lines among them classified in bulk, so the
+Python-level loop runs once per token, not once per byte or per line.
+
+core.count_sloc() reads the file and feeds it through here.
+"""
+
+import re
+from typing import NamedTuple
+
+from .constants import COMMENT_SYNTAX
+
+_NON_SPACE = re.compile(rb"\S")
+# A blank line, found from the newline before it.
+_BLANK_LINES = re.compile(rb"\n[ \t\r\f\v]*(?=\n)")
+
+# Token kinds in the outside-anything state.
+_LINE, _BLOCK, _STRING, _MULTILINE = range(4)
+
+
+class SlocCounts(NamedTuple):
+    """The code, comment and blank lines of one file, or of several summed."""
+    code: int = 0
+    comment: int = 0
+    blank: int = 0
+
+    @property
+    def lines(self):
+        return self.code + self.comment + self.blank
+
+    def __add__(self, other):
+        return SlocCounts(self.code + other.code, self.comment + other.comment,
+                          self.blank + other.blank)
+
+
+class CommentSyntax:
+    """
+    One COMMENT_SYNTAX entry compiled into the state machine's regexes.
+    Built once per language by syntax_for().
+    """
+
+    __slots__ = ("tokens", "nested", "longest", "_outside", "_blocks",
+                 "_strings")
+
+    def __init__(self, syntax):
+        self.nested = syntax.get("nested", False)
+        tokens = {}
+        for marker in syntax.get("line", ()):
+            tokens[marker.encode()] = (_LINE, None)
+        for opener, closer in syntax.get("block", ()):
+            tokens[opener.encode()] = (_BLOCK, closer.encode())
+        for delimiter in syntax.get("strings", ()):
+            tokens[delimiter.encode()] = (_STRING, delimiter.encode())
+        for delimiter in syntax.get("multiline", ()):
+            tokens[delimiter.encode()] = (_MULTILINE, delimiter.encode())
+        self.tokens = tokens
+        # The longest thing a regex matches: a delimiter, or a two-byte
+        # escape.
+        self.longest = max([2, *map(len, tokens)])
+        self._outside = _alternation(tokens)
+
+        # Inside a block comment: its closer and, when comments nest, its
+        # opener.
+        self._blocks = {}
+        for opener, closer in syntax.get("block", ()):
+            opener, closer = opener.encode(), closer.encode()
+            self._blocks[closer] = _alternation(
+                [closer] + ([opener] if self.nested else []))
+
+        # Inside a string: an escape and its delimiter, and for a string
+        # that cannot span lines, a newline.
+        self._strings = {
+            delimiter: re.compile(
+                rb"\\[^\n]|" + re.escape(delimiter)
+                + (rb"|\n" if kind == _STRING else b""))
+            for kind, delimiter in tokens.values()
+            if kind in (_STRING, _MULTILINE)
+        }
+
+    def count_chunks(self, chunks):
+        """
+        Count the lines of a file given as an iterable of byte chunks, split
+        anywhere. Each chunk is counted as it comes, lines split across
+        chunks included; only the few bytes at its end that could be the
+        start of a delimiter are carried into the next, so memory stays
+        bounded however long the lines are.
+        """
+        counts = [0, 0, 0]
+        state = (None, False, False)
+        carry = last = b""
+        for chunk in chunks:
+            if not chunk:
+                continue
+            text = carry + chunk if carry else chunk
+            state, consumed = self.count(text, state, counts, final=False)
+            carry = text[consumed:]
+            last = chunk[-1:]
+        _, code, comment = self.count(carry, state, counts)[0]
+        # A last line without a newline.
+        if last and last != b"\n":
+            _finish(counts, code, comment)
+        return SlocCounts(*counts)
+
+    def count(self, text, state, counts, final=True):
+        """
+        Feed `text` through the machine from `state`, adding to `counts`
+        ([code, comment, blank]). `state` is (machine state, whether the
+        current line has code so far, whether it has a comment). Returns the
+        state to resume from and how much of `text` was consumed. A line
+        is counted when its newline is reached: a last line without one is
+        left to the caller, in the returned state.
+
+        With final=False its last bytes are left unconsumed where a
+        delimiter could continue into the next text, for the caller to carry
+        over. With final=True the text ends the file and is consumed whole.
+
+        Newlines are not tokens, except to end a line comment or a
+        single-line string: the lines between two tokens can only be blank
+        or of the state's one kind, so they are counted in bulk from the gap.
+        """
+        tokens = self.tokens
+        non_space = _NON_SPACE.search
+        blank_lines = _BLANK_LINES.findall
+        length = len(text)
+        # A token starting before limit is wholly in the text, so a longer
+        # delimiter it is the start of cannot be cut off.
+        limit = length if final else max(length - self.longest + 1, 0)
+        state, code, comment = state
+        position = 0
+
+        while True:
+            if state is None:
+                pattern = self._outside
+                in_comment = False
+            else:
+                kind, closer, depth = state
+                if kind == _LINE:
+                    # The rest of a line comment: nothing in it counts.
+                    newline = text.find(b"\n", position)
+                    if newline == -1:
+                        position = length
+                        break
+                    position = newline
+                    state = None
+                    continue
+                in_comment = kind == _BLOCK
+                pattern = (self._blocks[closer] if in_comment
+                           else self._strings[closer])
+            found = pattern.search(text, position)
+            if found is not None and found.start() >= limit:
+                found = None
+            end = found.start() if found else max(limit, position)
+
+            # The gap before the token: the rest of this line, any lines
+            # wholly inside the gap, and the start of the token's line.
+            first = text.find(b"\n", position, end)
+            if first == -1:
+                if non_space(text, position, end):
+                    if in_comment:
+                        comment = True
+                    else:
+                        code = True
+            else:
+                if non_space(text, position, first):
+                    if in_comment:
+                        comment = True
+                    else:
+                        code = True
+                _finish(counts, code, comment)
+                last = text.rfind(b"\n", first, end)
+                middle = text.count(b"\n", first + 1, last + 1)
+                if middle:
+                    blanks = len(blank_lines(text, first, last + 1))
+                    counts[1 if in_comment else 0] += middle - blanks
+                    counts[2] += blanks
+                code = comment = False
+                if non_space(text, last + 1, end):
+                    if in_comment:
+                        comment = True
+                    else:
+                        code = True
+
+            if found is None:
+                position = end
+                break
+            token = found.group()
+            position = found.end()
+
+            if state is None:
+                kind, closer = tokens[token]
+                if kind == _LINE:
+                    comment = True
+                    state = (_LINE, None, 0)
+                elif kind == _BLOCK:
+                    comment = True
+                    state = (_BLOCK, closer, 1)
+                else:
+                    code = True
+                    state = (kind, closer, 0)
+            elif in_comment:
+                comment = True
+                depth += -1 if token == closer else 1
+                state = (_BLOCK, closer, depth) if depth else None
+            elif token == b"\n":
+                # A single-line string left open ends with its line.
+                _finish(counts, code, comment)
+                code = comment = False
+                state = None
+            else:
+                # The closing delimiter, or an escape skipped whole.
+                code = True
+                if token == closer:
+                    state = None
+
+        return (state, code, comment), position
+
+
+def _finish(counts, code, comment):
+    counts[0 if code else 1 if comment else 2] += 1
+
+
+def _alternation(tokens):
+    """One regex matching any of the byte strings, longest first."""
+    return re.compile(b"|".join(
+        re.escape(token) for token in sorted(tokens, key=len, reverse=True)))
+
+
+_COMPILED = {}
+
+
+def syntax_for(language):
+    """Return the CommentSyntax for a language, or None if it has none."""
+    compiled = _COMPILED.get(language)
+    if compiled is None:
+        syntax = COMMENT_SYNTAX.get(language)
+        if syntax is None:
+            return None
+        compiled = _COMPILED[language] = CommentSyntax(syntax)
+    return compiled
+
+
+def summarise(pairs):
+    """
+    Sum (language, SlocCounts) pairs per language. Returns {language:
+    {"files", "code", "comment", "blank"}}, most code first; pairs whose
+    counts are None are left out.
+    """
+    totals = {}
+    files = {}
+    for language, counts in pairs:
+        if counts is None:
+            continue
+        totals[language] = totals.get(language, SlocCounts()) + counts
+        files[language] = files.get(language, 0) + 1
+    ordered = sorted(totals.items(), key=lambda item: (-item[1].code, item[0]))
+    return {
+        language: {"files": files[language], **counts._asdict()}
+        for language, counts in ordered
+    }
+
+
+def sloc_dict(counts):
+    """SlocCounts as the {"code", "comment", "blank"} dict records carry."""
+    return None if counts is None else counts._asdict()
@@ -0,0 +1,116 @@
+"""
+Integer-interned tag and language vocabularies.
+
+A directory scan keeps one record per file. Holding each file's tags as a
+list of strings and its language as a string makes every record carry its
+own list and compare strings to filter or count. Interned, a file's tags are
+one int with a bit per tag, to filter and count by, plus a tuple of their IDs
+in the order the rules gave them, shared by every file with the same tags;
+its language is a small int. Names come back only when a record is written
+out.
+"""
+
+
+class Vocabulary:
+    """
+    Tag and language names mapped to stable integer IDs.
+
+    Tag IDs are positions in the tag vocabulary as given (get_tags() order),
+    and a set of tags is an int with bit ID set for each. Language IDs are
+    positions in the language list. Both are stable for a given set of rules.
+    A record written out lists its tags in the order the rules gave them, from
+    the IDs intern_tags() returns alongside the mask.
+    A name outside the vocabulary — a shebang interpreter such as "bash", or
+    a tag added after the vocabulary was built — is interned on first sight
+    with the next free ID, so no name is ever lost.
+    """
+
+    __slots__ = ("tags", "tag_ids", "tag_orders", "languages", "language_ids")
+
+    def __init__(self, tags, languages):
+        self.tags = list(tags)
+        self.tag_ids = {tag: index for index, tag in enumerate(self.tags)}
+        self.tag_orders = {}
+        self.languages = list(languages)
+        self.language_ids = {
+            language: index for index, language in enumerate(self.languages)}
+
+    def tag_id(self, tag):
+        """Return the ID of `tag`, interning it if it is new."""
+        tag_id = self.tag_ids.get(tag)
+        if tag_id is None:
+            tag_id = self.tag_ids[tag] = len(self.tags)
+            self.tags.append(tag)
+        return tag_id
+
+    def tag_mask(self, tags):
+        """Return the bitmask for an iterable of tag names."""
+        tag_ids = self.tag_ids
+        mask = 0
+        for tag in tags:
+            tag_id = tag_ids.get(tag)
+            if tag_id is None:
+                tag_id = self.tag_id(tag)
+            mask |= 1 << tag_id
+        return mask
+
+    def intern_tags(self, tags):
+        """
+        Return (mask, IDs) for an iterable of tag names: the bitmask, and a
+        tuple of the tags' IDs, each once, in the order first given. Equal
+        tuples are returned as one object, so records can hold them freely.
+        """
+        tag_ids = self.tag_ids
+        mask = 0
+        order = []
+        for tag in tags:
+            tag_id = tag_ids.get(tag)
+            if tag_id is None:
+                tag_id = self.tag_id(tag)
+            bit = 1 << tag_id
+            if not mask & bit:
+                mask |= bit
+                order.append(tag_id)
+        order = tuple(order)
+        return mask, self.tag_orders.setdefault(order, order)
+
+    def tag_names_in_order(self, tag_ids):
+        """Return the tag names for a sequence of IDs, in that order."""
+        tags = self.tags
+        return [tags[tag_id] for tag_id in tag_ids]
+
+    def tag_names(self, mask):
+        """Return the tag names in `mask`, in vocabulary order."""
+        names = []
+        tags = self.tags
+        while mask:
+            low = mask & -mask
+            names.append(tags[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def tag_counts(self, masks):
+        """
+        Return {tag: number of masks carrying it} for the tags that occur,
+        in vocabulary order — "files per tag" for a scan's records.
+        """
+        counts = [0] * len(self.tags)
+        for mask in masks:
+            while mask:
+                low = mask & -mask
+                counts[low.bit_length() - 1] += 1
+                mask ^= low
+        return {self.tags[tag_id]: count
+                for tag_id, count in enumerate(counts) if count}
+
+    def language_id(self, language):
+        """Return the ID of `language`, interning it if it is new."""
+        language_id = self.language_ids.get(language)
+        if language_id is None:
+            language_id = self.language_ids[language] = len(self.languages)
+            self.languages.append(language)
+        return language_id
+
+    def language_name(self, language_id):
+        """Return the language an ID stands for."""
+        return self.languages[language_id]
@@ -58,6 +58,39 @@ class TestAssessJson:
         # The undecodable file must not inflate or corrupt the total.
         assert payload["total_lines"] == 1
 
+    def test_lines_estimate(self, tmp_path, monkeypatch):
+        from panopticas import core
+        monkeypatch.setattr(core, "LINE_ESTIMATE_SAMPLES", 4)
+        monkeypatch.setattr(core, "LINE_ESTIMATE_BLOCK_BYTES", 1024)
+        (tmp_path / "dump.csv").write_bytes(b"a,b\n" * 5000)
+        (tmp_path / "readable.py").write_text("x = 1\n")
+
+        # --lines-estimate implies --lines.
+        payload = json.loads(
+            CliRunner().invoke(
+                cli, ["assess", str(tmp_path), "--lines-max-bytes", "1000",
+                      "--lines-estimate", "--json"]).stdout)
+
+        by_path = {r["path"]: r for r in payload["files"]}
+        assert by_path["dump.csv"]["lines"] == 5000
+        assert by_path["dump.csv"]["estimated"] is True
+        assert "estimated" not in by_path["readable.py"]
+        assert payload["total_lines"] == 5001
+        assert payload["estimated_files"] == 1
+
+    def test_lines_max_bytes_skips_large_files(self, tmp_path):
+        (tmp_path / "dump.csv").write_bytes(b"a,b\n" * 5000)
+        (tmp_path / "readable.py").write_text("x = 1\n")
+
+        payload = json.loads(
+            CliRunner().invoke(
+                cli, ["assess", str(tmp_path), "--lines-max-bytes", "1000",
+                      "--json"]).stdout)
+
+        by_path = {r["path"]: r["lines"] for r in payload["files"]}
+        assert by_path == {"dump.csv": None, "readable.py": 1}
+        assert "estimated_files" not in payload
+
     def test_unknown_filter_matches_the_unknown_language_string(self, tmp_path):
         # Regression test: get_language() returns the string "Unknown"
         # (core.UNKNOWN), never None. The old filter compared against None,
@@ -73,6 +106,16 @@ class TestAssessJson:
         assert payload["files"][0]["path"] == "mystery.zzqx"
         assert payload["files"][0]["language"] == "Unknown"
 
+    def test_unknown_with_language_is_a_usage_error(self, tmp_path):
+        (tmp_path / "readable.py").write_text("x = 1\n")
+        (tmp_path / "mystery.zzqx").write_text("no idea what this is\n")
+        result = CliRunner().invoke(
+            cli, ["assess", str(tmp_path), "-unknown", "--language", "Python",
+                  "--json"])
+        assert result.exit_code == 2
+        assert "--language" in result.output
+        assert result.stdout == ""
+
     def test_stdout_is_only_the_document(self):
         # NOTE: Click 8.2+ changed Result.output to mix stdout+stderr in
         # write order (see Result.output docstring); Result.stdout is the
@@ -141,6 +184,7 @@ class TestFileJson:
         assert payload["shebang_language"] == "Python"
         assert payload["meta"] == []
         assert payload["urls"] == ["https://example.com"]
+        assert payload["encoding"] == "utf-8"
 
     def test_absent_shebang_is_null(self, tmp_path):
         target = tmp_path / "notes.md"
@@ -150,6 +194,19 @@ class TestFileJson:
         assert payload["shebang"] is None
         assert payload["shebang_language"] is None
 
+    def test_binary_file_has_no_urls_or_encoding(self, tmp_path):
+        target = tmp_path / "blob.bin"
+        target.write_bytes(b"\x7fELF\x00\x01 https://example.com\n")
+        result = CliRunner().invoke(cli, ["file", str(target), "--json"])
+        assert result.exit_code == 0, result.output
+        payload = json.loads(result.stdout)
+        assert payload["urls"] == []
+        assert payload["encoding"] is None
+
+        result = CliRunner().invoke(cli, ["file", str(target)])
+        assert result.exit_code == 0, result.output
+        assert "blob.bin" in result.stdout
+
 
 class TestUrlsJson:
     """urls --json returns one record per file."""
@@ -184,6 +241,24 @@ class TestUrlsJson:
         assert by_path["README.md"] == ["https://example.com"]
         assert by_path["image.bin"] == []
 
+    def test_reports_each_files_encoding(self, tmp_path):
+        (tmp_path / "setup.ps1").write_bytes(
+            "# https://example.com/ps\r\n".encode("utf-16"))
+        (tmp_path / "Main.java").write_bytes(
+            "// Gr\u00fc\u00dfe https://example.com/java\n".encode("latin-1"))
+        (tmp_path / "image.bin").write_bytes(b"GIF89a\x00\x01")
+
+        payload = json.loads(CliRunner().invoke(
+            cli, ["urls", str(tmp_path), "--json"]).stdout)
+
+        by_path = {r["path"]: r for r in payload["files"]}
+        assert by_path["setup.ps1"] == {
+            "path": "setup.ps1", "urls": ["https://example.com/ps"],
+            "encoding": "utf-16-le"}
+        assert by_path["Main.java"]["urls"] == ["https://example.com/java"]
+        assert by_path["Main.java"]["encoding"] == "latin-1"
+        assert by_path["image.bin"]["encoding"] is None
+
 
 class TestPathValidation:
     """Wrong path types fail at the Click boundary, not inside a handler."""
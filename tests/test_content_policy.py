@@ -0,0 +1,148 @@
+"""
+Tests for the content-inspection policy and the scandir walker.
+
+Covers: should_read_content(), walk_files() matching os.walk(), and the
+path-only scan mode that never opens a file.
+"""
+
+import os
+from unittest import mock
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import (
+    assess_directory,
+    find_files,
+    get_language,
+    should_read_content,
+    walk_files,
+)
+from panopticas.cli import cli
+
+
+def entry_for(path):
+    """Return the os.DirEntry for a path, as walk_files() would supply it."""
+    with os.scandir(os.path.dirname(path)) as scan:
+        return next(e for e in scan if e.name == os.path.basename(path))
+
+
+class TestShouldReadContent:
+    """should_read_content() — is opening this file worth it?"""
+
+    @pytest.mark.parametrize("name", [
+        "server.log", "dump.dat", "scratch.tmp", "archive.tar.gz", "lib.so",
+    ])
+    def test_inert_extensions(self, name):
+        assert not should_read_content(name)
+
+    @pytest.mark.parametrize("name", ["run", "Jenkinsfile.inc", "tool.cgi"])
+    def test_other_names_may_be_read(self, name):
+        assert should_read_content(name)
+
+    def test_executable_inert_extension_is_read(self, tmp_path):
+        path = tmp_path / "deploy.out"
+        path.write_text("#!/bin/sh\necho hi\n")
+        path.chmod(0o755)
+        assert should_read_content(str(path), entry_for(str(path)))
+        assert get_language(str(path), entry=entry_for(str(path))) == "sh"
+
+    def test_inert_extension_is_not_read(self, tmp_path):
+        path = tmp_path / "deploy.log"
+        path.write_text("#!/bin/sh\necho hi\n")
+        assert get_language(str(path)) == "Unknown"
+
+    def test_tiny_file_is_not_read(self, tmp_path):
+        path = tmp_path / "x"
+        path.write_text("#")
+        assert not should_read_content(str(path), entry_for(str(path)))
+
+    @pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs FIFOs")
+    def test_fifo_is_not_read(self, tmp_path):
+        path = tmp_path / "pipe"
+        os.mkfifo(path)
+        # Opening a FIFO with no writer blocks; the policy must refuse it.
+        assert not should_read_content(str(path), entry_for(str(path)))
+        records = assess_directory(tmp_path, lines=True, skip_generated=True)
+        assert records == [
+            {"path": "pipe", "language": "Unknown", "meta": [], "lines": None,
+             "encoding": None}]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    """A nested tree with a .gitignore, a symlinked directory and a script."""
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "c").mkdir()
+    for path in ("top.py", "a/one.js", "a/b/two.go", "c/three.md",
+                 "ignored.txt", "a/ignored.txt"):
+        (tmp_path / path).write_text("x\n")
+    (tmp_path / ".gitignore").write_text("ignored.txt\n")
+    (tmp_path / "script").write_text("#!/usr/bin/env python3\n")
+    os.symlink(tmp_path / "a", tmp_path / "link_to_a")
+    return tmp_path
+
+
+def os_walk_files(directory, spec=None):
+    """The relative paths os.walk() yields — the order walk_files() keeps."""
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            relative = os.path.relpath(os.path.join(root, name), directory)
+            if spec is None or not spec.match_file(relative):
+                paths.append(relative)
+    return paths
+
+
+class TestWalkFiles:
+    """walk_files() — same files, same order as the os.walk() loops it replaced."""
+
+    def test_matches_os_walk_order(self, tree):
+        walked = [path for path, _ in walk_files(tree, all_files=True)]
+        assert walked == os_walk_files(tree)
+
+    def test_honours_gitignore(self, tree):
+        walked = [path for path, _ in walk_files(tree)]
+        assert "ignored.txt" not in walked
+        assert os.path.join("a", "ignored.txt") not in walked
+        assert os.path.join("a", "b", "two.go") in walked
+
+    def test_does_not_follow_directory_symlinks(self, tree):
+        walked = [path for path, _ in walk_files(tree, all_files=True)]
+        assert not any(path.startswith("link_to_a") for path in walked)
+
+    def test_entries_are_dir_entries(self, tree):
+        for path, entry in walk_files(tree):
+            assert entry.path == os.path.join(str(tree), path)
+
+    def test_find_files_uses_it(self, tree):
+        assert find_files(tree) == [path for path, _ in walk_files(tree)]
+
+
+class TestPathOnly:
+    """assess_directory(path_only=True) never opens a scanned file."""
+
+    def test_no_file_is_opened(self, tree):
+        (tree / ".gitignore").unlink()
+        with mock.patch("builtins.open", side_effect=AssertionError("opened")):
+            records = assess_directory(tree, path_only=True,
+                                       skip_generated=True)
+        languages = {r["path"]: r["language"] for r in records}
+        assert languages["top.py"] == "Python"
+        # The shebang would say Python; a path-only scan cannot know.
+        assert languages["script"] == "Unknown"
+
+    def test_lines_are_refused(self, tree):
+        with pytest.raises(ValueError):
+            assess_directory(tree, path_only=True, lines=True)
+
+    def test_cli_flag(self, tree):
+        result = CliRunner().invoke(
+            cli, ["assess", str(tree), "--path-only", "--json"])
+        assert result.exit_code == 0
+
+    def test_cli_rejects_lines(self, tree):
+        result = CliRunner().invoke(
+            cli, ["assess", str(tree), "--path-only", "--lines"])
+        assert result.exit_code == 2
+        assert "--path-only" in result.output
@@ -0,0 +1,367 @@
+"""
+Tests for the dependency manifest parsers in panopticas.deps, for
+find_dependencies() and its cache, and for `panopticas deps`.
+"""
+
+import io
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import Dependency, find_dependencies
+from panopticas import deps
+from panopticas.cli import cli
+from panopticas.deps import manifest_kind, parse_manifest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Cache under tmp_path, never in the real home directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+MANIFESTS = {
+    "requirements.txt": (
+        b"# pinned\nrequests>=2.0,<3  # http\n"
+        b"Django_Rest.Framework[x]==3.1 ; python_version<'3.13'\n"
+        b"-r dev.txt\n-e .\ngit+https://host/x.git\n"
+        b"bar==1 --hash=sha256:abc \\\n  --hash=sha256:def\n",
+        [("PyPI", "requests", ">=2.0,<3", "runtime"),
+         ("PyPI", "django-rest-framework", "==3.1", "runtime"),
+         ("PyPI", "bar", "==1", "runtime")]),
+    "pyproject.toml": (
+        b'[build-system]\nrequires = ["setuptools>=61"]\n'
+        b'[project]\ndependencies = ["click>=8", "rich"]\n'
+        b'[project.optional-dependencies]\nfast = ["numpy"]\n'
+        b'[dependency-groups]\ndev = ["pytest", {include-group = "x"}]\n'
+        b'[tool.poetry.dependencies]\npython = "^3.9"\n'
+        b'Flask = {version = "^2.0", optional = true}\n'
+        b'[tool.poetry.group.docs.dependencies]\nmkdocs = "*"\n',
+        [("PyPI", "click", ">=8", "runtime"), ("PyPI", "rich", None, "runtime"),
+         ("PyPI", "numpy", None, "optional"), ("PyPI", "pytest", None, "dev"),
+         ("PyPI", "setuptools", ">=61", "build"),
+         ("PyPI", "flask", "^2.0", "runtime"),
+         ("PyPI", "mkdocs", "*", "docs")]),
+    "package.json": (
+        b'{"dependencies": {"react": "^18"}, "devDependencies": '
+        b'{"jest": "29"}, "peerDependencies": {"react-dom": "*"}}',
+        [("npm", "react", "^18", "runtime"), ("npm", "jest", "29", "dev"),
+         ("npm", "react-dom", "*", "peer")]),
+    "go.mod": (
+        b"module m\n\ngo 1.21\n\nrequire github.com/a/b v1.2.3\n"
+        b"require (\n\tgolang.org/x/text v0.3.0 // indirect\n\t// note\n"
+        b"\tgithub.com/c/d v2.0.0+incompatible\n)\n"
+        b"replace (\n\tgithub.com/a/b => ../b\n)\n",
+        [("Go", "github.com/a/b", "v1.2.3", "runtime"),
+         ("Go", "golang.org/x/text", "v0.3.0", "indirect"),
+         ("Go", "github.com/c/d", "v2.0.0+incompatible", "runtime")]),
+    "pom.xml": (
+        b'<?xml version="1.0"?>'
+        b'<project xmlns="http://maven.apache.org/POM/4.0.0">'
+        b'<groupId>g</groupId><version>1.0</version>'
+        b'<properties><junit.version>5.9</junit.version></properties>'
+        b'<dependencyManagement><dependencies><dependency><groupId>m</groupId>'
+        b'<artifactId>bom</artifactId><version>2</version></dependency>'
+        b'</dependencies></dependencyManagement><dependencies>'
+        b'<dependency><groupId>org.junit</groupId><artifactId>junit</artifactId>'
+        b'<version>${junit.version}</version><scope>test</scope><exclusions>'
+        b'<exclusion><groupId>x</groupId><artifactId>y</artifactId>'
+        b'</exclusion></exclusions></dependency>'
+        b'<dependency><groupId>g</groupId><artifactId>sibling</artifactId>'
+        b'<version>${project.version}</version></dependency></dependencies>'
+        b'<build><plugins><plugin><artifactId>p</artifactId><dependencies>'
+        b'<dependency><groupId>pd</groupId><artifactId>pd</artifactId>'
+        b'</dependency></dependencies></plugin></plugins></build></project>',
+        [("Maven", "m:bom", "2", "managed"),
+         ("Maven", "org.junit:junit", "5.9", "test"),
+         ("Maven", "g:sibling", "1.0", "runtime")]),
+    "build.gradle": (
+        b"dependencies {\n"
+        b"    implementation 'com.google.guava:guava:32.0-jre'\n"
+        b'    testImplementation("junit:junit:4.13")\n'
+        b"    compileOnly group: 'org.projectlombok', name: 'lombok', "
+        b"version: '1.18'\n"
+        b"    implementation project(':core')\n}\n",
+        [("Maven", "com.google.guava:guava", "32.0-jre", "runtime"),
+         ("Maven", "junit:junit", "4.13", "test"),
+         ("Maven", "org.projectlombok:lombok", "1.18", "provided")]),
+    "packages.config": (
+        b'<?xml version="1.0" encoding="utf-8"?><packages>'
+        b'<package id="Newtonsoft.Json" version="13.0.1" />'
+        b'<package id="StyleCop" version="1.1" developmentDependency="true" />'
+        b'</packages>',
+        [("NuGet", "Newtonsoft.Json", "13.0.1", "runtime"),
+         ("NuGet", "StyleCop", "1.1", "dev")]),
+    "App.csproj": (
+        b'<Project Sdk="Microsoft.NET.Sdk"><ItemGroup>'
+        b'<PackageReference Include="Serilog" Version="3.0" />'
+        b'<PackageReference Include="Moq"><Version>4.18</Version>'
+        b'<PrivateAssets>all</PrivateAssets></PackageReference>'
+        b'</ItemGroup></Project>',
+        [("NuGet", "Serilog", "3.0", "runtime"),
+         ("NuGet", "Moq", "4.18", "dev")]),
+}
+
+
+class TestParsers:
+    """Each manifest parser, and what they share."""
+
+    @pytest.mark.parametrize("filename", list(MANIFESTS))
+    def test_parser(self, filename):
+        data, expected = MANIFESTS[filename]
+        tags = ["pip"] if filename.startswith("requirements") else []
+        assert parse_manifest(manifest_kind(filename, tags), data) == expected
+
+    @pytest.mark.parametrize("filename, tags, kind", [
+        ("package.json", [], "package.json"),
+        ("POM.XML", [], "pom.xml"),
+        ("Web.API.csproj", [], ".csproj"),
+        ("requirements-dev.txt", ["pip", "dependencies"], "requirements"),
+        ("yarn.lock", ["dependencies"], "yarn.lock"),
+        ("go.sum", ["dependencies"], None),
+    ])
+    def test_manifest_kind(self, filename, tags, kind):
+        assert manifest_kind(filename, tags) == kind
+
+    @pytest.mark.parametrize("kind, data", [
+        ("package.json", b"{"), ("package.json", b"[]"),
+        ("pyproject.toml", b"x ="), ("pom.xml", b"<project>"),
+        ("go.mod", b"\xff\xfe"),
+    ])
+    def test_malformed_manifest_raises_value_error(self, kind, data):
+        with pytest.raises(ValueError):
+            parse_manifest(kind, data)
+
+
+LOCKFILES = {
+    "package-lock.json v3": (
+        "package-lock.json",
+        b'{"name": "app", "lockfileVersion": 3, "requires": true,\n'
+        b' "packages": {\n'
+        b'  "": {"name": "app", "dependencies": {"react": "^18"}},\n'
+        b'  "node_modules/react": {"version": "18.2.0", "integrity": "x"},\n'
+        b'  "node_modules/@babel/core": {"version": "7.24.0", "dev": true},\n'
+        b'  "node_modules/a/node_modules/b": {"version": "1.0.0",\n'
+        b'                                    "optional": true},\n'
+        b'  "node_modules/alias": {"name": "real", "version": "2.0.0"},\n'
+        b'  "node_modules/ws": {"resolved": "packages/ws", "link": true},\n'
+        b'  "packages/ws": {"name": "ws", "version": "0.0.1"}},\n'
+        b' "dependencies": {"react": {"version": "18.2.0"}}}\n',
+        [("npm", "react", "18.2.0", "runtime"),
+         ("npm", "@babel/core", "7.24.0", "dev"),
+         ("npm", "b", "1.0.0", "optional"),
+         ("npm", "real", "2.0.0", "runtime")]),
+    "package-lock.json v1": (
+        "package-lock.json",
+        b'\xef\xbb\xbf{"lockfileVersion": 1, "dependencies": {\n'
+        b'  "a": {"version": "1.0.0", "dependencies": {\n'
+        b'    "b": {"version": "2.0.0", "dev": true}}},\n'
+        b'  "c": {"version": "3.0.0"}}}',
+        [("npm", "a", "1.0.0", "runtime"), ("npm", "b", "2.0.0", "dev"),
+         ("npm", "c", "3.0.0", "runtime")]),
+    "yarn.lock classic": (
+        "yarn.lock",
+        b'# yarn lockfile v1\n\n\n'
+        b'"@babel/code-frame@^7.0.0", "@babel/code-frame@^7.10.4":\n'
+        b'  version "7.12.13"\n  resolved "https://registry.yarnpkg.com/x"\n'
+        b'  dependencies:\n    "@babel/highlight" "^7.12.13"\n\n'
+        b'lodash@^4.17.21:\n  version "4.17.21"\n',
+        [("npm", "@babel/code-frame", "7.12.13", "locked"),
+         ("npm", "lodash", "4.17.21", "locked")]),
+    "yarn.lock berry": (
+        "yarn.lock",
+        b'__metadata:\n  version: 6\n\n'
+        b'"@babel/core@npm:^7.0.0, @babel/core@npm:^7.1.0":\n'
+        b'  version: 7.24.0\n  resolution: "@babel/core@npm:7.24.0"\n\n'
+        b'"app@workspace:.":\n  version: 0.0.0-use.local\n',
+        [("npm", "@babel/core", "7.24.0", "locked")]),
+    "pnpm-lock.yaml v5": (
+        "pnpm-lock.yaml",
+        b"lockfileVersion: 5.4\n\npackages:\n\n"
+        b"  /@types/node/18.0.0:\n    dev: true\n\n"
+        b"  /react-dom/18.2.0_react@18.2.0:\n    dev: false\n",
+        [("npm", "@types/node", "18.0.0", "dev"),
+         ("npm", "react-dom", "18.2.0", "runtime")]),
+    "pnpm-lock.yaml v6": (
+        "pnpm-lock.yaml",
+        b"lockfileVersion: '6.0'\n\ndependencies:\n  react:\n"
+        b"    specifier: ^18.2.0\n    version: 18.2.0\n\npackages:\n\n"
+        b"  /react@18.2.0(loose-envify@1.4.0):\n"
+        b"    resolution: {integrity: sha512-y}\n"
+        b"    dependencies:\n      loose-envify: 1.4.0\n    dev: false\n\n"
+        b"  /fsevents@2.3.3:\n    dev: false\n    optional: true\n",
+        [("npm", "react", "18.2.0", "runtime"),
+         ("npm", "fsevents", "2.3.3", "optional")]),
+    "pnpm-lock.yaml v9": (
+        "pnpm-lock.yaml",
+        b"lockfileVersion: '9.0'\n\nimporters:\n  .:\n    dependencies:\n"
+        b"      react:\n        specifier: ^18\n        version: 18.2.0\n\n"
+        b"packages:\n\n  '@babel/core@7.24.0':\n"
+        b"    resolution: {integrity: sha512-x}\n\n"
+        b"snapshots:\n\n  react@18.2.0: {}\n",
+        [("npm", "@babel/core", "7.24.0", "locked")]),
+    "uv.lock": (
+        "uv.lock",
+        b'version = 1\n\n[[package]]\nname = "app"\nversion = "0.1.0"\n'
+        b'source = { editable = "." }\ndependencies = [\n'
+        b'    { name = "anyio" },\n]\n\n[package.metadata]\n'
+        b'requires-dist = [{ name = "anyio" }]\n\n'
+        b'[[package]]\nname = "Typing_Extensions"\nversion = "4.12.2"\n'
+        b'source = { registry = "https://pypi.org/simple" }\n',
+        [("PyPI", "typing-extensions", "4.12.2", "locked")]),
+}
+
+
+class TestLockfiles:
+    """The streaming lockfile readers."""
+
+    @pytest.mark.parametrize("name", list(LOCKFILES))
+    def test_lockfile(self, name):
+        filename, data, expected = LOCKFILES[name]
+        assert parse_manifest(filename, data) == expected
+
+    @pytest.mark.parametrize("name", list(LOCKFILES))
+    def test_read_in_small_chunks(self, name, monkeypatch):
+        """Values, keys and numbers split across reads decode the same."""
+        monkeypatch.setattr(deps, "DEPS_CHUNK_BYTES", 5)
+        filename, data, expected = LOCKFILES[name]
+        assert parse_manifest(filename, io.BytesIO(data)) == expected
+
+    @pytest.mark.parametrize("data", [
+        b'{"packages": {"node_modules/a": {"version": ',
+        b'[{"packages": {}}]', b'{"packages" {}}',
+    ])
+    def test_malformed_package_lock(self, data):
+        with pytest.raises(ValueError):
+            parse_manifest("package-lock.json", data)
+
+    def test_lockfiles_have_no_size_limit(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(deps, "DEPS_MAX_BYTES", 10)
+        filename, data, expected = LOCKFILES["uv.lock"]
+        (tmp_path / filename).write_bytes(data)
+        (tmp_path / "go.mod").write_bytes(MANIFESTS["go.mod"][0])
+        dependencies, manifests = find_dependencies(tmp_path, cache=False)
+        errors = {manifest["path"]: manifest["error"] for manifest in manifests}
+        assert errors == {"uv.lock": None, "go.mod": "larger than 10 bytes"}
+        assert [dependency[:4] for dependency in dependencies] == expected
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "repo"
+    (root / "api").mkdir(parents=True)
+    (root / "api" / "package.json").write_bytes(MANIFESTS["package.json"][0])
+    (root / "requirements.txt").write_bytes(MANIFESTS["requirements.txt"][0])
+    (root / "go.mod").write_bytes(MANIFESTS["go.mod"][0])
+    (root / "node_modules" / "left-pad").mkdir(parents=True)
+    (root / "node_modules" / "left-pad" / "package.json").write_text(
+        '{"dependencies": {"nothing": "1"}}')
+    (root / "broken").mkdir()
+    (root / "broken" / "package.json").write_text("{")
+    (root / "README.md").write_text("requests>=2.0\n")
+    return root
+
+
+class TestFindDependencies:
+    """find_dependencies(): which files, the records, and the cache."""
+
+    def test_records(self, tree):
+        dependencies, manifests = find_dependencies(tree, skip_generated=True)
+        assert sorted(manifest["path"] for manifest in manifests) == [
+            "api/package.json", "broken/package.json", "go.mod",
+            "requirements.txt"]
+        assert Dependency("npm", "jest", "29", "dev", "api/package.json") \
+            in dependencies
+        broken = next(manifest for manifest in manifests
+                      if manifest["path"] == "broken/package.json")
+        assert broken["error"] and broken["dependencies"] == 0
+        assert len(dependencies) == 3 + 3 + 3
+
+    def test_vendored_manifests_without_skip_generated(self, tree):
+        _, manifests = find_dependencies(tree)
+        assert "node_modules/left-pad/package.json" in [
+            manifest["path"] for manifest in manifests]
+
+    def test_rerun_parses_nothing(self, tree, monkeypatch):
+        first = find_dependencies(tree)
+        calls = []
+        original = deps.parse_manifest
+
+        def counting(kind, data):
+            calls.append(kind)
+            return original(kind, data)
+
+        monkeypatch.setattr(deps, "parse_manifest", counting)
+        dependencies, manifests = find_dependencies(tree)
+        assert calls == []
+        assert all(manifest["cached"] for manifest in manifests)
+        assert dependencies == first[0]
+
+        (tree / "go.mod").write_text("module m\nrequire a/b v1\n")
+        dependencies, manifests = find_dependencies(tree)
+        assert calls == ["go.mod"]
+        assert Dependency("Go", "a/b", "v1", "runtime", "go.mod") \
+            in dependencies
+
+    def test_cache_is_json(self, tree, tmp_path):
+        first = find_dependencies(tree)
+        [cache_file] = (tmp_path / "cache" / "panopticas").glob("deps-*.json")
+        entry = json.loads(cache_file.read_text())
+        assert all(status in ("ok", "error") for status, _ in entry.values())
+        # Private to the user.
+        assert not cache_file.parent.stat().st_mode & 0o077
+        written = cache_file.stat().st_mtime_ns
+        assert find_dependencies(tree) == (first[0], [
+            dict(manifest, cached=True) for manifest in first[1]])
+        assert cache_file.stat().st_mtime_ns == written
+
+    def test_malformed_cache_is_a_miss(self, tree, tmp_path):
+        expected = find_dependencies(tree)
+        [cache_file] = (tmp_path / "cache" / "panopticas").glob("deps-*.json")
+        entry = json.loads(cache_file.read_text())
+        cache_file.write_text(json.dumps(
+            {key: ["ok", [["only", "three", "fields"]]] for key in entry}))
+        assert find_dependencies(tree) == expected
+
+    def test_lockfiles_are_generated(self, tree):
+        filename, data, expected = LOCKFILES["package-lock.json v3"]
+        (tree / "api" / filename).write_bytes(data)
+        dependencies, _ = find_dependencies(tree)
+        assert [dependency[:4] for dependency in dependencies
+                if dependency.manifest == "api/package-lock.json"] == expected
+        dependencies, _ = find_dependencies(tree, skip_generated=True)
+        assert "api/package-lock.json" not in {
+            dependency.manifest for dependency in dependencies}
+
+    def test_cache_can_be_disabled(self, tree, tmp_path):
+        find_dependencies(tree, cache=False)
+        assert not (tmp_path / "cache").exists()
+
+    def test_process_pool_matches_in_process(self, tree, monkeypatch):
+        expected = find_dependencies(tree, cache=False, workers=1)
+        monkeypatch.setattr(deps, "DEPS_POOL_MIN", 1)
+        assert find_dependencies(tree, cache=False, workers=2) == expected
+
+
+class TestDepsCommand:
+    """`panopticas deps`."""
+
+    def test_json(self, tree):
+        result = CliRunner().invoke(
+            cli, ["deps", "--skip-generated", str(tree), "--json"])
+        assert result.exit_code == 0, result.output
+        payload = json.loads(result.stdout)
+        assert payload["count"] == 9
+        assert {"ecosystem": "Go", "name": "golang.org/x/text",
+                "version": "v0.3.0", "scope": "indirect",
+                "manifest": "go.mod"} in payload["dependencies"]
+        assert len(payload["manifests"]) == 4
+
+    def test_table_and_errors(self, tree):
+        result = CliRunner().invoke(
+            cli, ["deps", "--skip-generated", "--no-cache", str(tree)])
+        assert result.exit_code == 0, result.output
+        assert "golang.org" in result.stdout
+        assert "9 dependencies in 4 manifests (0 cached)" in result.stdout
+        assert "broken/package.json:" in result.stderr
@@ -0,0 +1,173 @@
+"""
+Tests for vendored, generated and minified file classification.
+
+Covers: the GENERATED_RULES path rules, the bounded content check, and the
+--skip-generated switch on assess and urls.
+"""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import (
+    assess_directory,
+    check_generated_content,
+    extract_urls_from_directory,
+    get_filename_metatypes,
+    get_generated_metatypes,
+    get_tags,
+    is_generated,
+)
+from panopticas.cli import cli
+from panopticas.constants import GENERATED_TAGS
+
+
+class TestGetGeneratedMetatypes:
+    """get_generated_metatypes() — pure path rules."""
+
+    @pytest.mark.parametrize("path, tag", [
+        ("vendor/github.com/pkg/errors/errors.go", "vendored"),
+        ("src/third_party/zlib/inflate.c", "vendored"),
+        ("web/node_modules/left-pad/index.js", "vendored"),
+        ("dist/bundle.min.js", "minified"),
+        ("static/site.MIN.CSS", "minified"),
+        ("api/service_pb2.py", "generated"),
+        ("api/service_pb2_grpc.py", "generated"),
+        ("api/service.pb.go", "generated"),
+        ("package-lock.json", "generated"),
+        ("frontend/yarn.lock", "generated"),
+        ("uv.lock", "generated"),
+    ])
+    def test_path_rules(self, path, tag):
+        assert tag in get_generated_metatypes(path)
+
+    @pytest.mark.parametrize("path", [
+        "src/app.py",
+        "myvendor/lib.go",         # anchored to whole directory names
+        "vendored.go",
+        "src/minimal.js",
+    ])
+    def test_hand_written_paths(self, path):
+        assert get_generated_metatypes(path) == []
+
+    def test_vendored_minified_file_gets_both(self):
+        tags = get_generated_metatypes("vendor/jquery/jquery.min.js")
+        assert set(tags) == {"vendored", "minified"}
+
+    def test_appended_to_filename_metatypes(self):
+        tags = get_filename_metatypes("yarn.lock")
+        assert tags[:4] == ["dependencies", "JavaScript", "yarn", "npm"]
+        assert "generated" in tags
+
+    def test_tags_are_in_vocabulary(self):
+        assert set(GENERATED_TAGS) <= set(get_tags())
+
+
+class TestCheckGeneratedContent:
+    """check_generated_content() — the bounded content check."""
+
+    @pytest.mark.parametrize("banner", [
+        "// Code generated by protoc-gen-go. DO NOT EDIT.",
+        "# @generated",
+        "/* This file is auto-generated */",
+        "# Generated by Django 4.2 on 2024-01-01",
+    ])
+    def test_generator_banner(self, tmp_path, banner):
+        path = tmp_path / "out.go"
+        path.write_text(f"{banner}\npackage main\n")
+        assert check_generated_content(path) == ["generated"]
+
+    def test_banner_below_the_header_is_ignored(self, tmp_path):
+        path = tmp_path / "notes.md"
+        path.write_text("line\n" * 20 + "This is generated by hand.\n")
+        assert check_generated_content(path) == []
+
+    def test_long_lines_are_minified(self, tmp_path):
+        path = tmp_path / "bundle.js"
+        path.write_text("var a=1;" * 2000 + "\n")
+        assert check_generated_content(path) == ["minified"]
+
+    def test_hand_written(self, tmp_path):
+        path = tmp_path / "app.py"
+        path.write_text("def main():\n    return 1\n")
+        assert check_generated_content(path) == []
+
+    def test_missing_file(self):
+        assert check_generated_content("/nonexistent/file.js") == []
+
+
+class TestIsGenerated:
+
+    def test_any_generated_tag(self):
+        assert is_generated(["JavaScript", "minified"])
+
+    def test_no_generated_tag(self):
+        assert not is_generated(["pip", "Python"])
+
+
+@pytest.fixture
+def mixed_tree(tmp_path):
+    """A tree with hand-written, vendored, minified and banner-generated files."""
+    (tmp_path / "app.py").write_text("URL = 'https://example.com/app'\n")
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "vendor" / "lib.py").write_text(
+        "URL = 'https://example.com/vendor'\nx = 1\n")
+    (tmp_path / "bundle.min.js").write_text(
+        "var u='https://example.com/min';\n")
+    (tmp_path / "models.py").write_text(
+        "# Code generated by a tool. DO NOT EDIT.\n"
+        "URL = 'https://example.com/generated'\n")
+    return tmp_path
+
+
+class TestSkipGenerated:
+    """assess_directory() and extract_urls_from_directory() with skip_generated."""
+
+    def test_lines_skipped_for_generated_files(self, mixed_tree):
+        records = assess_directory(mixed_tree, lines=True, skip_generated=True)
+        lines = {r["path"]: r["lines"] for r in records}
+        assert lines["app.py"] == 1
+        assert lines["vendor/lib.py"] is None
+        assert lines["bundle.min.js"] is None
+        assert lines["models.py"] is None
+
+    def test_content_tags_not_added_to_meta(self, mixed_tree):
+        # The switch changes what is counted, never a file's meta.
+        assert assess_directory(mixed_tree, skip_generated=True) == \
+            assess_directory(mixed_tree)
+        meta = {r["path"]: r["meta"] for r in assess_directory(
+            mixed_tree, skip_generated=True)}
+        assert meta["models.py"] == []
+        assert meta["bundle.min.js"] == ["minified"]
+
+    def test_without_the_switch_everything_is_counted(self, mixed_tree):
+        records = assess_directory(mixed_tree, lines=True)
+        lines = {r["path"]: r["lines"] for r in records}
+        assert lines["vendor/lib.py"] == 2
+        # Only path tags without the switch — the content is not read.
+        meta = {r["path"]: r["meta"] for r in records}
+        assert meta["models.py"] == []
+
+    def test_urls_skipped_for_generated_files(self, mixed_tree):
+        records = extract_urls_from_directory(mixed_tree, skip_generated=True)
+        urls = {r["path"]: r["urls"] for r in records}
+        assert urls["app.py"] == ["https://example.com/app"]
+        assert urls["vendor/lib.py"] == []
+        assert urls["bundle.min.js"] == []
+        assert urls["models.py"] == []
+
+    def test_cli_assess(self, mixed_tree):
+        result = CliRunner().invoke(
+            cli, ["assess", str(mixed_tree), "--lines", "--skip-generated",
+                  "--json"])
+        assert result.exit_code == 0
+        payload = json.loads(result.stdout)
+        assert payload["total_lines"] == 1
+
+    def test_cli_urls(self, mixed_tree):
+        result = CliRunner().invoke(
+            cli, ["urls", str(mixed_tree), "--skip-generated", "--json"])
+        assert result.exit_code == 0
+        found = [u for r in json.loads(result.stdout)["files"] for u in r["urls"]]
+        assert found == ["https://example.com/app"]
@@ -0,0 +1,194 @@
+"""
+Tests for the URL host index in panopticas.hosts, for index_url_hosts() and
+find_url_providers(), and for `panopticas urls --by-host` and `--providers`.
+"""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import (
+    HostIndex, UrlHost, find_url_providers, index_url_hosts,
+    registrable_domain, url_host, url_provider)
+from panopticas.cli import cli
+
+
+class TestUrlHost:
+    """Reducing a URL to its scheme, host and registrable domain."""
+
+    @pytest.mark.parametrize("url, expected", [
+        ("https://github.com/a/b", ("https", "github.com", "github.com",
+                                    "GitHub")),
+        ("HTTP://User:pw@API.Example.co.uk:8443/x?y",
+         ("http", "api.example.co.uk", "example.co.uk")),
+        ("https://docs.example.com?q=1", ("https", "docs.example.com",
+                                          "example.com")),
+        ("https://example.com./", ("https", "example.com", "example.com")),
+        ("http://[::1]:8080/", ("http", "[::1]", "[::1]")),
+        ("https://10.0.0.1:443/a", ("https", "10.0.0.1", "10.0.0.1")),
+        ("http://localhost:3000", ("http", "localhost", "localhost")),
+    ])
+    def test_parts(self, url, expected):
+        assert url_host(url) == UrlHost(*expected)
+
+    @pytest.mark.parametrize("url", ["https://", "https://:8080/x",
+                                     "example.com/x"])
+    def test_no_host(self, url):
+        assert url_host(url) is None
+
+    @pytest.mark.parametrize("host, domain", [
+        ("a.b.c.example.org", "example.org"),
+        ("www.bbc.co.uk", "bbc.co.uk"),
+        ("pages.someone.github.io", "someone.github.io"),
+        ("co.uk", "co.uk"),
+        ("192.168.1.1", "192.168.1.1"),
+    ])
+    def test_registrable_domain(self, host, domain):
+        assert registrable_domain(host) == domain
+
+
+class TestHostIndex:
+    """Aggregation by domain, and what the index keeps."""
+
+    def test_counts_hosts_and_samples(self):
+        index = HostIndex(samples=2)
+        index.add_file("a.py", ["https://api.github.com/x",
+                                "https://github.com/y", "https://github.com/z",
+                                "http://example.com", "https://"])
+        index.add_file("b.py", ["https://github.com/y"])
+        index.add_file("c.py", ["https://gist.github.com"])
+        index.add_file("d.py", [])
+        assert index.as_dict() == {
+            "files": 4,
+            "urls": 6,
+            "skipped_urls": 1,
+            "domains": [
+                {"domain": "github.com", "urls": 5, "files": 3,
+                 "hosts": {"github.com": 3, "api.github.com": 1,
+                           "gist.github.com": 1},
+                 "schemes": ["https"], "samples": ["a.py", "b.py"]},
+                {"domain": "example.com", "urls": 1, "files": 1,
+                 "hosts": {"example.com": 1}, "schemes": ["http"],
+                 "samples": ["a.py"]},
+            ],
+            "providers": [
+                {"provider": "GitHub", "urls": 5, "files": 3,
+                 "hosts": {"github.com": 3, "api.github.com": 1,
+                           "gist.github.com": 1},
+                 "samples": ["a.py", "b.py"]},
+            ],
+        }
+
+    def test_each_authority_is_parsed_once(self):
+        index = HostIndex()
+        index.add_file("a", ["https://Example.com/a", "https://Example.com/b"])
+        index.add_file("b", ["https://Example.com/c"])
+        assert len(index._parsed) == 1
+        hosts = [parsed.host for parsed in index._parsed.values()]
+        assert hosts == ["example.com"]
+
+
+class TestIndexUrlHosts:
+    """index_url_hosts() and `urls --by-host`."""
+
+    @pytest.fixture
+    def tree(self, tmp_path):
+        (tmp_path / "a.md").write_text(
+            "https://api.github.com/x and https://github.com/y\n"
+            "http://www.example.co.uk\n")
+        (tmp_path / "b.py").write_text("https://github.com/z\n")
+        (tmp_path / "c.bin").write_bytes(b"https://evil.example\x00\x01")
+        return tmp_path
+
+    def test_matches_the_url_records(self, tree):
+        index = index_url_hosts(tree)
+        assert index.files == 3
+        assert [(entry.domain, entry.urls, entry.files)
+                for entry in index.entries()] == [
+            ("github.com", 3, 2), ("example.co.uk", 1, 1)]
+
+    def test_json(self, tree):
+        result = CliRunner().invoke(
+            cli, ["urls", "--by-host", str(tree), "--json"])
+        assert result.exit_code == 0, result.output
+        payload = json.loads(result.stdout)
+        assert payload["directory"] == str(tree)
+        assert payload["urls"] == 4
+        assert sorted(payload["domains"][0]["samples"]) == ["a.md", "b.py"]
+
+    def test_table(self, tree):
+        result = CliRunner().invoke(cli, ["urls", "--by-host", str(tree)])
+        assert result.exit_code == 0, result.output
+        assert "api.github.com" in result.output
+        assert "2 domains, 4 URLs in 3 files" in result.output
+
+
+class TestProviders:
+    """Provider classification, find_url_providers() and `urls --providers`."""
+
+    @pytest.mark.parametrize("host, provider", [
+        ("hooks.slack.com", "Slack webhook"),
+        ("files.slack.com", "Slack"),
+        ("bucket.s3.amazonaws.com", "AWS S3"),
+        ("sqs.us-east-1.amazonaws.com", "AWS"),
+        ("myapp.azurewebsites.net", "Azure"),
+        ("storage.googleapis.com", "Google Cloud"),
+        ("raw.githubusercontent.com", "GitHub"),
+        ("notgithub.com", None),
+        ("example.com", None),
+    ])
+    def test_url_provider(self, host, provider):
+        assert url_provider(host) == provider
+
+    def test_add_file_returns_the_file_providers(self):
+        index = HostIndex()
+        assert index.add_file("a", [
+            "https://hooks.slack.com/services/x", "https://example.com",
+            "https://github.com/a", "https://api.github.com/b"]) == {
+            "Slack webhook": ["https://hooks.slack.com/services/x"],
+            "GitHub": ["https://github.com/a", "https://api.github.com/b"]}
+
+    @pytest.fixture
+    def tree(self, tmp_path):
+        (tmp_path / "a.py").write_text(
+            "post https://hooks.slack.com/services/T/B/x\n"
+            "https://github.com/y https://example.com\n")
+        (tmp_path / "b.tf").write_text("https://b.s3.amazonaws.com/key\n")
+        (tmp_path / "c.md").write_text("https://example.com\n")
+        return tmp_path
+
+    def test_records_and_summary(self, tree):
+        records, index = find_url_providers(tree)
+        assert sorted(records, key=lambda record: record["path"]) == [
+            {"path": "a.py",
+             "providers": {"Slack webhook": [
+                 "https://hooks.slack.com/services/T/B/x"],
+                 "GitHub": ["https://github.com/y"]}},
+            {"path": "b.tf",
+             "providers": {"AWS S3": ["https://b.s3.amazonaws.com/key"]}},
+        ]
+        assert sorted(entry.provider for entry in index.provider_entries()) \
+            == ["AWS S3", "GitHub", "Slack webhook"]
+
+    def test_json(self, tree):
+        result = CliRunner().invoke(
+            cli, ["urls", "--providers", str(tree), "--json"])
+        assert result.exit_code == 0, result.output
+        payload = json.loads(result.stdout)
+        assert payload["count"] == 3
+        assert len(payload["files"]) == 2
+        assert {entry["provider"] for entry in payload["providers"]} == {
+            "AWS S3", "GitHub", "Slack webhook"}
+
+    def test_table(self, tree):
+        result = CliRunner().invoke(cli, ["urls", "--providers", str(tree)])
+        assert result.exit_code == 0, result.output
+        assert "Slack webhook" in result.output
+        assert "2 of 3 files" in result.output
+
+    def test_by_host_and_providers_is_a_usage_error(self, tree):
+        result = CliRunner().invoke(
+            cli, ["urls", "--by-host", "--providers", str(tree)])
+        assert result.exit_code == 2
+        assert "cannot be combined" in result.output
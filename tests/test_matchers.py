@@ -0,0 +1,319 @@
+"""
+Tests for the compiled rule matchers.
+
+FragmentMatcher and SuffixMatcher are checked against the loops they replaced
+— sort the keys longest-first, return the first one contained in (or ending)
+the text — on hand-picked overlaps and on seeded random tables, and
+DomainMatcher the same way against whole-label domain matching.
+MetadataMatcher and AIMatcher are checked against the answers the detectors
+gave before the rule tables were compiled. QuietFilter must never call a name
+quiet that some rule matches.
+"""
+
+import os
+import random
+import re
+
+import pytest
+
+from panopticas import PathInfo, get_ai_metadata, get_filename_metatypes
+from panopticas.constants import AI_RULES, METADATA_RULES
+from panopticas.core import PREDICATE_RULES, predicate_rule
+from panopticas.matchers import (
+    BASENAME_SCOPE, PATH_SCOPE, AIMatcher, FragmentMatcher, MetadataMatcher,
+    DomainMatcher, PredicateRule, QuietFilter, SuffixMatcher)
+
+
+def reference_search(fragments, text):
+    for fragment in sorted(fragments, key=len, reverse=True):
+        if fragment in text:
+            return fragments[fragment]
+    return None
+
+
+def reference_suffix(suffixes, text):
+    for suffix in sorted(suffixes, key=len, reverse=True):
+        if text.endswith(suffix):
+            return suffixes[suffix]
+    return None
+
+
+def reference_ai(path):
+    """get_ai_metadata() as it was before AI_RULES was compiled."""
+    path = path.replace(os.sep, "/").lower()
+    filename = path.rsplit("/", 1)[-1]
+    rule = AI_RULES["exact_filename"].get(filename)
+    if rule:
+        return rule
+    rule = reference_search(AI_RULES["path_contains"], path)
+    if rule:
+        return rule
+    return reference_suffix(AI_RULES["filename_suffix"], filename)
+
+
+class TestFragmentMatcher:
+    """FragmentMatcher.search() and scan()."""
+
+    FRAGMENTS = {
+        ".github/workflows": "workflows",
+        ".buildkite/": "buildkite",
+        ".circleci/": "circleci",
+        ".github": "github",
+    }
+
+    @pytest.mark.parametrize("text, expected", [
+        (".github/workflows/ci.yml", "workflows"),
+        (".github/dependabot.yml", "github"),
+        ("a/.github/workflows", "workflows"),
+        ("docs/.github", "github"),
+        (".buildkite/pipeline.yml", "buildkite"),
+        ("src/app.py", None),
+        ("", None),
+    ])
+    def test_longest_fragment_wins(self, text, expected):
+        assert FragmentMatcher(self.FRAGMENTS).search(text) == expected
+
+    def test_overlapping_fragments(self):
+        # "bcd" starts inside "ab": a left-to-right, non-overlapping scan
+        # would miss it.
+        matcher = FragmentMatcher({"ab": "short", "bcd": "long"})
+        assert matcher.search("abcd") == "long"
+
+    def test_fragment_inside_another(self):
+        matcher = FragmentMatcher({"needle": "inner", "haystack": "outer"})
+        assert matcher.search("xneedlex") == "inner"
+        assert matcher.search("haystackneedle") == "outer"
+
+    def test_equal_length_ties_go_to_the_first_listed(self):
+        assert FragmentMatcher({"ab": 1, "cd": 2}).search("cd ab") == 1
+        assert FragmentMatcher({"cd": 2, "ab": 1}).search("cd ab") == 2
+
+    def test_empty_matcher(self):
+        matcher = FragmentMatcher({})
+        assert len(matcher) == 0
+        assert matcher.search("anything") is None
+
+    def test_empty_fragment_always_matches(self):
+        assert FragmentMatcher({"": "any"}).search("text") == "any"
+        assert FragmentMatcher({"": "any", "ex": "ex"}).search("text") == "ex"
+
+    def test_scan_resumes(self):
+        matcher = FragmentMatcher(self.FRAGMENTS)
+        state, best = matcher.scan("repo/.github/work")
+        state, best = matcher.scan("flows/ci.yml", state, best)
+        assert matcher.value(best) == "workflows"
+
+    def test_matches_reference_on_random_tables(self):
+        rng = random.Random(7)
+        alphabet = "ab/."
+        for _ in range(200):
+            fragments = {}
+            for index in range(rng.randint(1, 8)):
+                fragment = "".join(
+                    rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+                fragments.setdefault(fragment, index)
+            matcher = FragmentMatcher(fragments)
+            for _ in range(20):
+                text = "".join(
+                    rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+                assert matcher.search(text) == \
+                    reference_search(fragments, text), (fragments, text)
+                split = rng.randint(0, len(text))
+                state, best = matcher.scan(text[:split])
+                _, best = matcher.scan(text[split:], state, best)
+                assert matcher.value(best) == \
+                    reference_search(fragments, text), (fragments, text)
+                assert matcher.resolve(text[split:], state, best) == \
+                    reference_search(fragments, text), (fragments, text)
+
+
+class TestSuffixMatcher:
+    """SuffixMatcher.search()."""
+
+    def test_longest_suffix_wins(self):
+        matcher = SuffixMatcher({".md": "md", ".prompt.md": "prompt"})
+        assert matcher.search("x.prompt.md") == "prompt"
+        assert matcher.search("x.md") == "md"
+        assert matcher.search("x.txt") is None
+        assert matcher.search("") is None
+
+    def test_empty_suffix(self):
+        assert SuffixMatcher({"": "any"}).search("text") == "any"
+
+    def test_matches_reference_on_random_tables(self):
+        rng = random.Random(11)
+        alphabet = "ab."
+        for _ in range(200):
+            suffixes = {
+                "".join(rng.choice(alphabet)
+                        for _ in range(rng.randint(1, 4))): index
+                for index in range(rng.randint(1, 6))}
+            matcher = SuffixMatcher(suffixes)
+            for _ in range(20):
+                text = "".join(
+                    rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+                assert matcher.search(text) == \
+                    reference_suffix(suffixes, text), (suffixes, text)
+
+
+class TestDomainMatcher:
+    """DomainMatcher.search()."""
+
+    def test_longest_domain_wins_on_whole_labels(self):
+        matcher = DomainMatcher({"slack.com": "Slack",
+                                 "hooks.slack.com": "webhook"})
+        assert matcher.search("hooks.slack.com") == "webhook"
+        assert matcher.search("a.hooks.slack.com") == "webhook"
+        assert matcher.search("slack.com") == "Slack"
+        assert matcher.search("api.slack.com") == "Slack"
+        assert matcher.search("notslack.com") is None
+        assert matcher.search("com") is None
+        assert matcher.search("") is None
+
+    def test_matches_reference_on_random_tables(self):
+        rng = random.Random(47)
+        labels = ["a", "b", "ab", "c"]
+
+        def name(low, high):
+            return ".".join(rng.choice(labels)
+                            for _ in range(rng.randint(low, high)))
+
+        for _ in range(200):
+            domains = {name(1, 3): index for index in range(rng.randint(1, 6))}
+            matcher = DomainMatcher(domains)
+            for _ in range(20):
+                host = name(1, 5)
+                expected = None
+                for domain in sorted(domains, key=len, reverse=True):
+                    if host == domain or host.endswith("." + domain):
+                        expected = domains[domain]
+                        break
+                assert matcher.search(host) == expected, (domains, host)
+
+
+class TestAIMatcher:
+    """AIMatcher and get_ai_metadata()'s precedence."""
+
+    SAMPLE_PATHS = (
+        [key for key in AI_RULES["exact_filename"]]
+        + [f"repo/{key}x" for key in AI_RULES["path_contains"]]
+        + [f"docs/a{key}" for key in AI_RULES["filename_suffix"]]
+        + [
+            ".claude/skills/review/CLAUDE.md",
+            ".github/prompts/x.instructions.md",
+            ".cursor/rules/style.mdc",
+            ".Claude/Agents/reviewer.md",
+            os.path.join("src", ".roo", "rules", "x.md"),
+            "src/app.py",
+            "",
+        ]
+    )
+
+    @pytest.mark.parametrize("path", SAMPLE_PATHS)
+    def test_matches_reference(self, path):
+        rule = reference_ai(path) if path else None
+        expected = {"product": rule[0], "kind": rule[1]} if rule else None
+        assert get_ai_metadata(path) == expected
+
+    def test_directories(self):
+        directories = AIMatcher(AI_RULES).directories
+        assert directories.search("/.claude/") is not None
+        assert directories.search("/repo/.claude/skills/") is not None
+        assert directories.search("/.claude/skills/review/") is None
+        assert directories.search("/src/") is None
+
+
+class TestMetadataMatcher:
+    """MetadataMatcher and the tags get_filename_metatypes() builds from it."""
+
+    def test_unknown_predicate_fails_at_compile_time(self):
+        rules = dict(METADATA_RULES, function_rules=[("no_such_check", ["x"])])
+        with pytest.raises(ValueError, match="no_such_check"):
+            MetadataMatcher(rules, {})
+
+    def test_predicate_rules_by_scope(self):
+        rules = dict(METADATA_RULES, function_rules=[
+            ("is_x", ["X"]), ("in_gen", ["GEN"]), ("is_x_again", ["X2"])])
+        matcher = MetadataMatcher(rules, {
+            "is_x": PredicateRule(
+                "is_x", None, re.compile(r"^x$"), BASENAME_SCOPE),
+            "in_gen": PredicateRule(
+                "in_gen", None, re.compile(r"^gen/"), PATH_SCOPE),
+            "is_x_again": PredicateRule(
+                "is_x_again", None, re.compile(r"^x$"), BASENAME_SCOPE),
+        })
+        # Every rule a file satisfies applies, in table order.
+        assert matcher.match(PathInfo("x")) == ["X", "X2"]
+        assert matcher.match(PathInfo("Gen/X")) == ["X", "GEN", "X2"]
+        assert matcher.match(PathInfo("src/gen/x.py")) == []
+
+    def test_registered_predicates_agree_with_their_patterns(self):
+        names = [
+            "requirements.txt", "requirements-dev.in", "gemfile",
+            "gemfile.lock", "rails_7.gemfile", "dockerfile",
+            "dockerfile.dev", "api.dockerfile", "compose.yaml",
+            "docker-compose.override.yml", "tsconfig.json",
+            "tsconfig.build.json", "readme.md", "composer.yml",
+        ]
+        for rule in PREDICATE_RULES.values():
+            assert rule.scope == BASENAME_SCOPE
+            for name in names:
+                assert rule.function(name) == bool(rule.pattern.match(name))
+
+    def test_every_function_rule_is_registered(self):
+        for name, _tags in METADATA_RULES["function_rules"]:
+            assert name in PREDICATE_RULES
+
+    def test_predicate_rule_rejects_flags(self):
+        with pytest.raises(ValueError):
+            predicate_rule(re.compile("^x$", re.IGNORECASE))
+
+    @pytest.mark.parametrize("path, expected", [
+        ("pyproject.toml", ["build", "dependencies", "Python"]),
+        (".github/workflows/ci.yml",
+         ["workflow", "pipeline", "GitHub", "Git"]),
+        (".github/dependabot.yml",
+         ["Dependabot", "GitHub", "dependencies", "security", "GitHub",
+          "Git"]),
+        ("requirements-dev.txt", ["pip", "Python", "PyPi", "dependencies"]),
+        ("App.csproj", [".NET", "C#", "build", "dependencies"]),
+        # Extension rules are case-sensitive, path fragments too.
+        ("IMAGE.JPG", []),
+        (".GITHUB/x.yml", []),
+        ("src/app.py", []),
+    ])
+    def test_filename_metatypes_unchanged(self, path, expected):
+        assert get_filename_metatypes(path) == expected
+
+
+class TestQuietFilter:
+    """QuietFilter rules out names no rule can match, and only those."""
+
+    @pytest.fixture
+    def quiet_filter(self):
+        return QuietFilter(
+            extensions=[".JAR"], basenames=["Cargo.lock"], stems=["license"],
+            suffixes=[".min.js"],
+            fragments=["/vendor/", ".github/workflows", ".github", "x/mcp.json"],
+            predicates=[
+                PredicateRule("is_x", None, re.compile(r"^x\d$"),
+                              BASENAME_SCOPE),
+                PredicateRule("in_gen", None, re.compile(r"^gen/"), PATH_SCOPE),
+            ])
+
+    @pytest.mark.parametrize("path", [
+        "lib.jar", "cargo.lock", "LICENSE.txt", "app.min.js", "workflows",
+        "mcp.json", "my.github.io", "x1", "gen/app.py",
+    ])
+    def test_names_a_rule_can_match(self, quiet_filter, path):
+        assert not quiet_filter.is_quiet(PathInfo(path))
+
+    @pytest.mark.parametrize("path", [
+        "app.py", "vendor", "x12", "github", "src/gen/app.py", "min.js.map",
+    ])
+    def test_quiet_names(self, quiet_filter, path):
+        assert quiet_filter.is_quiet(PathInfo(path))
+
+    def test_empty_tables(self):
+        quiet_filter = QuietFilter([], [], [], [], [], [])
+        assert quiet_filter.is_quiet(PathInfo("anything.at.all"))
@@ -0,0 +1,143 @@
+"""
+Tests for Vim/Emacs modeline detection.
+
+Covers: get_modeline_language() on head/tail buffers, read_head_tail()'s
+bounded reads, check_modeline(), and where modelines sit in get_language()'s
+precedence (after the extension lookup, before the shebang).
+"""
+
+import pytest
+
+from panopticas import (
+    check_modeline,
+    get_filetypes,
+    get_language,
+    get_modeline_language,
+    read_head_tail,
+)
+from panopticas.constants import MODELINE_FILETYPES
+from panopticas.core import CONTENT_HEAD_BYTES, CONTENT_TAIL_BYTES
+
+
+class TestGetModelineLanguage:
+    """get_modeline_language() — parsing modelines out of byte buffers."""
+
+    @pytest.mark.parametrize("head, expected", [
+        (b"// vim: ft=groovy\n", "Groovy"),
+        (b"# vim: set filetype=sh :\n", "Shell"),
+        (b"/* vi: syntax=python */\n", "Python"),
+        (b"# -*- mode: python -*-\n", "Python"),
+        (b"# -*- ruby -*-\n", "Ruby"),
+        (b"# -*- mode: sh; coding: utf-8 -*-\n", "Shell"),
+        (b"; -*- Mode: Makefile -*-\n", "Makefile"),
+        (b"# -*- mode: js2-mode -*-\n", "JavaScript"),
+    ])
+    def test_head_modelines(self, head, expected):
+        assert get_modeline_language(head) == expected
+
+    def test_emacs_line_after_shebang(self):
+        head = b"#!/bin/sh\n# -*- mode: python -*-\n"
+        assert get_modeline_language(head) == "Python"
+
+    def test_vim_modeline_in_tail(self):
+        tail = b"...\nlast line\n# vim: ft=yaml\n"
+        assert get_modeline_language(b"first line\n", tail) == "YAML"
+
+    def test_emacs_local_variables_in_tail(self):
+        tail = b"code\n# Local Variables:\n# mode: perl\n# End:\n"
+        assert get_modeline_language(b"code\n", tail) == "Perl"
+
+    def test_emacs_local_variables_end_at_end_line(self):
+        tail = b"# Local Variables:\n# fill-column: 72\n# End:\n# mode: perl\n"
+        assert get_modeline_language(b"code\n", tail) is None
+
+    def test_coding_only_emacs_line_is_ignored(self):
+        assert get_modeline_language(b"# -*- coding: utf-8 -*-\n") is None
+
+    def test_unmapped_filetype_is_ignored(self):
+        assert get_modeline_language(b"# vim: ft=brainfuck\n") is None
+
+    def test_vim_modeline_beyond_fifth_line_is_ignored(self):
+        head = b"\n".join([b"line"] * 6 + [b"# vim: ft=python"] + [b"x"] * 6)
+        assert get_modeline_language(head) is None
+
+    def test_no_modeline(self):
+        assert get_modeline_language(b"just text\n") is None
+
+    def test_empty(self):
+        assert get_modeline_language(b"", b"") is None
+
+
+class TestReadHeadTail:
+    """read_head_tail() — one bounded read at each end."""
+
+    def test_small_file_has_no_tail(self, tmp_path):
+        path = tmp_path / "small"
+        path.write_bytes(b"hello\n")
+        assert read_head_tail(path) == (b"hello\n", b"")
+
+    def test_large_file_reads_only_the_ends(self, tmp_path):
+        path = tmp_path / "large"
+        body = b"x" * (CONTENT_HEAD_BYTES * 10)
+        path.write_bytes(b"START" + body + b"END")
+        head, tail = read_head_tail(path)
+        assert len(head) == CONTENT_HEAD_BYTES
+        assert len(tail) == CONTENT_TAIL_BYTES
+        assert head.startswith(b"START")
+        assert tail.endswith(b"END")
+
+    def test_missing_file(self):
+        assert read_head_tail("/nonexistent/file") == (b"", b"")
+
+
+class TestCheckModeline:
+    """check_modeline() and its place in get_language()."""
+
+    def test_extensionless_script(self, tmp_path):
+        path = tmp_path / "Jenkinsfile.inc"
+        path.write_text("// vim: ft=groovy\npipeline {}\n")
+        assert check_modeline(path) == "Groovy"
+        assert get_language(str(path)) == "Groovy"
+
+    def test_modeline_at_end_of_large_file(self, tmp_path):
+        path = tmp_path / "build.inc"
+        path.write_text("x = 1\n" * 100_000 + "# vim: ft=python\n")
+        assert get_language(str(path)) == "Python"
+
+    def test_modeline_in_the_body_is_not_read(self, tmp_path):
+        # Only the ends of the file are read — a modeline in the middle of a
+        # large file is never seen.
+        path = tmp_path / "build.inc"
+        path.write_text(
+            "x\n" * 50_000 + "# vim: ft=python\n" + "x\n" * 50_000)
+        assert get_language(str(path)) == "Unknown"
+
+    def test_extension_wins_over_modeline(self, tmp_path):
+        path = tmp_path / "script.rb"
+        path.write_text("# vim: ft=python\n")
+        assert get_language(str(path)) == "Ruby"
+
+    def test_modeline_wins_over_shebang(self, tmp_path):
+        path = tmp_path / "tool"
+        path.write_text("#!/bin/sh\n# -*- mode: python -*-\n")
+        assert get_language(str(path)) == "Python"
+
+    def test_shebang_still_detected_without_modeline(self, tmp_path):
+        path = tmp_path / "tool"
+        path.write_text("#!/usr/bin/env python3\nprint(1)\n")
+        assert get_language(str(path)) == "Python"
+
+    def test_skip_shebang_skips_modeline(self, tmp_path):
+        path = tmp_path / "tool"
+        path.write_text("# vim: ft=python\n")
+        assert get_language(str(path), skip_shebang=True) == "Unknown"
+
+
+class TestModelineFiletypes:
+    """MODELINE_FILETYPES must stay inside the file type vocabulary."""
+
+    def test_values_are_known_filetypes(self):
+        assert set(MODELINE_FILETYPES.values()) <= set(get_filetypes())
+
+    def test_keys_are_lowercase(self):
+        assert all(key == key.lower() for key in MODELINE_FILETYPES)
@@ -5,7 +5,9 @@ Covers: file extension detection, language identification, metadata extraction,
 shebang parsing, URL extraction, pip requirements matching, and file counting.
 """
 
+import codecs
 import os
+import random
 import tempfile
 
 import pytest
@@ -21,11 +23,19 @@ from panopticas import (
     extract_urls,
     extract_urls_from_file,
     is_pip_requirements,
+    is_gemfile,
+    is_dockerfile_variant,
+    is_docker_compose,
+    is_tsconfig,
     count_lines,
+    estimate_lines,
+    is_binary,
+    is_binary_content,
     identify_files,
     identify_files_with_metrics,
     find_files,
 )
+from panopticas import core
 from panopticas.constants import EXT_FILETYPES, METADATA_RULES
 
 # Path to test fixture files
@@ -491,6 +501,63 @@ class TestIsPipRequirements:
         assert is_pip_requirements("requirements.py") is False
 
 
+class TestPredicateRules:
+    """The other function_rules predicates and the tags they add."""
+
+    @pytest.mark.parametrize("name", [
+        "gemfile", "gemfile.lock", "gems.rb", "gems.locked",
+        "rails_7.gemfile", "rails_7.gemfile.lock"])
+    def test_is_gemfile(self, name):
+        assert is_gemfile(name) is True
+
+    @pytest.mark.parametrize("name", ["gemfile.rb", "mygemfile", "gems.txt"])
+    def test_not_gemfile(self, name):
+        assert is_gemfile(name) is False
+
+    @pytest.mark.parametrize("name", [
+        "dockerfile.dev", "dockerfile-alpine", "api.dockerfile"])
+    def test_is_dockerfile_variant(self, name):
+        assert is_dockerfile_variant(name) is True
+
+    @pytest.mark.parametrize("name", ["dockerfile", "dockerfile.", "mydockerfile"])
+    def test_not_dockerfile_variant(self, name):
+        assert is_dockerfile_variant(name) is False
+
+    @pytest.mark.parametrize("name", [
+        "compose.yaml", "compose.yml", "docker-compose.yml",
+        "docker-compose.override.yml", "docker-compose.prod.yaml"])
+    def test_is_docker_compose(self, name):
+        assert is_docker_compose(name) is True
+
+    @pytest.mark.parametrize("name", [
+        "composer.yml", "composer.json", "docker-compose.json"])
+    def test_not_docker_compose(self, name):
+        assert is_docker_compose(name) is False
+
+    @pytest.mark.parametrize("name", [
+        "tsconfig.json", "tsconfig.build.json", "tsconfig-base.json"])
+    def test_is_tsconfig(self, name):
+        assert is_tsconfig(name) is True
+
+    @pytest.mark.parametrize("name", ["tsconfig.js", "jsconfig.json"])
+    def test_not_tsconfig(self, name):
+        assert is_tsconfig(name) is False
+
+    def test_tags(self):
+        assert get_filename_metatypes("Gemfile") == [
+            "Ruby", "bundler", "dependencies"]
+        assert get_filename_metatypes("Dockerfile.dev") == [
+            "IaC", "Docker", "dependencies"]
+        assert get_filename_metatypes("deploy/docker-compose.yml") == [
+            "IaC", "Docker", "config"]
+        assert get_filename_metatypes("tsconfig.build.json") == [
+            "TypeScript", "build", "config"]
+
+    def test_plain_dockerfile_is_tagged_once(self):
+        assert get_filename_metatypes("Dockerfile") == [
+            "IaC", "Docker", "dependencies"]
+
+
 class TestExtractUrls:
     """Tests for extract_urls() — finding URLs in text."""
 
@@ -537,6 +604,55 @@ class TestExtractUrlsFromFile:
             os.unlink(path)
 
 
+class TestStreamingUrls:
+    """extract_urls_from_file() in chunks must match extract_urls() on it whole."""
+
+    PIECES = ["https://", "http://", "a.com/", "x", " ", "\n", "\r\n", '"', "'",
+              ")", "\u00a0", "\u2028", "\x85", "\x1c", "\u00e9", "\u5b8c",
+              "?q=1"]
+
+    @staticmethod
+    def whole(path, encoding):
+        with open(path, encoding=encoding) as f:
+            return core.URL_PATTERN.findall(f.read())
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 8, 13, 64])
+    def test_matches_whole_file(self, tmp_path, monkeypatch, chunk_size):
+        monkeypatch.setattr(core, "URL_SCAN_CHUNK_BYTES", chunk_size)
+        rng = random.Random(chunk_size)
+        path = tmp_path / "sample.txt"
+        for _ in range(200):
+            text = "".join(rng.choices(
+                self.PIECES, weights=[6, 3, 4, 8, 2, 2, 1, 1, 1, 1, 1, 1, 1,
+                                      1, 2, 2, 2],
+                k=rng.randrange(60)))
+            for encoding in ("utf-8", "utf-16"):
+                path.write_bytes(text.encode(encoding))
+                urls, detected = core.extract_urls_and_encoding(path)
+                if detected is None:
+                    continue
+                assert urls == self.whole(path, detected), text
+
+    @pytest.mark.parametrize("chunk_size", [2, 7, 4096])
+    def test_legacy_body_decodes_matches_as_latin1(self, tmp_path, monkeypatch,
+                                                   chunk_size):
+        monkeypatch.setattr(core, "URL_SCAN_CHUNK_BYTES", chunk_size)
+        path = tmp_path / "notes.txt"
+        path.write_bytes("https://example.com/caf\u00e9 ok\n".encode()
+                         + b"https://example.com/\xe9\xa0https://b.example\n")
+        assert core.extract_urls_and_encoding(path) == (
+            ["https://example.com/caf\u00c3\u00a9",
+             "https://example.com/\u00e9", "https://b.example"],
+            "latin-1")
+
+    def test_url_longer_than_a_chunk(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(core, "URL_SCAN_CHUNK_BYTES", 16)
+        url = "https://example.com/" + "a" * 200
+        path = tmp_path / "long.txt"
+        path.write_text(f"see {url} and https://b.example")
+        assert extract_urls_from_file(path) == [url, "https://b.example"]
+
+
 class TestCountLines:
     """Tests for count_lines() — counting lines in files."""
 
@@ -563,6 +679,244 @@ class TestCountLines:
             result = count_lines(gif_path)
             assert result == "N/A" or isinstance(result, int)
 
+    @staticmethod
+    def text_mode_count(path):
+        """
+        The count count_lines() must agree with: text iteration as UTF-8,
+        or as Latin-1 when that fails.
+        """
+        with open(path, 'rb') as f:
+            if b"\x00" in f.read(8000):
+                return "N/A"
+        try:
+            with open(path, encoding='utf-8') as f:
+                return sum(1 for _ in f)
+        except UnicodeDecodeError:
+            with open(path, encoding='latin-1') as f:
+                return sum(1 for _ in f)
+
+    @pytest.mark.parametrize("content, expected", [
+        (b"a\nb\nc", 3),
+        (b"a\r\nb\r\n", 2),
+        (b"a\rb\rc\r", 3),
+        (b"a\r\r\nb", 3),
+        (b"\n\n\n", 3),
+        ("café\nnaïve\n".encode(), 2),
+        (b"ok\n" * 1000 + b"\xff\n", 1001),
+        (b"x" * 9000 + b"\x00\n", 1),
+    ])
+    def test_line_endings_and_encoding(self, tmp_path, content, expected):
+        path = tmp_path / "sample.txt"
+        path.write_bytes(content)
+        assert count_lines(path) == expected == self.text_mode_count(path)
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5])
+    def test_chunk_boundaries(self, tmp_path, monkeypatch, chunk_size):
+        # "\r\n" pairs, multi-byte characters and the binary sniff window
+        # all split across reads.
+        monkeypatch.setattr(core, "LINE_COUNT_CHUNK_BYTES", chunk_size)
+        rng = random.Random(chunk_size)
+        pieces = [b"a", b"\n", b"\r", b"\r\n", "é".encode(), "€".encode(),
+                  b"\xff", b"\x00"]
+        path = tmp_path / "sample.txt"
+        for _ in range(300):
+            path.write_bytes(b"".join(rng.choices(
+                pieces, weights=[8, 3, 2, 2, 2, 2, 0.1, 0.1],
+                k=rng.randrange(30))))
+            assert count_lines(path) == self.text_mode_count(path), \
+                path.read_bytes()
+
+
+class TestEncodings:
+    """detect_encoding() and the encoding-aware count and URL extraction."""
+
+    @pytest.mark.parametrize("text", ["a\nb\r\nc\rd", "caf\u00e9\nna\u00efve snow\n",
+                                      "x\n" * 5000, ""])
+    @pytest.mark.parametrize("encoding", [
+        "utf-16", "utf-16-le", "utf-16-be", "utf-32", "utf-8-sig",
+        "latin-1"])
+    def test_counts_match_text_mode(self, tmp_path, text, encoding):
+        path = tmp_path / "sample.txt"
+        path.write_bytes(text.encode(encoding))
+        with open(path, encoding=encoding, newline=None) as f:
+            expected = sum(1 for _ in f)
+        assert count_lines(path) == expected
+
+    @pytest.mark.parametrize("content, encoding", [
+        (b"\xef\xbb\xbfx = 1\n", "utf-8-sig"),
+        (codecs.BOM_UTF16_LE + "x".encode("utf-16-le"), "utf-16-le"),
+        (codecs.BOM_UTF16_BE + "x".encode("utf-16-be"), "utf-16-be"),
+        (codecs.BOM_UTF32_LE + "x".encode("utf-32-le"), "utf-32-le"),
+        ("Write-Host 'hi'\r\n".encode("utf-16-le"), "utf-16-le"),
+        ("Write-Host 'hi'\r\n".encode("utf-16-be"), "utf-16-be"),
+        ("plain ascii\n".encode(), "utf-8"),
+        ("caf\u00e9\n".encode(), "utf-8"),
+        ("caf\u00e9\n".encode("latin-1"), "latin-1"),
+        # A multi-byte character cut off by the end of the head.
+        ("\u2603".encode()[:2], "utf-8"),
+        (b"GIF89a\x00\x01\x02", None),
+        (b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x01\x00", None),
+    ])
+    def test_detect_encoding(self, content, encoding):
+        assert core.detect_encoding(content) == encoding
+
+    def test_reported_with_count(self, tmp_path):
+        path = tmp_path / "Build.java"
+        path.write_bytes("// Gr\u00fc\u00dfe\nclass Build {}\n".encode("cp1252"))
+        assert core.count_lines_and_encoding(path) == (2, "latin-1")
+        path.write_bytes("Get-Item\r\n".encode("utf-16"))
+        assert core.count_lines_and_encoding(path) == (1, "utf-16-le")
+        assert core.count_lines_and_encoding(tmp_path / "missing") == (
+            "N/A", None)
+
+    def test_utf8_head_with_legacy_body(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(core, "LINE_COUNT_CHUNK_BYTES", 4096)
+        path = tmp_path / "notes.txt"
+        path.write_bytes(b"ok\n" * 5000 + b"caf\xe9 https://example.com/\xe9\n")
+        assert core.count_lines_and_encoding(path) == (5001, "latin-1")
+        assert core.extract_urls_and_encoding(path) == (
+            ["https://example.com/\u00e9"], "latin-1")
+
+    def test_urls_from_utf16(self, tmp_path):
+        path = tmp_path / "setup.ps1"
+        path.write_bytes(
+            "# See https://example.com/docs\r\n".encode("utf-16"))
+        assert core.extract_urls_and_encoding(path) == (
+            ["https://example.com/docs"], "utf-16-le")
+
+    def test_byte_order_mark_alone_is_no_line(self, tmp_path):
+        # 0.0.19 counted a UTF-8 byte order mark on its own as one line.
+        path = tmp_path / "empty.txt"
+        for mark, codec, encoding in (
+                (codecs.BOM_UTF8, "utf-8", "utf-8-sig"),
+                (codecs.BOM_UTF16_LE, "utf-16-le", "utf-16-le")):
+            path.write_bytes(mark)
+            assert core.count_lines_and_encoding(path) == (0, encoding)
+            path.write_bytes(mark + "x".encode(codec))
+            assert count_lines(path) == 1
+
+    def test_truncated_utf16_is_not_applicable(self, tmp_path):
+        path = tmp_path / "broken.txt"
+        path.write_bytes(codecs.BOM_UTF16_LE + b"a\x00b")
+        assert count_lines(path) == "N/A"
+        with pytest.raises(UnicodeDecodeError):
+            extract_urls_from_file(path)
+
+    def test_estimate_utf16(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(core, "LINE_ESTIMATE_SAMPLES", 4)
+        monkeypatch.setattr(core, "LINE_ESTIMATE_BLOCK_BYTES", 1024)
+        path = tmp_path / "dump.csv"
+        path.write_bytes(("a,b,c\r\n" * 5000).encode("utf-16"))
+        assert estimate_lines(path) == count_lines(path) == 5000
+
+
+class TestIsBinary:
+    """Tests for is_binary() — git's NUL-in-the-first-8000-bytes test."""
+
+    def test_nul_in_head(self):
+        assert is_binary_content(b"GIF89a\x00\x01")
+
+    def test_text(self):
+        assert not is_binary_content("plain text — with UTF-8\n".encode())
+
+    def test_nul_beyond_sniff_window_is_not_seen(self):
+        assert not is_binary_content(b"x" * 8000 + b"\x00")
+
+    def test_file(self, tmp_path):
+        binary = tmp_path / "blob.bin"
+        binary.write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00")
+        text = tmp_path / "notes.txt"
+        text.write_text("hello\n")
+        assert is_binary(binary)
+        assert not is_binary(text)
+
+    def test_missing_file(self):
+        assert not is_binary("/nonexistent/file.bin")
+
+    def test_count_lines_rejects_binary_without_decoding(self, tmp_path):
+        # NUL is valid UTF-8, so decoding alone would count this file's lines.
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"\x00" + b"valid text\n" * 100_000)
+        assert count_lines(path) == "N/A"
+
+    def test_extract_urls_rejects_binary_without_decoding(self, tmp_path):
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"\x00https://example.com\n")
+        with pytest.raises(UnicodeDecodeError) as excinfo:
+            extract_urls_from_file(path)
+        assert "binary file" in str(excinfo.value)
+
+
+class TestEstimateLines:
+    """Tests for estimate_lines() and the scans' size limit."""
+
+    @pytest.fixture
+    def small_sample(self, monkeypatch):
+        # 4 blocks of 1 KB, so a file of a few KB is "huge".
+        monkeypatch.setattr(core, "LINE_ESTIMATE_SAMPLES", 4)
+        monkeypatch.setattr(core, "LINE_ESTIMATE_BLOCK_BYTES", 1024)
+
+    def test_uniform_lines_are_exact(self, tmp_path, small_sample):
+        path = tmp_path / "dump.csv"
+        path.write_bytes(b"a,b,c,d,e,f,g\n" * 10_000)
+        assert estimate_lines(path) == count_lines(path) == 10_000
+
+    def test_estimate_is_close(self, tmp_path, small_sample):
+        rng = random.Random(41)
+        path = tmp_path / "dump.sql"
+        path.write_bytes(b"".join(
+            b"x" * rng.randint(10, 90) + b"\r\n" for _ in range(20_000)))
+        exact = count_lines(path)
+        assert abs(estimate_lines(path) - exact) < exact * 0.1
+
+    def test_unterminated_last_line(self, tmp_path, small_sample):
+        path = tmp_path / "dump.csv"
+        path.write_bytes(b"0123456789\n" * 1000 + b"tail")
+        assert estimate_lines(path) == count_lines(path) == 1001
+
+    def test_small_file_is_counted(self, tmp_path):
+        path = tmp_path / "small.txt"
+        path.write_text("one\ntwo\n")
+        assert estimate_lines(path) == 2
+
+    def test_not_applicable(self, tmp_path, small_sample):
+        binary = tmp_path / "data.bin"
+        binary.write_bytes(b"\x00" + b"text\n" * 5000)
+        for path in (binary, tmp_path / "missing.txt"):
+            assert estimate_lines(path) == "N/A"
+
+    def test_legacy_encoding(self, tmp_path, small_sample):
+        path = tmp_path / "latin.txt"
+        path.write_bytes(b"caf\xe9\n" * 5000)
+        assert estimate_lines(path) == 5000
+
+    def test_utf8_split_across_blocks(self, tmp_path, small_sample):
+        path = tmp_path / "utf8.txt"
+        path.write_text("caf\u00e9 \u2603\n" * 5000, encoding="utf-8")
+        assert estimate_lines(path) == 5000
+
+    def test_scan_limit(self, tmp_path, small_sample):
+        (tmp_path / "big.csv").write_bytes(b"a,b\n" * 5000)
+        (tmp_path / "small.csv").write_bytes(b"a,b\n" * 10)
+        skipped = {r["path"]: r for r in core.assess_directory(
+            tmp_path, lines=True, lines_max_bytes=1000)}
+        assert skipped["big.csv"]["lines"] is None
+        assert skipped["small.csv"]["lines"] == 10
+        estimated = {r["path"]: r for r in core.assess_directory(
+            tmp_path, lines=True, lines_max_bytes=1000, lines_estimate=True)}
+        assert estimated["big.csv"] == {
+            "path": "big.csv", "language": "CSV", "meta": [],
+            "lines": 5000, "encoding": "utf-8", "estimated": True}
+        assert "estimated" not in estimated["small.csv"]
+
+    def test_estimate_default_threshold(self, tmp_path, small_sample,
+                                        monkeypatch):
+        monkeypatch.setattr(core, "LINE_ESTIMATE_THRESHOLD_BYTES", 8192)
+        (tmp_path / "big.csv").write_bytes(b"a,b\n" * 5000)
+        (record,) = core.scan_directory(
+            tmp_path, lines=True, lines_estimate=True)
+        assert (record.lines, record.estimated) == (5000, True)
+
 
 class TestFixtureFiles:
     """Tests using the fixture files in src/tests/."""
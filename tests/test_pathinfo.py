@@ -0,0 +1,194 @@
+"""
+Tests for PathInfo, the parse-once path record shared by the detectors.
+
+Every detector must give the same answer for a PathInfo as for the plain
+string it wraps — the string API is a thin wrapper, not a second code path —
+and the same again when a scan supplies the directory's DirectoryRules.
+"""
+
+import os
+
+import pytest
+
+from panopticas import (
+    PathInfo,
+    assess_directory,
+    find_ai_files,
+    get_ai_metadata,
+    get_fileext,
+    get_filename_metatypes,
+    get_generated_metatypes,
+    get_language,
+    get_language_edge_cases,
+    path_info,
+)
+from panopticas.constants import AI_RULES, GENERATED_RULES, METADATA_RULES
+from panopticas.core import DirectoryRules
+
+SAMPLE_PATHS = [
+    "app.py",
+    "src/main/App.java",
+    "archive.tar.gz",
+    ".gitignore",
+    "..hidden",
+    "Makefile",
+    "LICENSE.txt",
+    "setup.cfg",
+    "requirements-dev.txt",
+    ".github/workflows/ci.yml",
+    ".github/copilot-instructions.md",
+    ".claude/skills/review/SKILL.md",
+    "docs/CLAUDE.md",
+    "vendor/jquery/jquery.min.js",
+    "api/service_pb2.py",
+    "web/yarn.lock",
+    "Sample.PDF",
+    "file.",
+    ".claude/",
+    "",
+]
+
+
+class TestPathInfoFields:
+    """The precomputed parts agree with the os.path functions they replace."""
+
+    @pytest.mark.parametrize("path", SAMPLE_PATHS)
+    def test_fields(self, path):
+        info = PathInfo(path)
+        basename = os.path.basename(path)
+        assert info.path == path
+        assert info.full_path == path
+        assert info.basename == basename
+        assert info.lower_basename == basename.lower()
+        assert info.ext == get_fileext(path)
+        assert info.lower_ext == get_fileext(path).lower()
+        assert info.lower_stem == os.path.splitext(basename.lower())[0]
+        assert info.norm_path == path.replace(os.sep, "/").lower()
+
+    def test_parent(self):
+        assert PathInfo("src/App/Main.java").parent == "src/app"
+        assert PathInfo("top.py").parent == ""
+
+    def test_full_path_is_separate(self):
+        info = PathInfo("src/app.py", "/repo/src/app.py")
+        assert info.path == "src/app.py"
+        assert info.full_path == "/repo/src/app.py"
+
+    def test_accepts_path_like(self, tmp_path):
+        assert PathInfo(tmp_path / "x.py").ext == ".py"
+
+    def test_has_slots(self):
+        with pytest.raises(AttributeError):
+            PathInfo("x.py").unexpected = 1
+
+    def test_path_info_passes_through(self):
+        info = PathInfo("x.py")
+        assert path_info(info) is info
+        assert isinstance(path_info("x.py"), PathInfo)
+
+
+class TestDetectorsAcceptPathInfo:
+    """Each detector answers identically for a string and its PathInfo."""
+
+    @pytest.mark.parametrize("path", SAMPLE_PATHS)
+    def test_same_answers(self, path):
+        info = PathInfo(path)
+        assert get_fileext(info) == get_fileext(path)
+        assert get_language_edge_cases(info) == get_language_edge_cases(path)
+        assert get_language(info, skip_shebang=True) == \
+            get_language(path, skip_shebang=True)
+        assert get_filename_metatypes(info) == get_filename_metatypes(path)
+        assert get_generated_metatypes(info) == get_generated_metatypes(path)
+        assert get_ai_metadata(info) == get_ai_metadata(path)
+
+    def test_content_checks_open_full_path(self, tmp_path):
+        script = tmp_path / "tool"
+        script.write_text("#!/usr/bin/env python3\n")
+        info = PathInfo("tool", str(script))
+        assert get_language(info) == "Python"
+
+
+class TestDirectoryRules:
+    """A scan's per-directory rule state gives the same tags as whole paths."""
+
+    DIRECTORIES = [
+        [], [".github"], [".github", "workflows"], [".GitHub", "Workflows"],
+        ["docs", ".github"], [".githubx"], [".claude"],
+        [".claude", "skills", "review"], ["src", ".cursor", "rules"],
+        ["vendor", "lib"], ["pkg", "third_party", "vendor"], ["myvendor"],
+        [".buildkite"], ["x.github"], [".roo", "rules"],
+    ]
+    NAMES = [
+        "ci.yml", "CLAUDE.md", "SKILL.md", "style.mdc", "app.py",
+        "jquery.min.js", "workflows", "mcp.json", "x.prompt.md",
+    ]
+
+    def rules_for(self, parts):
+        dir_rules = DirectoryRules.root()
+        for part in parts:
+            dir_rules = dir_rules.enter(part)
+        return dir_rules
+
+    @pytest.mark.parametrize("parts", DIRECTORIES)
+    def test_same_tags_as_whole_path(self, parts):
+        dir_rules = self.rules_for(parts)
+        for name in self.NAMES:
+            path = os.path.join(*parts, name)
+            info = PathInfo(path, dir_rules=dir_rules)
+            assert get_filename_metatypes(info) == \
+                get_filename_metatypes(path), path
+            assert get_ai_metadata(info) == get_ai_metadata(path), path
+            assert get_generated_metatypes(info) == \
+                get_generated_metatypes(path), path
+
+    def test_quiet(self):
+        assert self.rules_for([]).quiet
+        assert self.rules_for(["src", "app"]).quiet
+        assert self.rules_for(["x.github"]).quiet is False
+        for parts in ([".github"], [".claude"], ["vendor", "lib"]):
+            assert not self.rules_for(parts).quiet
+
+    def test_every_rule_key_in_a_quiet_directory(self):
+        # Each rule key used as a file name — and with a prefix, a suffix and
+        # uppercased — must get the full answer, not the quiet one.
+        keys = {"license", "LICENSE.md", "requirements-dev.txt",
+                "api.dockerfile", "docker-compose.prod.yml", "gems.rb"}
+        for table in (METADATA_RULES, GENERATED_RULES, AI_RULES):
+            for mode, rules in table.items():
+                if mode != "function_rules":
+                    keys.update(rules)
+        dir_rules = self.rules_for(["src", "app"])
+        assert dir_rules.quiet
+        for key in sorted(keys):
+            for name in {key, "x" + key, key + "x", key.upper()}:
+                name = name.strip("/").rpartition("/")[2]
+                if not name:
+                    continue
+                path = os.path.join("src", "app", name)
+                info = PathInfo(path, dir_rules=dir_rules)
+                assert get_filename_metatypes(info) == \
+                    get_filename_metatypes(path), path
+                assert get_ai_metadata(info) == get_ai_metadata(path), path
+
+    def test_norm_dir(self):
+        assert self.rules_for([]).norm_dir == "/"
+        assert self.rules_for(["Src", "App"]).norm_dir == "/src/app/"
+
+    def test_directory_scan_matches_string_api(self, tmp_path):
+        for parts in self.DIRECTORIES:
+            tmp_path.joinpath(*parts).mkdir(parents=True, exist_ok=True)
+        for parts in self.DIRECTORIES:
+            for name in self.NAMES:
+                path = tmp_path.joinpath(*parts, name)
+                if not path.is_dir():
+                    path.write_text("x\n")
+        records = assess_directory(str(tmp_path), path_only=True)
+        assert records
+        for record in records:
+            tags = get_filename_metatypes(record["path"])
+            assert record["meta"] == list(dict.fromkeys(tags))
+
+        found = find_ai_files(str(tmp_path))
+        for record in records:
+            expected = get_ai_metadata(record["path"])
+            assert found.get(record["path"]) == expected
@@ -0,0 +1,211 @@
+"""
+Tests for rule packs: TOML/JSON files merged into EXT_FILETYPES,
+METADATA_RULES and AI_RULES, the rule-pack cache, and the --rules /
+PANOPTICAS_RULES entry points.
+"""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import (
+    get_ai_metadata,
+    get_filename_metatypes,
+    get_filetypes,
+    get_language,
+    get_tags,
+    load_rule_packs,
+)
+from panopticas import rules
+from panopticas.cache import write_cache
+from panopticas.cli import cli
+from panopticas.constants import METADATA_RULES
+
+PACK = """
+[EXT_FILETYPES]
+".JSONNET" = "Jsonnet"
+
+[METADATA_RULES.exact_filename_rules]
+"Deploy.yaml" = ["deploy", "pipeline"]
+
+[METADATA_RULES.path_contains_rules]
+".acme-ci/" = ["pipeline", "Acme CI"]
+
+[AI_RULES.path_contains]
+".acme-assist/" = ["Acme Assist", "config"]
+"""
+
+
+@pytest.fixture(autouse=True)
+def isolated_rules(tmp_path, monkeypatch):
+    """Cache under tmp_path, and the built-in rules restored afterwards."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.delenv(rules.RULES_ENV_VAR, raising=False)
+    yield
+    load_rule_packs([])
+
+
+@pytest.fixture
+def pack(tmp_path):
+    path = tmp_path / "acme.toml"
+    path.write_text(PACK)
+    return path
+
+
+class TestLoadRulePacks:
+    """load_rule_packs() merges into the live tables."""
+
+    def test_merges_every_table(self, pack):
+        load_rule_packs([pack])
+        assert get_language("lib/config.jsonnet") == "Jsonnet"
+        assert get_filename_metatypes("deploy.yaml") == ["deploy", "pipeline"]
+        assert get_filename_metatypes(".acme-ci/build.yml") == [
+            "pipeline", "Acme CI"]
+        assert get_ai_metadata(".acme-assist/settings.json") == {
+            "product": "Acme Assist", "kind": "config"}
+
+    def test_vocabularies_reflect_the_pack(self, pack):
+        load_rule_packs([pack])
+        assert {"Acme CI", "Acme Assist", "deploy"} <= set(get_tags())
+        assert "Jsonnet" in get_filetypes()
+
+    def test_builtin_rules_still_apply(self, pack):
+        load_rule_packs([pack])
+        assert get_filename_metatypes(".github/workflows/ci.yml") == [
+            "workflow", "pipeline", "GitHub", "Git"]
+
+    def test_empty_list_restores_builtins(self, pack):
+        load_rule_packs([pack])
+        load_rule_packs([])
+        assert get_language("config.jsonnet") == "Unknown"
+        assert "Acme CI" not in get_tags()
+
+    def test_packs_replace_rather_than_accumulate(self, pack, tmp_path):
+        other = tmp_path / "other.toml"
+        other.write_text('[EXT_FILETYPES]\n".cue" = "CUE"\n')
+        load_rule_packs([pack])
+        load_rule_packs([other])
+        assert get_language("x.cue") == "CUE"
+        assert get_language("x.jsonnet") == "Unknown"
+
+    def test_later_pack_overrides_earlier_and_builtin(self, pack, tmp_path):
+        override = tmp_path / "override.json"
+        override.write_text(json.dumps({
+            "METADATA_RULES": {"exact_filename_rules": {
+                "deploy.yaml": ["release"], "makefile": ["make"]}}}))
+        load_rule_packs([pack, override])
+        assert get_filename_metatypes("deploy.yaml") == ["release"]
+        assert get_filename_metatypes("Makefile") == ["make"]
+
+    def test_defaults_to_environment(self, pack, monkeypatch):
+        monkeypatch.setenv(rules.RULES_ENV_VAR, str(pack))
+        load_rule_packs()
+        assert get_language("x.jsonnet") == "Jsonnet"
+
+    def test_environment_list(self, monkeypatch):
+        monkeypatch.setenv(rules.RULES_ENV_VAR, os.pathsep.join(["a", "", "b"]))
+        assert rules.environment_rule_packs() == ["a", "b"]
+
+
+class TestInvalidPacks:
+    """A bad pack raises ValueError naming the file and leaves nothing half-merged."""
+
+    @pytest.mark.parametrize("content, message", [
+        ("not = [valid", "not a valid rule pack"),
+        ("[UNKNOWN]\nx = 1\n", "unknown section"),
+        ('[METADATA_RULES]\nfunction_rules = []\n', "cannot extend"),
+        ('[EXT_FILETYPES]\njsonnet = "Jsonnet"\n', "maps an extension"),
+        ('[METADATA_RULES.exact_filename_rules]\n"x" = "tag"\n',
+         "list of tags"),
+        ('[AI_RULES.path_contains]\n".x/" = ["X"]\n', "[product, kind]"),
+        ('[AI_RULES.path_contains]\n".x/" = ["X", "directory"]\n',
+         "unknown kind"),
+    ])
+    def test_rejected(self, tmp_path, content, message):
+        path = tmp_path / "bad.toml"
+        path.write_text(content)
+        with pytest.raises(ValueError, match="bad.toml") as error:
+            load_rule_packs([path])
+        assert message in str(error.value)
+        assert "function_rules" in METADATA_RULES
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(ValueError, match="cannot read rule pack"):
+            load_rule_packs([tmp_path / "missing.toml"])
+
+
+class TestRuleCache:
+    """What the packs add is cached on disk by content."""
+
+    def cache_files(self, tmp_path):
+        directory = tmp_path / "cache" / "panopticas"
+        return sorted(directory.glob("rules-*.json"))
+
+    def test_cache_is_written(self, pack, tmp_path):
+        load_rule_packs([pack])
+        assert len(self.cache_files(tmp_path)) == 1
+
+    def test_cache_hit_skips_parsing(self, pack, monkeypatch):
+        load_rule_packs([pack])
+        load_rule_packs([])
+
+        def fail(*args):
+            raise AssertionError("pack was parsed again")
+        monkeypatch.setattr(rules, "_parse", fail)
+        load_rule_packs([pack])
+        assert get_language("x.jsonnet") == "Jsonnet"
+        assert get_ai_metadata(".acme-assist/x") == {
+            "product": "Acme Assist", "kind": "config"}
+
+    def test_changed_pack_gets_a_new_entry(self, pack, tmp_path):
+        load_rule_packs([pack])
+        pack.write_text(PACK.replace("Jsonnet", "Jsonnet Template"))
+        load_rule_packs([pack])
+        assert get_language("x.jsonnet") == "Jsonnet Template"
+        assert len(self.cache_files(tmp_path)) == 2
+
+    def test_corrupt_cache_is_rebuilt(self, pack, tmp_path):
+        load_rule_packs([pack])
+        for cache_file in self.cache_files(tmp_path):
+            cache_file.write_bytes(b"garbage")
+        load_rule_packs([])
+        load_rule_packs([pack])
+        assert get_language("x.jsonnet") == "Jsonnet"
+
+    def test_malformed_entry_is_a_miss(self, pack, tmp_path):
+        load_rule_packs([pack])
+        for cache_file in self.cache_files(tmp_path):
+            write_cache(str(cache_file), {"AI_RULES": {"path_contains": {
+                ".acme-assist/": ["Acme Assist", "no such kind"]}}})
+        load_rule_packs([pack])
+        assert get_ai_metadata(".acme-assist/x") == {
+            "product": "Acme Assist", "kind": "config"}
+
+    def test_cache_can_be_disabled(self, pack, tmp_path):
+        load_rule_packs([pack], cache=False)
+        assert self.cache_files(tmp_path) == []
+
+
+class TestRulesOption:
+    """--rules and PANOPTICAS_RULES on the command line."""
+
+    def test_tags_include_pack(self, pack):
+        result = CliRunner().invoke(cli, ["--rules", str(pack), "tags", "--json"])
+        assert result.exit_code == 0
+        assert "Acme CI" in json.loads(result.stdout)["tags"]
+
+    def test_filetypes_from_environment(self, pack):
+        result = CliRunner().invoke(
+            cli, ["filetypes", "--json"],
+            env={rules.RULES_ENV_VAR: str(pack)})
+        assert result.exit_code == 0
+        assert "Jsonnet" in json.loads(result.stdout)["filetypes"]
+
+    def test_bad_pack_is_an_error(self, tmp_path):
+        bad = tmp_path / "bad.toml"
+        bad.write_text("[UNKNOWN]\n")
+        result = CliRunner().invoke(cli, ["--rules", str(bad), "tags"])
+        assert result.exit_code != 0
+        assert "unknown section" in result.output
@@ -0,0 +1,170 @@
+"""Tests for ScanFilter and the --tag/--language/--product/--kind options."""
+
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import core
+from panopticas.cli import cli
+from panopticas.core import (
+    ScanFilter, assess_directory, extract_urls_from_directory, find_ai_files,
+    scan_directory)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for directory in (".github/workflows", ".claude/commands", "src", "bin"):
+        (tmp_path / directory).mkdir(parents=True)
+    files = {
+        ".github/workflows/ci.yml": "on: push\nrun: https://ci.example.com\n",
+        ".claude/commands/build.md": "Build it\n",
+        "CLAUDE.md": "Be careful\n",
+        "requirements.txt": "requests\n",
+        "src/app.py": "print('https://app.example.com')\n",
+        "bin/tool": "#!/bin/bash\necho\n",
+        "notes": "nothing to see\n",
+    }
+    for path, content in files.items():
+        (tmp_path / path).write_text(content)
+    return tmp_path
+
+
+def paths(records):
+    return sorted(record["path"].replace(os.sep, "/") for record in records)
+
+
+class TestScanFilter:
+    """Name resolution and the individual tests."""
+
+    def test_empty_filter_is_false(self):
+        assert not ScanFilter()
+        assert ScanFilter(languages=["Python"])
+
+    def test_names_are_case_insensitive(self):
+        selection = ScanFilter(tags=["github", "PIPELINE"], products=["claude"],
+                               kinds=["Instructions"])
+        assert selection.tags == {"GitHub", "pipeline"}
+        assert selection.products == {"Claude"}
+        assert selection.kinds == {"instructions"}
+        assert ScanFilter(languages=["PYTHON"]).wants_language("Python")
+
+    @pytest.mark.parametrize("argument", ["tags", "products", "kinds"])
+    def test_unknown_names_raise(self, argument):
+        with pytest.raises(ValueError, match="unknown"):
+            ScanFilter(**{argument: ["no-such-thing"]})
+
+    def test_any_language_is_accepted(self):
+        assert ScanFilter(languages=["bash"]).wants_language("bash")
+
+    def test_options_combine(self):
+        selection = ScanFilter(products=["Claude"], kinds=["command"])
+        assert selection.wants_ai({"product": "Claude", "kind": "command"})
+        assert not selection.wants_ai(
+            {"product": "Claude", "kind": "instructions"})
+        assert not selection.wants_ai(None)
+        assert ScanFilter(tags=["pip"]).wants_ai(None)
+
+
+class TestFilteredScans:
+    """The core scans honour a ScanFilter."""
+
+    def test_tag(self, tree):
+        records = assess_directory(
+            str(tree), scan_filter=ScanFilter(tags=["workflow"]))
+        assert paths(records) == [".github/workflows/ci.yml"]
+
+    def test_language(self, tree):
+        records = assess_directory(
+            str(tree), scan_filter=ScanFilter(languages=["python", "bash"]))
+        assert paths(records) == ["bin/tool", "src/app.py"]
+
+    def test_product_and_kind(self, tree):
+        selection = ScanFilter(products=["Claude"], kinds=["instructions"])
+        assert paths(assess_directory(str(tree), scan_filter=selection)) == [
+            "CLAUDE.md"]
+
+    def test_matches_unfiltered_scan(self, tree):
+        everything = assess_directory(str(tree), lines=True)
+        selection = ScanFilter(tags=["AI", "pip"])
+        expected = [r for r in everything if {"AI", "pip"} & set(r["meta"])]
+        assert assess_directory(
+            str(tree), lines=True, scan_filter=selection) == expected
+
+    def test_rejected_files_are_not_read(self, tree, monkeypatch):
+        counted, sniffed = [], []
+        count_lines = core.count_lines_and_encoding
+        read_head_tail = core.read_head_tail
+        monkeypatch.setattr(core, "count_lines_and_encoding",
+                            lambda path: counted.append(path) or count_lines(path))
+        monkeypatch.setattr(core, "read_head_tail",
+                            lambda path: sniffed.append(path) or read_head_tail(path))
+        records = scan_directory(
+            str(tree), lines=True, scan_filter=ScanFilter(tags=["workflow"]))
+        assert len(records) == 1
+        assert [os.path.basename(path) for path in counted] == ["ci.yml"]
+        # bin/tool and notes would need a shebang read; their paths rule them out.
+        assert sniffed == []
+
+    def test_generated_tag_waits_for_the_content_check(self, tmp_path):
+        (tmp_path / "api.go").write_text(
+            "// Code generated by protoc-gen-go. DO NOT EDIT.\npackage api\n")
+        (tmp_path / "main.go").write_text("package main\n")
+        selection = ScanFilter(tags=["generated"])
+        assert paths(assess_directory(
+            str(tmp_path), skip_generated=True, scan_filter=selection)) == [
+            "api.go"]
+        assert assess_directory(str(tmp_path), scan_filter=selection) == []
+
+    def test_find_ai_files(self, tree):
+        found = find_ai_files(str(tree), scan_filter=ScanFilter(kinds=["command"]))
+        assert [path.replace(os.sep, "/") for path in found] == [
+            ".claude/commands/build.md"]
+
+    def test_find_ai_files_directories(self, tree):
+        found = find_ai_files(str(tree), all_files=True,
+                              scan_filter=ScanFilter(kinds=["directory"]))
+        assert found and all(v["kind"] == "directory" for v in found.values())
+        found = find_ai_files(str(tree), all_files=True,
+                              scan_filter=ScanFilter(languages=["Markdown"]))
+        assert found and all(v["kind"] != "directory" for v in found.values())
+
+    def test_extract_urls(self, tree):
+        records = extract_urls_from_directory(
+            str(tree), scan_filter=ScanFilter(languages=["Python"]))
+        assert records == [{"path": os.path.join("src", "app.py"),
+                            "urls": ["https://app.example.com"],
+                            "encoding": "utf-8"}]
+
+
+class TestFilterOptions:
+    """The CLI options."""
+
+    def test_assess(self, tree):
+        result = CliRunner().invoke(cli, [
+            "assess", str(tree), "--tag", "pip", "--tag", "workflow",
+            "--lines", "--json"])
+        assert result.exit_code == 0
+        payload = json.loads(result.stdout)
+        assert payload["count"] == 2
+        assert payload["total_lines"] == 3
+
+    def test_unknown_still_works(self, tree):
+        result = CliRunner().invoke(cli, ["assess", str(tree), "-unknown", "--json"])
+        payload = json.loads(result.stdout)
+        assert paths(payload["files"]) == ["notes"]
+
+    def test_ai(self, tree):
+        result = CliRunner().invoke(
+            cli, ["ai", str(tree), "--product", "claude", "--kind", "command",
+                  "--json"])
+        assert result.exit_code == 0
+        payload = json.loads(result.stdout)
+        assert [p["path"] for p in payload["paths"]] == [
+            os.path.join(".claude", "commands", "build.md")]
+
+    def test_unknown_tag_is_a_usage_error(self, tree):
+        result = CliRunner().invoke(cli, ["assess", str(tree), "--tag", "nope"])
+        assert result.exit_code == 2
+        assert "unknown tag 'nope'" in result.output
@@ -0,0 +1,200 @@
+"""
+Tests for the mergeable sketches in panopticas.sketches, for sketch_urls(),
+and for `panopticas urls --sketch` and `panopticas merge-sketches`.
+"""
+
+import json
+import random
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import CountMinSketch, HyperLogLog, UrlSketch, sketch_urls
+from panopticas.cli import cli
+
+
+class TestHyperLogLog:
+    """Distinct-count estimates, merging and serialisation."""
+
+    @pytest.mark.parametrize("count", [0, 1, 100, 5000, 60000])
+    def test_estimate_within_error(self, count):
+        sketch = HyperLogLog()
+        sketch.update(f"https://example.com/{i}" for i in range(count))
+        sketch.update(f"https://example.com/{i}" for i in range(count // 2))
+        assert len(sketch) == pytest.approx(count, rel=0.03, abs=1)
+
+    def test_merge_is_the_union(self):
+        first, second, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        first.update(str(i) for i in range(20000))
+        second.update(str(i) for i in range(10000, 30000))
+        both.update(str(i) for i in range(30000))
+        first.merge(second)
+        assert first.registers == both.registers
+
+    def test_round_trip(self):
+        sketch = HyperLogLog(10)
+        sketch.update(["a", "b", "c"])
+        copy = HyperLogLog.from_dict(json.loads(json.dumps(sketch.as_dict())))
+        assert copy.registers == sketch.registers
+        assert len(copy) == 3
+
+    def test_different_precisions_do_not_merge(self):
+        with pytest.raises(ValueError, match="cannot merge precision 10"):
+            HyperLogLog(12).merge(HyperLogLog(10))
+
+    def test_precision_range(self):
+        with pytest.raises(ValueError, match="precision must be 4 to 18"):
+            HyperLogLog(20)
+
+
+class TestCountMinSketch:
+    """Frequency estimates and the top items."""
+
+    def test_never_underestimates_and_finds_heavy_hitters(self):
+        rng = random.Random(48)
+        truth = {}
+        sketch = CountMinSketch(width=256, depth=4, top=5)
+        for _ in range(20000):
+            item = f"h{int(rng.paretovariate(1.1)) % 2000}"
+            truth[item] = truth.get(item, 0) + 1
+            sketch.add(item)
+        assert all(sketch.estimate(item) >= count
+                   for item, count in truth.items())
+        heaviest = sorted(truth, key=truth.get, reverse=True)[:3]
+        assert [item for item, _ in sketch.most_common()[:3]] == heaviest
+        assert sketch.total == 20000
+
+    def test_merge_adds_counts_and_keeps_the_top(self):
+        first = CountMinSketch(top=2)
+        second = CountMinSketch(top=2)
+        first.add("a", 5)
+        first.add("b", 3)
+        second.add("c", 10)
+        second.add("b", 4)
+        first.merge(second)
+        assert first.most_common() == [("c", 10), ("b", 7)]
+        assert first.total == 22
+
+    def test_round_trip(self):
+        sketch = CountMinSketch(width=64, depth=3)
+        sketch.add("github.com", 7)
+        copy = CountMinSketch.from_dict(json.loads(json.dumps(sketch.as_dict())))
+        assert copy.counts == sketch.counts
+        assert copy.most_common() == [("github.com", 7)]
+
+    def test_different_shapes_do_not_merge(self):
+        with pytest.raises(ValueError, match="cannot merge a 64x4 sketch"):
+            CountMinSketch(width=128).merge(CountMinSketch(width=64))
+
+
+def url_files(seed, files=200):
+    rng = random.Random(seed)
+    return [[f"https://h{rng.randrange(50)}.example.com/{rng.randrange(2000)}"
+             for _ in range(rng.randrange(1, 20))] for _ in range(files)]
+
+
+class TestUrlSketch:
+    """UrlSketch: per tree, merged, and in fixed memory."""
+
+    def test_summary(self):
+        sketch = UrlSketch()
+        sketch.add_file(["https://github.com/a", "https://github.com/a",
+                         "https://api.github.com/b", "https://"])
+        sketch.add_file(["http://example.com"])
+        assert sketch.summary() == {
+            "files": 2, "urls": 5, "distinct_urls": 4, "distinct_hosts": 3,
+            "top_hosts": [{"host": "github.com", "urls": 2},
+                          {"host": "api.github.com", "urls": 1},
+                          {"host": "example.com", "urls": 1}]}
+
+    def test_merge_matches_one_sketch_of_everything(self):
+        repos = [url_files(seed) for seed in range(3)]
+        merged = UrlSketch()
+        whole = UrlSketch()
+        for files in repos:
+            repo = UrlSketch()
+            for urls in files:
+                repo.add_file(urls)
+                whole.add_file(urls)
+            merged.merge(UrlSketch.from_dict(json.loads(json.dumps(
+                repo.as_dict()))))
+        # The registers and counters are exactly those of one sketch; the top
+        # candidates may differ at the boundary, but not their estimates.
+        assert merged.distinct_urls.registers == whole.distinct_urls.registers
+        assert merged.distinct_hosts.registers == \
+            whole.distinct_hosts.registers
+        assert merged.hosts.counts == whole.hosts.counts
+        assert (merged.files, merged.urls) == (whole.files, whole.urls)
+        top = merged.summary()["top_hosts"]
+        assert top[0] == whole.summary()["top_hosts"][0]
+        assert all(entry["urls"] == whole.hosts.estimate(entry["host"])
+                   for entry in top)
+
+    def test_size_does_not_grow_with_urls(self):
+        small, large = UrlSketch(), UrlSketch()
+        small.add_file(["https://a.example"])
+        for index in range(2000):
+            large.add_file([f"https://h{index}.example/{n}" for n in range(20)])
+        size = len(json.dumps(large.as_dict()))
+        assert size < 200_000
+        assert (len(large.hosts.counts), len(large.distinct_urls.registers)) \
+            == (len(small.hosts.counts), len(small.distinct_urls.registers))
+
+    def test_bad_document(self):
+        with pytest.raises(ValueError, match="not a URL sketch: no 'urls'"):
+            UrlSketch.from_dict({"files": 1})
+
+
+class TestSketchCommands:
+    """sketch_urls(), `urls --sketch` and `merge-sketches`."""
+
+    @pytest.fixture
+    def repos(self, tmp_path):
+        for name, text in (("one", "https://github.com/a https://a.example\n"),
+                           ("two", "https://github.com/b\n")):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / "README.md").write_text(text)
+        return tmp_path
+
+    def test_sketch_urls(self, repos):
+        summary = sketch_urls(repos).summary()
+        assert summary["urls"] == 3
+        assert summary["distinct_hosts"] == 2
+        assert summary["top_hosts"][0] == {"host": "github.com", "urls": 2}
+
+    def test_urls_sketch_and_merge(self, repos, tmp_path):
+        runner = CliRunner()
+        paths = []
+        for name in ("one", "two"):
+            result = runner.invoke(
+                cli, ["urls", "--sketch", str(repos / name), "--json"])
+            assert result.exit_code == 0, result.output
+            path = tmp_path / f"{name}.json"
+            path.write_text(result.stdout)
+            paths.append(str(path))
+        result = runner.invoke(cli, ["merge-sketches", *paths, "--json"])
+        assert result.exit_code == 0, result.output
+        payload = json.loads(result.stdout)
+        assert [repo["directory"] for repo in payload["repos"]] == [
+            str(repos / "one"), str(repos / "two")]
+        assert payload["total"]["distinct_urls"] == 3
+        assert payload["total"]["top_hosts"][0] == {
+            "host": "github.com", "urls": 2}
+
+        merged = tmp_path / "merged.json"
+        merged.write_text(result.stdout)
+        result = runner.invoke(cli, ["merge-sketches", str(merged), paths[0]])
+        assert result.exit_code == 0, result.output
+        assert "Total" in result.output
+
+    def test_merge_rejects_other_json(self, tmp_path):
+        path = tmp_path / "urls.json"
+        path.write_text('{"directory": ".", "files": []}')
+        result = CliRunner().invoke(cli, ["merge-sketches", str(path)])
+        assert result.exit_code == 1
+        assert "not the JSON of `urls --sketch`" in result.output
+
+    def test_modes_cannot_be_combined(self, repos):
+        result = CliRunner().invoke(
+            cli, ["urls", "--sketch", "--by-host", str(repos)])
+        assert result.exit_code == 2
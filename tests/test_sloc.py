@@ -0,0 +1,259 @@
+"""
+Tests for count_sloc() and the code/comment/blank state machine in
+panopticas.sloc, and for the sloc option of the directory scans and
+`assess --sloc`.
+"""
+
+import json
+import tracemalloc
+
+import pytest
+from click.testing import CliRunner
+
+from panopticas import (
+    SlocCounts, assess_directory, count_lines, count_sloc, scan_directory)
+from panopticas import core
+from panopticas.cli import cli
+from panopticas.sloc import summarise, syntax_for
+
+
+def sloc(language, text):
+    """Count `text` as one chunk with `language`'s syntax."""
+    return syntax_for(language).count_chunks([text.encode()])
+
+
+class TestCommentSyntax:
+    """The state machine on in-memory text."""
+
+    def test_python(self):
+        text = ('import os  # trailing\n'
+                '\n'
+                '# comment\n'
+                '"""Docstring\n'
+                '\n'
+                '# not a comment\n'
+                '"""\n'
+                'x = "# not a comment"\n')
+        assert sloc("Python", text) == SlocCounts(code=5, comment=1, blank=2)
+
+    def test_c_block_comments(self):
+        text = ('/*\n'
+                ' * Licence.\n'
+                ' */\n'
+                'int x; /* trailing */\n'
+                '/* a */ int y;\n'
+                '// line\n'
+                '   \n'
+                'int z;')
+        assert sloc("C", text) == SlocCounts(code=3, comment=4, blank=1)
+
+    def test_comment_markers_in_strings(self):
+        text = ('char *a = "/* not */";\n'
+                'char *b = "// not";\n'
+                'char c = \'"\';\n'
+                'int d;\n')
+        assert sloc("C", text) == SlocCounts(code=4)
+
+    def test_escaped_quote_does_not_close_string(self):
+        text = 'x = "say \\"# hi\\""\n# real\n'
+        assert sloc("Python", text) == SlocCounts(code=1, comment=1)
+
+    def test_unclosed_string_ends_at_line_end(self):
+        text = 'x = "open\n# comment\n'
+        assert sloc("Python", text) == SlocCounts(code=1, comment=1)
+
+    def test_nested_block_comments(self):
+        text = ('/* outer\n'
+                '/* inner */\n'
+                'still comment */\n'
+                'fn main() {}\n')
+        assert sloc("Rust", text) == SlocCounts(code=1, comment=3)
+        # Without nesting the first */ closes the comment.
+        assert sloc("C", text) == SlocCounts(code=2, comment=2)
+
+    def test_template_literal_spans_lines(self):
+        text = ('const s = `\n'
+                '// inside\n'
+                '`;\n'
+                '// outside\n')
+        assert sloc("JavaScript", text) == SlocCounts(code=3, comment=1)
+
+    def test_sql_and_html(self):
+        assert sloc("SQL", "-- c\nSELECT '--';\n") == SlocCounts(1, 1, 0)
+        assert sloc("HTML", "<!--\nc\n-->\n<p>\n") == SlocCounts(1, 3, 0)
+
+    def test_crlf_and_empty(self):
+        assert sloc("Python", "x\r\n\r\n# c\r\n") == SlocCounts(1, 1, 1)
+        assert sloc("Python", "") == SlocCounts()
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+    def test_chunk_boundaries(self, size):
+        text = ('/* a\n\n b */ int x; // c\nchar *s = "/* \\" */";\n'
+                '\n// d\nint y;').encode()
+        syntax = syntax_for("C")
+        whole = syntax.count_chunks([text])
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert syntax.count_chunks(chunks) == whole
+
+    @pytest.mark.parametrize("language, text", [
+        ("Python", '# a\n"""doc\n\n"""\nx = "\\"" # b\n\n'),
+        ("HTML", "<p>\n<!-- a\n\n-->\n<!--b--><i>\n"),
+        ("SQL", "-- a\nSELECT '--\\'';\n\n/* b */\n"),
+    ])
+    def test_chunk_boundaries_mid_delimiter(self, language, text):
+        syntax = syntax_for(language)
+        text = text.encode()
+        whole = syntax.count_chunks([text])
+        for size in (1, 2, 3, 5):
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            assert syntax.count_chunks(chunks) == whole, size
+
+    def test_long_line_counted_in_bounded_memory(self):
+        """A multi-MB line without a newline is not gathered into memory."""
+        piece = b'a=1;/* c */b="x/*y";// d ' * 4
+        total = 4 * 1024 * 1024 // len(piece)
+        chunks = (piece * 64 for _ in range(total // 64))
+        tracemalloc.start()
+        counts = syntax_for("JavaScript").count_chunks(chunks)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        # The trailing // d makes the one line code with a comment.
+        assert counts == SlocCounts(code=1)
+        assert peak < 64 * 1024
+
+    def test_unknown_language(self):
+        assert syntax_for("Markdown") is None
+        assert syntax_for("Unknown") is None
+
+
+class TestCountSloc:
+    """count_sloc() on files."""
+
+    def test_counts_file(self, tmp_path):
+        path = tmp_path / "app.py"
+        path.write_text("# c\n\nprint(1)\n")
+        assert count_sloc(str(path)) == SlocCounts(code=1, comment=1, blank=1)
+
+    def test_lines_match_count_lines(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(core, "LINE_COUNT_CHUNK_BYTES", 16)
+        path = tmp_path / "app.c"
+        path.write_text("/* é\n */\nint x; // ü\n\n" * 50 + "int y;")
+        counts = count_sloc(str(path))
+        assert counts.lines == count_lines(str(path)) == 201
+        assert counts == SlocCounts(code=51, comment=100, blank=50)
+
+    def test_language_given(self, tmp_path):
+        path = tmp_path / "script"
+        path.write_text("# c\necho hi\n")
+        assert count_sloc(str(path)) is None
+        assert count_sloc(str(path), "Shell") == SlocCounts(1, 1, 0)
+
+    def test_shebang_language(self, tmp_path):
+        path = tmp_path / "run"
+        path.write_text("#!/bin/bash\n# c\necho hi\n")
+        assert count_sloc(str(path)) == SlocCounts(code=1, comment=2)
+
+    def test_none_cases(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(core, "LINE_COUNT_CHUNK_BYTES", 16)
+        binary = tmp_path / "a.py"
+        binary.write_bytes(b"x = 1\x00\n")
+        truncated = tmp_path / "b.py"
+        truncated.write_bytes("# ok\n".encode("utf-16") + b"x")
+        markdown = tmp_path / "c.md"
+        markdown.write_text("# Title\n")
+        for path in (binary, truncated, markdown, tmp_path / "missing.py"):
+            assert count_sloc(str(path)) is None
+
+    @pytest.mark.parametrize("encoding", [
+        "utf-8", "utf-8-sig", "latin-1", "utf-16", "utf-16-le", "utf-32"])
+    def test_encodings(self, tmp_path, monkeypatch, encoding):
+        # The same source counts the same in any encoding count_lines() reads.
+        monkeypatch.setattr(core, "LINE_COUNT_CHUNK_BYTES", 16)
+        path = tmp_path / "caf\u00e9.py"
+        path.write_bytes((
+            "# caf\u00e9 cr\u00e8me\n" * 10
+            + "x = '\u00e9'  # \u00e0 la carte\n\n"
+            + '"""\n\u00a0docstring\n"""\n').encode(encoding))
+        assert count_sloc(str(path)) == SlocCounts(code=4, comment=10, blank=1)
+        assert count_sloc(str(path)).lines == core.count_lines(path)
+
+
+class TestSummarise:
+    """summarise() — per-language totals."""
+
+    def test_totals_most_code_first(self):
+        pairs = [
+            ("Python", SlocCounts(10, 2, 1)),
+            ("C", SlocCounts(30, 5, 5)),
+            ("Python", SlocCounts(25, 0, 3)),
+            ("Markdown", None),
+        ]
+        assert summarise(pairs) == {
+            "Python": {"files": 2, "code": 35, "comment": 2, "blank": 4},
+            "C": {"files": 1, "code": 30, "comment": 5, "blank": 5},
+        }
+        assert list(summarise(pairs)) == ["Python", "C"]
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "app.py").write_text("# c\n\nprint(1)\n")
+    (tmp_path / "lib.c").write_text("/* c */\nint x;\n")
+    (tmp_path / "README.md").write_text("# Title\n")
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "vendor" / "dep.py").write_text("x = 1\n")
+    return tmp_path
+
+
+class TestScanSloc:
+    """The sloc option of scan_directory() and assess_directory()."""
+
+    def test_records_carry_sloc(self, project):
+        records = {r["path"]: r for r in assess_directory(str(project), sloc=True)}
+        assert records["app.py"]["sloc"] == {"code": 1, "comment": 1, "blank": 1}
+        assert records["lib.c"]["sloc"] == {"code": 1, "comment": 1, "blank": 0}
+        assert records["README.md"]["sloc"] is None
+        assert "lines" not in records["app.py"]
+
+    def test_not_counted_by_default(self, project):
+        assert all(r.sloc is None for r in scan_directory(str(project)))
+        assert "sloc" not in assess_directory(str(project))[0]
+
+    def test_skip_generated(self, project):
+        records = {r["path"]: r for r in assess_directory(
+            str(project), sloc=True, skip_generated=True)}
+        assert records["vendor/dep.py"]["sloc"] is None
+        assert records["app.py"]["sloc"] is not None
+
+    def test_path_only_raises(self, project):
+        with pytest.raises(ValueError):
+            scan_directory(str(project), path_only=True, sloc=True)
+
+
+class TestAssessSlocCommand:
+    """`panopticas assess --sloc`."""
+
+    def test_json(self, project):
+        result = CliRunner().invoke(
+            cli, ["assess", "--sloc", "--json", str(project)])
+        assert result.exit_code == 0, result.output
+        payload = json.loads(result.stdout)
+        files = {f["path"]: f for f in payload["files"]}
+        assert files["app.py"]["sloc"] == {"code": 1, "comment": 1, "blank": 1}
+        assert files["README.md"]["sloc"] is None
+        assert payload["sloc_by_language"] == {
+            "Python": {"files": 2, "code": 2, "comment": 1, "blank": 1},
+            "C": {"files": 1, "code": 1, "comment": 1, "blank": 0},
+        }
+
+    def test_table(self, project):
+        result = CliRunner().invoke(cli, ["assess", "--sloc", str(project)])
+        assert result.exit_code == 0, result.output
+        assert "Lines by language" in result.output
+        assert "Total" in result.output
+
+    def test_path_only_is_usage_error(self, project):
+        result = CliRunner().invoke(
+            cli, ["assess", "--sloc", "--path-only", str(project)])
+        assert result.exit_code == 2
+        assert "--sloc" in result.output
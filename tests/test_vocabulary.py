@@ -5,13 +5,21 @@ The drift test is the important one: it synthesises a path for every rule in
 METADATA_RULES and AI_RULES and asserts that every tag those paths produce is
 present in get_tags(). A future rule whose tags escape the vocabulary fails
 here rather than shipping silently.
+
+Also covers the interned form of the vocabularies: get_vocabulary(), its tag
+bitmasks and language IDs, and the FileRecords scan_directory() builds.
 """
 
+import os
+
 import pytest
 
 from panopticas import (
-    get_filename_metatypes, get_filetypes, get_languages, get_tags)
-from panopticas.constants import AI_RULES, IMPLICIT_TAGS, METADATA_RULES
+    FileRecord, Vocabulary, assess_directory, get_filename_metatypes,
+    get_filetypes, get_languages, get_tags, get_vocabulary, load_rule_packs,
+    scan_directory)
+from panopticas.constants import (
+    AI_RULES, GENERATED_RULES, IMPLICIT_TAGS, METADATA_RULES)
 
 
 def sample_paths():
@@ -22,8 +30,12 @@ def sample_paths():
         yield filename
     for fragment in METADATA_RULES["path_contains_rules"]:
         yield f"{fragment.rstrip('/')}/sample.yml"
-    # is_pip_requirements() is the only function rule.
+    # One name per function rule's predicate.
     yield "requirements.txt"
+    yield "Gemfile"
+    yield "Dockerfile.dev"
+    yield "docker-compose.yml"
+    yield "tsconfig.build.json"
     # The basename-without-extension special case.
     yield "LICENSE"
     for filename in AI_RULES["exact_filename"]:
@@ -33,6 +45,12 @@ def sample_paths():
         yield f"{fragment}sample.md" if fragment.endswith("/") else fragment
     for suffix in AI_RULES["filename_suffix"]:
         yield f"sample{suffix}"
+    for fragment in GENERATED_RULES["path_contains"]:
+        yield f"{fragment.strip('/')}/sample.c"
+    for suffix in GENERATED_RULES["filename_suffix"]:
+        yield f"sample{suffix}"
+    for filename in GENERATED_RULES["exact_filename"]:
+        yield filename
 
 
 class TestGetTags:
@@ -163,3 +181,107 @@ class TestGetLanguages:
                          "ASP.NET", "go.sum", "Text"):
             assert excluded not in languages
             assert excluded in get_filetypes()
+
+
+class TestInternedVocabulary:
+    """get_vocabulary() — tags and languages as integer IDs."""
+
+    def test_ids_follow_vocabulary_order(self):
+        vocabulary = get_vocabulary()
+        assert vocabulary.tags[:len(get_tags())] == get_tags()
+        assert vocabulary.language_name(0) == "Unknown"
+        for filetype in get_filetypes():
+            assert vocabulary.language_name(
+                vocabulary.language_id(filetype)) == filetype
+
+    def test_is_cached(self):
+        assert get_vocabulary() is get_vocabulary()
+
+    def test_mask_round_trip(self):
+        vocabulary = get_vocabulary()
+        tags = ["workflow", "pipeline", "GitHub", "Git", "GitHub"]
+        mask = vocabulary.tag_mask(tags)
+        assert bin(mask).count("1") == 4
+        # Deduplicated, and in get_tags() order.
+        assert vocabulary.tag_names(mask) == [
+            "Git", "GitHub", "pipeline", "workflow"]
+        assert vocabulary.tag_names(0) == []
+
+    def test_intern_tags_keeps_first_seen_order(self):
+        vocabulary = get_vocabulary()
+        tags = ["workflow", "pipeline", "GitHub", "Git", "GitHub"]
+        mask, order = vocabulary.intern_tags(tags)
+        assert mask == vocabulary.tag_mask(tags)
+        assert vocabulary.tag_names_in_order(order) == [
+            "workflow", "pipeline", "GitHub", "Git"]
+        # Equal orders are one shared tuple.
+        assert vocabulary.intern_tags(list(tags))[1] is order
+        assert vocabulary.intern_tags([]) == (0, ())
+
+    def test_tag_counts(self):
+        vocabulary = get_vocabulary()
+        masks = [vocabulary.tag_mask(tags) for tags in (
+            ["Git", "GitHub"], ["Git"], [], ["Python", "Git"])]
+        assert vocabulary.tag_counts(masks) == {
+            "Git": 3, "GitHub": 1, "Python": 1}
+
+    def test_unknown_names_are_interned(self):
+        vocabulary = Vocabulary(["a", "b"], ["Unknown"])
+        mask = vocabulary.tag_mask(["c", "a"])
+        assert vocabulary.tag_names(mask) == ["a", "c"]
+        assert vocabulary.language_id("bash") == 1
+        assert vocabulary.language_id("bash") == 1
+        assert vocabulary.language_name(1) == "bash"
+
+
+class TestScanDirectory:
+    """scan_directory() records and the assess_directory() view of them."""
+
+    def test_records_match_assess_directory(self, tmp_path):
+        (tmp_path / "app.py").write_text("print(1)\n")
+        (tmp_path / ".github" / "workflows").mkdir(parents=True)
+        (tmp_path / ".github" / "workflows" / "ci.yml").write_text("on: push\n")
+        (tmp_path / "tool").write_text("#!/bin/bash\necho\n")
+        records = scan_directory(str(tmp_path), lines=True)
+        vocabulary = get_vocabulary()
+        assert all(isinstance(r, FileRecord) for r in records)
+        assert [r.as_dict(vocabulary, True) for r in records] == \
+            assess_directory(str(tmp_path), lines=True)
+        by_path = {r.path: r for r in records}
+        assert vocabulary.language_name(by_path["app.py"].language) == "Python"
+        assert vocabulary.language_name(by_path["tool"].language) == "bash"
+        ci = by_path[os.path.join(".github", "workflows", "ci.yml")]
+        assert ci.tags & vocabulary.tag_mask(["workflow"])
+        assert by_path["app.py"].lines == 1
+
+    def test_meta_in_rule_order(self, tmp_path):
+        (tmp_path / "requirements.txt").write_text("click\n")
+        (tmp_path / ".github" / "workflows").mkdir(parents=True)
+        (tmp_path / ".github" / "workflows" / "python-app.yml").write_text(
+            "on: push\n")
+        records = assess_directory(str(tmp_path))
+        assert records
+        for record in records:
+            assert record["meta"] == get_filename_metatypes(record["path"])
+        meta = {r["path"]: r["meta"] for r in records}
+        assert meta["requirements.txt"] == [
+            "pip", "Python", "PyPi", "dependencies"]
+
+    def test_records_have_slots(self):
+        record = FileRecord("a.py", 0, 0)
+        with pytest.raises(AttributeError):
+            record.extra = 1
+
+    def test_vocabulary_follows_rule_packs(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+        pack = tmp_path / "pack.toml"
+        pack.write_text('[METADATA_RULES.exact_filename_rules]\n'
+                        '"deploy.yaml" = ["deploy"]\n')
+        before = get_vocabulary()
+        load_rule_packs([pack])
+        try:
+            assert get_vocabulary() is not before
+            assert "deploy" in get_vocabulary().tags
+        finally:
+            load_rule_packs([])
+        assert "deploy" not in get_vocabulary().tags